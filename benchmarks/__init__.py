@@ -0,0 +1,8 @@
+# Benchmark aliases, to shorten imports
+import benchmarks.generator
+RspShape = benchmarks.generator.RspShape
+generate_rsp = benchmarks.generator.generate_rsp
+
+import benchmarks.runner
+run_benchmarks = benchmarks.runner.run_benchmarks
+compare = benchmarks.runner.compare
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+import os
+import sys
+import argparse
+import dataclasses
+
+from nist_tests_vectors.cli import Logger
+
+from benchmarks.generator import RspShape, PRESETS, generate_rsp
+from benchmarks.runner import run_benchmarks, compare, save_results, load_results, BENCHMARKS, \
+                              DEFAULT_RUNS, DEFAULT_TOLERANCE
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks of the parser and the exporters on synthetic "
+                                                 "RSP files")
+    parser.add_argument("--preset", choices=PRESETS, default="medium",
+                        help="shape of the synthetic RSP file, overridden by the options below")
+
+    for shape_field in dataclasses.fields(RspShape):
+        parser.add_argument(f"--{shape_field.name.replace('_', '-')}", type=int, dest=shape_field.name,
+                            help=f"{shape_field.name.replace('_', ' ')} of the synthetic RSP file")
+
+    parser.add_argument("--benchmarks", nargs="+", choices=BENCHMARKS, metavar="BENCHMARK",
+                        help=f"benchmarks to run among {', '.join(BENCHMARKS)}, all of them by default")
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS,
+                        help="amount of runs of every benchmark, the best one is kept")
+    parser.add_argument("--output", "-o",
+                        help="path to the JSON file the results are saved to")
+    parser.add_argument("--baseline",
+                        help="path to the JSON results the new ones are compared against")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="save the results as the baseline instead of comparing them")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="relative throughput loss or peak memory growth reported as a regression")
+    parser.add_argument("--generate", metavar="RSP_PATH",
+                        help="only write the synthetic RSP file to this path")
+
+    args = parser.parse_args()
+    shape = dataclasses.replace(PRESETS[args.preset], **{
+        shape_field.name: getattr(args, shape_field.name)
+        for shape_field in dataclasses.fields(RspShape) if getattr(args, shape_field.name) is not None
+    })
+
+    if args.generate:
+        generate_rsp(args.generate, shape)
+        Logger.info(f"File '{args.generate}' has been generated successfully")
+        return
+
+    results = run_benchmarks(shape, args.benchmarks, args.runs)
+
+    for name, result in results["results"].items():
+        Logger.info(f"{name:<14}{result['seconds']:>9.3f} s{result['mb_per_s']:>9.1f} MB/s"
+                    f"{result['vectors_per_s']:>12.0f} vectors/s{result['peak_memory_mb']:>9.1f} MB peak")
+
+    if args.output:
+        save_results(results, args.output)
+
+    if args.baseline is None:
+        return
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        save_results(results, args.baseline)
+        Logger.info(f"Baseline saved to '{args.baseline}'")
+        return
+
+    try:
+        regressions = compare(results, load_results(args.baseline), args.tolerance)
+    except ValueError as ve:
+        Logger.error(str(ve))
+        sys.exit(1)
+
+    for regression in regressions:
+        Logger.error(regression)
+
+    if regressions:
+        sys.exit(1)
+
+    Logger.info(f"No regression against '{args.baseline}'")
+
+
+if __name__ == "__main__":
+    main()
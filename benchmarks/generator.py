@@ -0,0 +1,82 @@
+# coding: utf-8
+
+import random
+from dataclasses import dataclass, asdict
+
+# Amount of test vectors written at once
+_WRITE_BATCH_SIZE = 256
+
+
+@dataclass
+class RspShape:
+    """
+    Shape of a synthetic RSP file.
+
+    Every test vectors block holds a COUNT followed by fields hexstring fields of
+    value_bytes bytes each. With repeat greater than 1, consecutive test vectors share
+    the values of all their fields but the last one, like Monte-Carlo test vectors
+    share their keys. metadata_lines comment lines precede the first profile, enough
+    of them span several read chunks.
+    """
+    profiles: int = 10
+    vectors_per_profile: int = 1000
+    fields: int = 4
+    value_bytes: int = 32
+    metadata_lines: int = 8
+    repeat: int = 1
+    seed: int = 0
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+PRESETS = {
+    "small": RspShape(profiles=4, vectors_per_profile=250),
+    "medium": RspShape(profiles=20, vectors_per_profile=2000),
+    "large": RspShape(profiles=50, vectors_per_profile=10000),
+    "mct": RspShape(profiles=20, vectors_per_profile=2000, repeat=100),
+    "metadata": RspShape(profiles=20, vectors_per_profile=2000, metadata_lines=20000),
+    "wide": RspShape(profiles=20, vectors_per_profile=500, fields=16, value_bytes=256),
+}
+
+
+def generate_rsp(path: str, shape: RspShape) -> None:
+    """
+    Writes a synthetic RSP file of the given shape, the same shape and seed always give
+    the same file.
+    """
+
+    if shape.value_bytes < 1 or shape.repeat < 1:
+        raise ValueError("Values must hold at least one byte and be repeated at least once")
+
+    rng = random.Random(shape.seed)
+    keys = [f"FIELD{field_idx}" for field_idx in range(shape.fields)]
+
+    with open(path, "w", encoding="utf-8") as rsp_fd:
+        for line_idx in range(shape.metadata_lines):
+            rsp_fd.write(f"# Synthetic test vectors, metadata line {line_idx}\n")
+
+        for profile_idx in range(shape.profiles):
+            rsp_fd.write(f"\n[PROFILE = {profile_idx}]\n[VALUE_BYTES = {shape.value_bytes}]\n\n")
+            values = []
+            lines = []
+
+            for count in range(shape.vectors_per_profile):
+                if count % shape.repeat == 0:
+                    values = [_random_hex(rng, shape.value_bytes) for _ in keys]
+                elif values:
+                    values[-1] = _random_hex(rng, shape.value_bytes)
+
+                lines.append(f"COUNT = {count}\n")
+                lines.extend(f"{key} = {value}\n" for key, value in zip(keys, values))
+                lines.append("\n")
+
+                if count % _WRITE_BATCH_SIZE == _WRITE_BATCH_SIZE - 1:
+                    rsp_fd.write("".join(lines))
+                    lines = []
+
+            rsp_fd.write("".join(lines))
+
+
+def _random_hex(rng: random.Random, value_bytes: int) -> str:
+    return rng.getrandbits(8 * value_bytes).to_bytes(value_bytes, "big").hex()
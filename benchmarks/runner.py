@@ -0,0 +1,164 @@
+# coding: utf-8
+
+import os
+import gc
+import json
+import time
+import functools
+import platform
+import tempfile
+import tracemalloc
+from typing import List, Dict, Callable, Optional
+
+from nist_tests_vectors import RspFile
+from nist_tests_vectors.exporter import save_as_json, save_as_c
+
+from benchmarks.generator import RspShape, generate_rsp
+
+# Bump whenever results are not comparable with the ones of previous versions anymore
+_RESULTS_VERSION = 1
+
+# Relative throughput loss, or peak memory growth, reported as a regression
+DEFAULT_TOLERANCE = 0.1
+
+DEFAULT_RUNS = 3
+
+
+def _iterate(rsp_path: str, _output_dir: str, engine: str = "file") -> None:
+    with RspFile(rsp_path, engine=engine) as rsp_file:
+        for profile in rsp_file:
+            for _ in profile.vectors:
+                pass
+
+
+def _access(rsp_path: str, _output_dir: str) -> None:
+    with RspFile(rsp_path) as rsp_file:
+        for profile in rsp_file:
+            for test_vectors in profile.vectors:
+                for key in test_vectors.keys():
+                    test_vectors[key]
+
+
+def _export_json(rsp_path: str, output_dir: str) -> None:
+    with RspFile(rsp_path) as rsp_file:
+        save_as_json(rsp_file, os.path.join(output_dir, "output.json"))
+
+
+def _export_c(rsp_path: str, output_dir: str) -> None:
+    with RspFile(rsp_path) as rsp_file:
+        save_as_c(rsp_file, os.path.join(output_dir, "output.c"))
+
+
+# Every benchmark reads the RSP file, and writes its outputs to an empty directory
+BENCHMARKS: Dict[str, Callable[[str, str], None]] = {
+    "iterate_file": _iterate,
+    "iterate_mmap": functools.partial(_iterate, engine="mmap"),
+    "access": _access,
+    "json": _export_json,
+    "c": _export_c,
+}
+
+
+def _time(benchmark: Callable[[str, str], None], rsp_path: str) -> float:
+    with tempfile.TemporaryDirectory() as output_dir:
+        gc.collect()
+        start = time.perf_counter()
+        benchmark(rsp_path, output_dir)
+
+        return time.perf_counter() - start
+
+
+def _peak_memory(benchmark: Callable[[str, str], None], rsp_path: str) -> int:
+    with tempfile.TemporaryDirectory() as output_dir:
+        gc.collect()
+        tracemalloc.start()
+
+        try:
+            benchmark(rsp_path, output_dir)
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+
+def run_benchmarks(shape: RspShape, names: Optional[List[str]] = None, runs: int = DEFAULT_RUNS) -> dict:
+    """
+    Generates an RSP file of the given shape and runs the given benchmarks on it, all of
+    them by default. Every benchmark is timed runs times and its best time is kept, its
+    peak memory is measured by an additional run, as tracing allocations slows it down.
+    Memory mapped by the mmap engine is not traced.
+    """
+
+    names = names or list(BENCHMARKS)
+    unknown_names = [name for name in names if name not in BENCHMARKS]
+
+    if unknown_names:
+        raise ValueError(f"Unknown benchmarks: {', '.join(unknown_names)}, expected some of: {', '.join(BENCHMARKS)}")
+
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        rsp_path = os.path.join(tmp_dir, "synthetic.rsp")
+        generate_rsp(rsp_path, shape)
+        input_size = os.path.getsize(rsp_path)
+        vectors_count = shape.profiles * shape.vectors_per_profile
+
+        for name in names:
+            seconds = min(_time(BENCHMARKS[name], rsp_path) for _ in range(runs))
+            peak_memory = _peak_memory(BENCHMARKS[name], rsp_path)
+
+            results[name] = {
+                "seconds": seconds,
+                "mb_per_s": input_size / seconds / 1e6,
+                "vectors_per_s": vectors_count / seconds,
+                "peak_memory_mb": peak_memory / 1e6,
+            }
+
+    return {
+        "version": _RESULTS_VERSION,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "shape": shape.to_dict(),
+        "input_size": input_size,
+        "vectors": vectors_count,
+        "results": results,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """
+    Returns the regressions of the results against the baseline: benchmarks whose
+    throughput dropped, or whose peak memory grew, by more than the tolerance.
+    Benchmarks of another shape can't be compared.
+    """
+
+    if baseline.get("version") != _RESULTS_VERSION or baseline["shape"] != results["shape"]:
+        raise ValueError("The baseline has been measured on another shape or by another version, "
+                         "it can't be compared")
+
+    regressions = []
+
+    for name, result in results["results"].items():
+        baseline_result = baseline["results"].get(name)
+
+        if baseline_result is None:
+            continue
+
+        if result["vectors_per_s"] < baseline_result["vectors_per_s"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['vectors_per_s']:.0f} vectors/s, "
+                               f"{baseline_result['vectors_per_s']:.0f} in the baseline")
+
+        if result["peak_memory_mb"] > baseline_result["peak_memory_mb"] * (1 + tolerance):
+            regressions.append(f"{name}: {result['peak_memory_mb']:.1f} MB peak memory, "
+                               f"{baseline_result['peak_memory_mb']:.1f} in the baseline")
+
+    return regressions
+
+
+def save_results(results: dict, path: str) -> None:
+    with open(path, "w", encoding="utf-8") as results_fd:
+        json.dump(results, results_fd, indent=4)
+
+
+def load_results(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as results_fd:
+        return json.load(results_fd)
@@ -4,4 +4,33 @@ RspFile = nist_tests_vectors.parser.RspFile
 Profile = nist_tests_vectors.parser.Profile
 TestVector = nist_tests_vectors.parser.TestVector
 TestVectors = nist_tests_vectors.parser.TestVectors
+VectorsSchema = nist_tests_vectors.parser.VectorsSchema
 RspParsingError = nist_tests_vectors.parser.RspParsingError
+
+import nist_tests_vectors.index
+RspIndex = nist_tests_vectors.index.RspIndex
+
+import nist_tests_vectors.field_types
+FieldTypes = nist_tests_vectors.field_types.FieldTypes
+
+import nist_tests_vectors.store
+RspStore = nist_tests_vectors.store.RspStore
+
+import nist_tests_vectors.columns
+RspColumns = nist_tests_vectors.columns.RspColumns
+ProfileColumns = nist_tests_vectors.columns.ProfileColumns
+
+import nist_tests_vectors.cache
+RspCache = nist_tests_vectors.cache.RspCache
+
+import nist_tests_vectors.parallel
+parse_in_parallel = nist_tests_vectors.parallel.parse_in_parallel
+
+import nist_tests_vectors.downloader
+download = nist_tests_vectors.downloader.download
+
+import nist_tests_vectors.archive
+RspArchive = nist_tests_vectors.archive.RspArchive
+
+import nist_tests_vectors.catalog
+RspCatalog = nist_tests_vectors.catalog.RspCatalog
@@ -0,0 +1,60 @@
+# coding: utf-8
+
+import tarfile
+import zipfile
+from typing import List, Iterator, Optional
+
+from nist_tests_vectors.parser import RspFile
+from nist_tests_vectors.engines import RSP_EXTENSION, _ZIP_EXTENSION, _TAR_EXTENSIONS
+
+
+class RspArchive:
+
+    """
+    RSP files held by a zip or tar archive, such as the ones NIST publishes, read without
+    extracting them.
+
+    Members are opened one at a time when iterating, each one being closed before the
+    next one is opened. Options are passed to every RspFile.
+    """
+
+    def __init__(self, path: str, **rsp_file_options):
+        self.path = path
+        self._rsp_file_options = rsp_file_options
+        self._members: Optional[List[str]] = None
+
+    @property
+    def members(self) -> List[str]:
+        """
+        Names of the RSP members of the archive, in the order they are stored.
+        """
+
+        if self._members is None:
+            if self.path.lower().endswith(_ZIP_EXTENSION):
+                with zipfile.ZipFile(self.path) as archive:
+                    names = [info.filename for info in archive.infolist() if not info.is_dir()]
+
+            elif self.path.lower().endswith(_TAR_EXTENSIONS):
+                with tarfile.open(self.path) as archive:
+                    names = [info.name for info in archive.getmembers() if info.isfile()]
+
+            else:
+                raise ValueError(f"'{self.path}' is not a zip or tar archive")
+
+            self._members = [name for name in names if name.lower().endswith(RSP_EXTENSION)]
+
+        return self._members
+
+    def open(self, member: str) -> RspFile:
+        if member not in self.members:
+            raise KeyError(f"'{self.path}' has no RSP member '{member}'")
+
+        return RspFile(self.path, member=member, **self._rsp_file_options)
+
+    def __iter__(self) -> Iterator[RspFile]:
+        for member in self.members:
+            with self.open(member) as rsp_file:
+                yield rsp_file
+
+    def __len__(self) -> int:
+        return len(self.members)
@@ -0,0 +1,200 @@
+# coding: utf-8
+
+import os
+import json
+import fcntl
+import tempfile
+from dataclasses import dataclass
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from nist_tests_vectors.index import RspIndex
+from nist_tests_vectors.parser import RspFile
+from nist_tests_vectors.store import RspStore, write_store, STORE_EXTENSION, _STORE_VERSION
+
+_INDEX_FILE_NAME = "index.json"
+_LOCK_FILE_NAME = "lock"
+
+DEFAULT_CACHE_MAX_SIZE = 1 << 30
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class RspCache:
+
+    """
+    Cache of parsed RSP files, stored in the NTVB format in a directory. Opening a file
+    that has already been parsed maps its NTVB copy instead of parsing it again.
+
+    Entries are keyed by the hash of the content of the RSP files. The path, size and
+    modification time of every RSP file are recorded along with its hash, so that files
+    that did not change are not hashed again. Once the cache exceeds max_size bytes,
+    the least recently used entries are removed.
+
+    Several processes can share a cache directory: entries and the index are written
+    to temporary files then renamed, and updates of the index are serialized with a lock.
+    Statistics only count the files opened through this instance.
+    """
+
+    def __init__(self, directory: str, max_size: Optional[int] = DEFAULT_CACHE_MAX_SIZE):
+        self.directory = directory
+        self.max_size = max_size
+        self.stats = CacheStats()
+
+        os.makedirs(directory, exist_ok=True)
+
+    def open(self, path: str, zero_copy: bool = False) -> RspStore:
+        """
+        Returns the content of the RSP file as an RspStore, parsing it only if it is not cached yet.
+        """
+
+        real_path = os.path.realpath(path)
+        stat = os.stat(real_path)
+        record = self._read_index().get(real_path)
+
+        if record is not None and record["size"] == stat.st_size and record["mtime_ns"] == stat.st_mtime_ns:
+            rsp_store = self._open_entry(record["hash"], zero_copy)
+
+            if rsp_store is not None:
+                self.stats.hits += 1
+                return rsp_store
+
+        content_hash = RspIndex.hash_file(real_path)
+        rsp_store = self._open_entry(content_hash, zero_copy)
+
+        if rsp_store is not None:
+            # Same content as a cached file, only the record of the path is missing
+            self.stats.hits += 1
+            self._update_index(real_path, stat, content_hash)
+            return rsp_store
+
+        self.stats.misses += 1
+        self._write_entry(real_path, content_hash)
+
+        # Mapped before updating the index, other processes may evict it from then on
+        rsp_store = RspStore(self._entry_path(content_hash), zero_copy)
+        self._update_index(real_path, stat, content_hash)
+
+        return rsp_store
+
+    def clear(self) -> None:
+        with self._lock():
+            for entry_name in self._entry_names():
+                os.remove(os.path.join(self.directory, entry_name))
+
+            self._write_index({})
+
+    @property
+    def size(self) -> int:
+        return sum(os.path.getsize(os.path.join(self.directory, entry_name)) for entry_name in self._entry_names())
+
+    def _entry_path(self, content_hash: str) -> str:
+        # Entries written by another version of the format are simply never used
+        return os.path.join(self.directory, f"{content_hash}-{_STORE_VERSION}{STORE_EXTENSION}")
+
+    def _entry_names(self):
+        return [file_name for file_name in os.listdir(self.directory) if file_name.endswith(STORE_EXTENSION)]
+
+    def _open_entry(self, content_hash: str, zero_copy: bool) -> Optional[RspStore]:
+        entry_path = self._entry_path(content_hash)
+
+        try:
+            rsp_store = RspStore(entry_path, zero_copy)
+        except FileNotFoundError:
+            # Never cached, or evicted by another process
+            return None
+
+        # The modification time of entries tells which ones have been used the least recently
+        try:
+            os.utime(entry_path)
+        except FileNotFoundError:
+            pass
+
+        return rsp_store
+
+    def _write_entry(self, real_path: str, content_hash: str) -> None:
+        entry_fd, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+
+        try:
+            with os.fdopen(entry_fd, "w+b") as out_fd, RspFile(real_path) as rsp_file:
+                write_store(rsp_file, out_fd)
+
+            os.replace(temporary_path, self._entry_path(content_hash))
+
+        except BaseException:
+            os.remove(temporary_path)
+            raise
+
+    def _read_index(self) -> Dict[str, dict]:
+        try:
+            with open(os.path.join(self.directory, _INDEX_FILE_NAME), "r") as index_fd:
+                return json.load(index_fd)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write_index(self, index: Dict[str, dict]) -> None:
+        index_fd, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+
+        with os.fdopen(index_fd, "w") as out_fd:
+            json.dump(index, out_fd)
+
+        os.replace(temporary_path, os.path.join(self.directory, _INDEX_FILE_NAME))
+
+    def _update_index(self, real_path: str, stat: os.stat_result, content_hash: str) -> None:
+        with self._lock():
+            index = self._read_index()
+            index[real_path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": content_hash}
+            self._evict(self._entry_path(content_hash))
+
+            # Records of evicted entries are useless
+            index = {
+                path: record for path, record in index.items()
+                if os.path.exists(self._entry_path(record["hash"]))
+            }
+            self._write_index(index)
+
+    def _evict(self, kept_entry_path: str) -> None:
+        if self.max_size is None:
+            return
+
+        entries = []
+
+        for entry_name in self._entry_names():
+            entry_path = os.path.join(self.directory, entry_name)
+
+            try:
+                entry_stat = os.stat(entry_path)
+            except FileNotFoundError:
+                continue
+
+            entries.append((entry_stat.st_mtime_ns, entry_stat.st_size, entry_path))
+
+        cache_size = sum(entry_size for _, entry_size, _ in entries)
+
+        for _, entry_size, entry_path in sorted(entries):
+            if cache_size <= self.max_size:
+                break
+
+            # The entry that has just been opened is kept, even if it exceeds the maximum size on its own
+            if entry_path == kept_entry_path:
+                continue
+
+            # Mapped entries remain readable once removed
+            os.remove(entry_path)
+            cache_size -= entry_size
+            self.stats.evictions += 1
+
+    @contextmanager
+    def _lock(self):
+        with open(os.path.join(self.directory, _LOCK_FILE_NAME), "a") as lock_fd:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_fd, fcntl.LOCK_UN)
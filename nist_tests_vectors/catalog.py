@@ -0,0 +1,333 @@
+# coding: utf-8
+
+import os
+import sys
+import json
+import base64
+import tempfile
+from array import array
+from dataclasses import dataclass
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Iterator, Optional, Union, Callable, Tuple
+
+from nist_tests_vectors.index import RspIndex, ProfileIndex
+from nist_tests_vectors.engines import RSP_EXTENSION
+from nist_tests_vectors.parser import RspFile, Profile, RspParsingError, _profile_matches
+
+# Bump whenever the layout of the catalog changes, older catalogs are then rebuilt
+_CATALOG_VERSION = 1
+
+CATALOG_FILE_NAME = ".ntv-catalog.json"
+
+# Amount of RSP files cataloged by each task submitted to the workers
+_FILES_PER_TASK = 16
+
+
+@dataclass
+class CatalogProfile:
+    """
+    Profile of an RSP file as recorded in the catalog: its position in the file, its
+    attributes, its amount of test vectors and the type of the fields of its first
+    test vectors.
+    """
+    path: str
+    position: int
+    attributes: Dict[str, str]
+    vectors_count: int
+    fields: Dict[str, str]
+
+
+class RspCatalog:
+
+    """
+    Index of a tree of RSP files, stored in a single file at the root of the tree.
+
+    The catalog records the metadata, profiles and byte offsets of every RSP file, so
+    that the profiles matching some attributes are found without opening any file, and
+    that the matching files are then opened without being scanned again.
+
+    Paths are relative to the directory of the catalog file. Files are checked against
+    their recorded size, modification time and content hash, as sidecar indexes are:
+    updating the catalog only parses the files that changed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.root = os.path.dirname(os.path.abspath(path))
+
+        with open(path, "r", encoding="utf-8") as catalog_fd:
+            content = json.load(catalog_fd)
+
+        if content.get("version") != _CATALOG_VERSION:
+            raise ValueError(f"'{path}' has been written by another version of the catalog, build it again")
+
+        # Records of the files, keyed by their path relative to the root
+        self._records: Dict[str, dict] = content["files"]
+
+        self.profiles: List[CatalogProfile] = [
+            CatalogProfile(os.path.join(self.root, relative_path), position, profile["attributes"],
+                           profile["count"], profile["fields"])
+            for relative_path, record in self._records.items()
+            for position, profile in enumerate(record["profiles"])
+        ]
+
+        # Profiles having every attribute value, built on the first lookup
+        self._by_attribute: Optional[Dict[Tuple[str, str], List[int]]] = None
+
+    @classmethod
+    def build(cls, directory: str, path: Optional[str] = None, workers: Optional[int] = None) -> "RspCatalog":
+        """
+        Catalogs the RSP files found in the directory and its subdirectories, in a pool of
+        processes. The catalog is written to path, by default at the root of the directory.
+        When the catalog already exists, only the files that changed are parsed again.
+        """
+
+        path = path or os.path.join(directory, CATALOG_FILE_NAME)
+        root = os.path.dirname(os.path.abspath(path))
+        previous_records = _read_records(path)
+        records: Dict[str, dict] = {}
+        stale_paths = []
+
+        for rsp_path in _walk_rsp_files(directory):
+            relative_path = os.path.relpath(rsp_path, root)
+            record = previous_records.get(relative_path)
+
+            if record is not None and _is_up_to_date(record, rsp_path):
+                records[relative_path] = record
+            else:
+                records[relative_path] = None
+                stale_paths.append(rsp_path)
+
+        tasks = [stale_paths[first:first + _FILES_PER_TASK] for first in range(0, len(stale_paths), _FILES_PER_TASK)]
+
+        if len(tasks) > 1 and workers != 1:
+            with ProcessPoolExecutor(workers) as executor:
+                results = [record for task_records in executor.map(_catalog_files, tasks) for record in task_records]
+        else:
+            results = [record for task in tasks for record in _catalog_files(task)]
+
+        for rsp_path, record in zip(stale_paths, results):
+            records[os.path.relpath(rsp_path, root)] = record
+
+        _write_records(path, records)
+
+        return cls(path)
+
+    @property
+    def files(self) -> List[str]:
+        return [os.path.join(self.root, relative_path) for relative_path in self._records]
+
+    @property
+    def errors(self) -> Dict[str, str]:
+        """
+        Files that could not be parsed, along with the reason why.
+        """
+
+        return {
+            os.path.join(self.root, relative_path): record["error"]
+            for relative_path, record in self._records.items() if record["error"] is not None
+        }
+
+    def metadata(self, rsp_path: str) -> List[str]:
+        return self._record(rsp_path)["metadata"]
+
+    def find(self, profile: Union[Dict[str, str], Callable[[Dict[str, str]], bool], None] = None,
+             fields: Optional[List[str]] = None) -> List[CatalogProfile]:
+        """
+        Returns the profiles matching the given attributes, as accepted by RspFile.select,
+        and whose test vectors have all the given fields.
+        """
+
+        if isinstance(profile, dict) and profile:
+            candidates = self._candidates(profile)
+        else:
+            candidates = self.profiles
+
+        return [
+            candidate for candidate in candidates
+            if _profile_matches(profile, candidate.attributes)
+            and (fields is None or all(key in candidate.fields for key in fields))
+        ]
+
+    def open(self, rsp_path: str, **rsp_file_options) -> RspFile:
+        """
+        Opens a cataloged RSP file, its index is taken from the catalog if the file did not change.
+        Files that failed to be cataloged are opened as any other, their errors are then raised
+        when they are read.
+        """
+
+        rsp_file = RspFile(rsp_path, **rsp_file_options)
+        record = self._record(rsp_path)
+
+        # Profiles of files that failed to be parsed are not recorded
+        if record["error"] is not None:
+            return rsp_file
+
+        rsp_index = _record_index(record)
+
+        if rsp_index.is_up_to_date(rsp_path):
+            rsp_file._index = rsp_index
+
+        return rsp_file
+
+    @contextmanager
+    def open_profile(self, catalog_profile: CatalogProfile, **rsp_file_options) -> Iterator[Profile]:
+        """
+        Opens a profile found in the catalog, without reading the headers of the other
+        profiles of its file.
+        """
+
+        with self.open(catalog_profile.path, **rsp_file_options) as rsp_file:
+            # Profiles may have moved within the file, their positions can't be trusted anymore
+            if rsp_file._index is None:
+                raise ValueError(f"'{catalog_profile.path}' changed since it has been cataloged")
+
+            yield rsp_file._new_profile(rsp_file.index[catalog_profile.position])
+
+    def _record(self, rsp_path: str) -> dict:
+        relative_path = os.path.relpath(os.path.abspath(rsp_path), self.root)
+
+        try:
+            return self._records[relative_path]
+        except KeyError:
+            raise KeyError(f"'{rsp_path}' is not in the catalog") from None
+
+    def _candidates(self, attributes: Dict[str, str]) -> List[CatalogProfile]:
+        if self._by_attribute is None:
+            self._by_attribute = {}
+
+            for profile_idx, catalog_profile in enumerate(self.profiles):
+                for attribute in catalog_profile.attributes.items():
+                    self._by_attribute.setdefault(attribute, []).append(profile_idx)
+
+        # Profiles having the rarest of the expected attribute values
+        rarest = min((self._by_attribute.get((key, str(value)), []) for key, value in attributes.items()), key=len)
+
+        return [self.profiles[profile_idx] for profile_idx in rarest]
+
+
+def _walk_rsp_files(directory: str) -> Iterator[str]:
+    for current_directory, subdirectories, file_names in os.walk(directory):
+        subdirectories.sort()
+
+        for file_name in sorted(file_names):
+            if file_name.lower().endswith(RSP_EXTENSION):
+                yield os.path.join(current_directory, file_name)
+
+
+def _catalog_files(rsp_paths: List[str]) -> List[dict]:
+    return [_catalog_file(rsp_path) for rsp_path in rsp_paths]
+
+
+def _catalog_file(rsp_path: str) -> dict:
+    """
+    Returns the record of a single RSP file. Files that can't be parsed are recorded
+    along with their error, so that they are not parsed again until they change. Files
+    that can't be read are recorded along with their error as well, they are read again
+    by the next build.
+    """
+
+    # Never up to date, until the file is read
+    record = {
+        "size": -1,
+        "mtime_ns": -1,
+        "sha256": "",
+        "metadata": [],
+        "profiles": [],
+        "error": None,
+    }
+
+    try:
+        rsp_index = RspIndex.build(rsp_path)
+        record.update(size=rsp_index.size, mtime_ns=rsp_index.mtime_ns, sha256=rsp_index.content_hash)
+
+        with RspFile(rsp_path, engine="mmap") as rsp_file:
+            rsp_file._index = rsp_index
+            record["metadata"] = rsp_file.metadata
+
+            for profile, profile_index in zip(rsp_file, rsp_index.profiles):
+                vectors = profile.vectors
+                schema = vectors._get_schema(vectors._read_blocks(0, 1)[0]) if len(vectors) else None
+
+                record["profiles"].append({
+                    "attributes": profile.attributes,
+                    "count": len(vectors),
+                    "fields": dict(zip(schema.keys, schema.types)) if schema is not None else {},
+                    "offsets": [profile_index.header_offset, profile_index.vectors_offset, profile_index.end_offset],
+                    "vector_offsets": _encode_offsets(profile_index.vector_offsets),
+                })
+
+    except (RspParsingError, ValueError, OSError) as error:
+        record["profiles"] = []
+        record["error"] = str(error)
+
+    return record
+
+
+def _encode_offsets(offsets: array) -> str:
+    # Offsets are stored as little-endian 64 bits integers, which is way more compact than JSON numbers
+    if sys.byteorder == "big":
+        offsets = array("Q", offsets)
+        offsets.byteswap()
+
+    return base64.b64encode(offsets.tobytes()).decode("ascii")
+
+
+def _decode_offsets(encoded_offsets: str) -> array:
+    offsets = array("Q", base64.b64decode(encoded_offsets))
+
+    if sys.byteorder == "big":
+        offsets.byteswap()
+
+    return offsets
+
+
+def _is_up_to_date(record: dict, rsp_path: str) -> bool:
+    rsp_index = RspIndex(record["size"], record["mtime_ns"], record["sha256"], [])
+
+    try:
+        if not rsp_index.is_up_to_date(rsp_path):
+            return False
+    except OSError:
+        return False
+
+    # Touched or copied but not modified, avoid hashing it again next time
+    record["mtime_ns"] = rsp_index.mtime_ns
+    return True
+
+
+def _record_index(record: dict) -> RspIndex:
+    profiles = [
+        ProfileIndex(*profile["offsets"], _decode_offsets(profile["vector_offsets"]))
+        for profile in record["profiles"]
+    ]
+
+    return RspIndex(record["size"], record["mtime_ns"], record["sha256"], profiles)
+
+
+def _read_records(path: str) -> Dict[str, dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as catalog_fd:
+            content = json.load(catalog_fd)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+    if content.get("version") != _CATALOG_VERSION:
+        return {}
+
+    return content["files"]
+
+
+def _write_records(path: str, records: Dict[str, dict]) -> None:
+    catalog_fd, temporary_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+
+    try:
+        with os.fdopen(catalog_fd, "w", encoding="utf-8") as out_fd:
+            json.dump({"version": _CATALOG_VERSION, "files": records}, out_fd, separators=(",", ":"))
+
+        os.replace(temporary_path, path)
+
+    except BaseException:
+        os.remove(temporary_path)
+        raise
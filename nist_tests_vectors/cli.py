@@ -1,12 +1,41 @@
 #!/usr/bin/env python3
 # coding: utf-8
 
+import os
+import re
 import sys
+import glob
+import json
+import time
 import argparse
-from nist_tests_vectors import RspFile
-from nist_tests_vectors.exporter import save_as_json, save_as_c, \
+import operator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Dict, Callable, Optional, Tuple
+from nist_tests_vectors import RspFile, RspParsingError, RspCatalog
+from nist_tests_vectors.catalog import CATALOG_FILE_NAME
+from nist_tests_vectors.incremental import ExportManifest, export_atomically, template_paths
+from nist_tests_vectors.downloader import download, DownloadError, ARCHIVES, DEFAULT_WORKERS
+from nist_tests_vectors.exporter import save_as_json, save_as_ndjson, save_as_c, save_as_ntvb, \
+                                        save_as_npz, save_as_sqlite, \
                                         SUPPORTED_EXPORT_FORMATS, \
-                                        SUPPORTED_TEMPLATE_FORMATS
+                                        SUPPORTED_TEMPLATE_FORMATS, \
+                                        SUPPORTED_C_LAYOUTS, \
+                                        RspJsonEncoder
+
+_RSP_EXTENSION = ".rsp"
+
+# Options every export format depends on, outputs are converted again in incremental mode when they change
+_EXPORT_OPTIONS = {
+    "json": ["compact"],
+    "ndjson": ["profile_attributes"],
+    "c": ["template", "layout", "shards", "vectors_per_shard"],
+    "ntvb": [],
+    "npz": [],
+}
+
+# Seconds between two checks of the RSP files in watch mode
+_WATCH_INTERVAL = 1.0
+
 
 class Color:
     GREEN = "\u001b[32m"
@@ -30,13 +59,226 @@ class Logger:
         print(f"{Color.RED}[ERROR] {Color.RESET}{msg}")
 
 
+def _find_rsp_files(inputs: List[str]) -> List[Tuple[str, str]]:
+    """
+    Expands directories (recursively) and glob patterns into RSP files. Every file is
+    returned along with its path relative to the directory it has been found in, which
+    is also the path of its converted file relative to the output directory.
+    """
+
+    rsp_files = []
+
+    for input_path in inputs:
+        if os.path.isdir(input_path):
+            for directory, subdirectories, file_names in os.walk(input_path):
+                subdirectories.sort()
+
+                for file_name in sorted(file_names):
+                    if file_name.lower().endswith(_RSP_EXTENSION):
+                        rsp_path = os.path.join(directory, file_name)
+                        rsp_files.append((rsp_path, os.path.relpath(rsp_path, input_path)))
+
+        elif any(char in input_path for char in "*?["):
+            for rsp_path in sorted(glob.glob(input_path, recursive=True)):
+                if os.path.isfile(rsp_path):
+                    rsp_files.append((rsp_path, os.path.basename(rsp_path)))
+
+        else:
+            rsp_files.append((input_path, os.path.basename(input_path)))
+
+    return rsp_files
+
+
+def _convert_file(rsp_path: str, output: str, out_format: str, args: argparse.Namespace) -> Optional[str]:
+    """
+    Converts a single RSP file, returns the reason why it failed if it did.
+    """
+
+    output_existed = os.path.exists(output)
+
+    try:
+        with RspFile(rsp_path) as rsp_file:
+            if out_format == "json":
+                save_as_json(rsp_file, output, compact=args.compact)
+
+            elif out_format == "ndjson":
+                save_as_ndjson(rsp_file, output, args.profile_attributes)
+
+            elif out_format == "c":
+                save_as_c(rsp_file, output, args.template, args.layout,
+                          args.shards, args.vectors_per_shard)
+
+            elif out_format == "ntvb":
+                save_as_ntvb(rsp_file, output)
+
+            elif out_format == "npz":
+                save_as_npz(rsp_file, output)
+
+            elif out_format == "sqlite":
+                # Appended to the database if it already exists
+                save_as_sqlite(rsp_file, output)
+
+            else:
+                raise NotImplemented
+
+    except (FileExistsError, ValueError, RspParsingError, OSError) as error:
+        return str(error)
+
+    except Exception as error:
+        # Unexpected failures of a single file don't abort the conversion of the others
+        _remove_partial_output(output, output_existed)
+        return _unexpected_error(error)
+
+    return None
+
+
+def _unexpected_error(error: Exception) -> str:
+    return f"Unexpected {type(error).__name__}: {error}"
+
+
+def _remove_partial_output(output: str, output_existed: bool) -> None:
+    # Existing outputs, such as SQLite databases being appended to, are left as they were
+    if not output_existed and os.path.isfile(output):
+        os.remove(output)
+
+
+def _reconvert_file(rsp_path: str, output: str, out_format: str,
+                    args: argparse.Namespace) -> Tuple[Optional[str], List[str]]:
+    """
+    Converts a single RSP file atomically, replacing its previous outputs. Returns the
+    reason why it failed if it did, along with the paths of the written files.
+    """
+
+    def export(temporary_output: str):
+        error = _convert_file(rsp_path, temporary_output, out_format, args)
+
+        if error is not None:
+            raise ValueError(error)
+
+    try:
+        return None, export_atomically(export, output)
+    except (ValueError, OSError) as error:
+        return str(error), []
+    except Exception as error:
+        return _unexpected_error(error), []
+
+
+def _export_options(out_format: str, args: argparse.Namespace) -> dict:
+    return {"format": out_format, **{option: getattr(args, option) for option in _EXPORT_OPTIONS[out_format]}}
+
+
+def _convert_files(conversions: List[Tuple[str, str]], out_format: str, args: argparse.Namespace,
+                   jobs: int, convert: Callable = _convert_file) -> List[Tuple[str, str, object]]:
+    """
+    Converts the RSP files to their output, returns the result of every conversion
+    along with the RSP file and its output, in the order they complete.
+    """
+
+    results = []
+
+    def report(rsp_path: str, output: str, result):
+        error = result[0] if isinstance(result, tuple) else result
+
+        if error is None:
+            Logger.info(f"[{len(results) + 1}/{len(conversions)}] {rsp_path}")
+        else:
+            Logger.error(f"[{len(results) + 1}/{len(conversions)}] {rsp_path}: {error}")
+
+        results.append((rsp_path, output, result))
+
+    if jobs <= 1:
+        for rsp_path, output in conversions:
+            report(rsp_path, output, convert(rsp_path, output, out_format, args))
+
+    else:
+        existing_outputs = {output for _, output in conversions if os.path.exists(output)}
+
+        # Workers live until all the files are converted, templates are compiled once per worker
+        with ProcessPoolExecutor(jobs) as executor:
+            futures = {
+                executor.submit(convert, rsp_path, output, out_format, args): (rsp_path, output)
+                for rsp_path, output in conversions
+            }
+
+            for future in as_completed(futures):
+                rsp_path, output = futures[future]
+
+                try:
+                    result = future.result()
+
+                except Exception as error:
+                    # The worker died or could not send its result back, reported like any other failure
+                    _remove_partial_output(output, output in existing_outputs)
+                    result = _unexpected_error(error)
+
+                    if convert is _reconvert_file:
+                        result = (result, [])
+
+                report(rsp_path, output, result)
+
+    return results
+
+
+def _convert_stale_files(conversions: List[Tuple[str, str]], out_format: str, args: argparse.Namespace,
+                         jobs: int, manifest: ExportManifest, failed: Dict[str, Optional[int]]) -> List[str]:
+    """
+    Converts the RSP files whose outputs are not up to date according to the manifest,
+    returns the ones that could not be converted. RSP files that already failed, given
+    along with their modification time, are only converted again once modified.
+    """
+
+    options = _export_options(out_format, args)
+    templates = template_paths(out_format, args.template)
+    stale_conversions = [
+        (rsp_path, output) for rsp_path, output in conversions
+        if failed.get(rsp_path) != _mtime_ns(rsp_path)
+        and not manifest.is_up_to_date(rsp_path, output, options, templates)
+    ]
+    failures = []
+
+    if not stale_conversions and args.watch:
+        return failures
+
+    try:
+        for rsp_path, output, (error, output_files) in _convert_files(stale_conversions, out_format, args, jobs,
+                                                                      _reconvert_file):
+            if error is None:
+                manifest.update(rsp_path, output, options, templates, output_files)
+                failed.pop(rsp_path, None)
+            else:
+                failures.append(rsp_path)
+                failed[rsp_path] = _mtime_ns(rsp_path)
+
+    finally:
+        # Modification times of unchanged files may have been refreshed as well
+        manifest.save()
+
+    Logger.info(f"{len(stale_conversions)} out of {len(conversions)} files had to be converted again")
+
+    return failures
+
+
+def _mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
 def cli_convert(args: argparse.Namespace):
 
     out_format = args.format
+    batch = len(args.rsp_files) > 1 or os.path.isdir(args.rsp_files[0]) or os.path.isdir(args.output) \
+        or any(char in args.rsp_files[0] for char in "*?[")
+    incremental = args.incremental or args.watch
 
     if out_format is None:
         out_format = args.output.split(".")[-1]
 
+        if batch and out_format != "sqlite":
+            Logger.error("The output format must be given with --format when converting several files")
+            sys.exit(1)
+
     if out_format not in SUPPORTED_EXPORT_FORMATS:
         Logger.error(f"Support for '{out_format}' format is not implemented")
         sys.exit(1)
@@ -45,22 +287,214 @@ def cli_convert(args: argparse.Namespace):
         Logger.error(f"Template parameter is not supported by '{out_format}' format")
         sys.exit(1)
 
-    with RspFile(args.rsp_file) as rsp_file:
+    if incremental and out_format == "sqlite":
+        Logger.error("SQLite databases are appended to, they can't be converted incrementally")
+        sys.exit(1)
 
-        try:
-            if out_format == "json":
-                save_as_json(rsp_file, args.output)
+    if not batch and not incremental:
+        error = _convert_file(args.rsp_files[0], args.output, out_format, args)
 
-            elif out_format == "c":
-                save_as_c(rsp_file, args.output, args.template)
+        if error is not None:
+            Logger.error(error)
+            sys.exit(1)
+
+        Logger.info(f"File '{args.output}' has been generated successfully")
+        return
 
+    if incremental:
+        manifest_dir = args.output if batch else os.path.dirname(args.output) or "."
+        os.makedirs(manifest_dir, exist_ok=True)
+        manifest = ExportManifest(manifest_dir)
+        failed: Dict[str, Optional[int]] = {}
+
+        while True:
+            conversions = _find_conversions(args, out_format, batch)
+            failures = _convert_stale_files(conversions, out_format, args, args.jobs, manifest, failed)
+
+            if not args.watch:
+                break
+
+            # Changes are polled, a no-op pass only checks the size and modification time of every file
+            try:
+                time.sleep(_WATCH_INTERVAL)
+            except KeyboardInterrupt:
+                return
+
+    else:
+        conversions = _find_conversions(args, out_format, batch)
+        jobs = 1 if out_format == "sqlite" else args.jobs
+        failures = [
+            rsp_path for rsp_path, _, error in _convert_files(conversions, out_format, args, jobs)
+            if error is not None
+        ]
+
+    if failures:
+        Logger.error(f"{len(failures)} out of {len(conversions)} files could not be converted: {', '.join(failures)}")
+        sys.exit(1)
+
+    Logger.info(f"{len(conversions)} files have been converted to '{args.output}' successfully")
+
+
+def _find_conversions(args: argparse.Namespace, out_format: str, batch: bool) -> List[Tuple[str, str]]:
+    """
+    Returns every RSP file to convert along with its output.
+    """
+
+    if not batch:
+        return [(args.rsp_files[0], args.output)]
+
+    rsp_files = _find_rsp_files(args.rsp_files)
+
+    if out_format == "sqlite":
+        # All the RSP files are appended to a single database, by a single process
+        return [(rsp_path, args.output) for rsp_path, _ in rsp_files]
+
+    outputs = [
+        os.path.join(args.output, os.path.splitext(relative_path)[0] + "." + out_format)
+        for _, relative_path in rsp_files
+    ]
+
+    duplicated_outputs = {output for output in outputs if outputs.count(output) > 1}
+
+    if duplicated_outputs:
+        Logger.error(f"Several RSP files would be converted to: {', '.join(sorted(duplicated_outputs))}")
+        sys.exit(1)
+
+    for output in outputs:
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+
+    return [(rsp_path, output) for (rsp_path, _), output in zip(rsp_files, outputs)]
+
+
+_CONDITION_REGEX = re.compile(r"^\s*([^<>=!\s]+)\s*(==|!=|<=|>=|<|>|=)\s*(\S+)\s*$")
+
+_CONDITION_OPERATORS = {
+    "=": operator.eq,
+    "==": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def _parse_profile_attributes(attributes: List[str]) -> Dict[str, str]:
+    expected_attributes = {}
+
+    for attribute in attributes:
+        key, separator, value = attribute.partition("=")
+
+        if not separator:
+            raise ValueError(f"Invalid profile attribute '{attribute}', expected KEY=VALUE")
+
+        expected_attributes[key.strip()] = value.strip()
+
+    return expected_attributes
+
+
+def _parse_conditions(conditions: List[str]) -> Callable:
+    """
+    Turns conditions such as "COUNT < 10" into a predicate on test vectors, all of them must be met.
+    Values are compared as integers to integer fields and as bytes to hexstring fields.
+    """
+
+    parsed_conditions = []
+
+    for condition in conditions:
+        match = _CONDITION_REGEX.match(condition)
+
+        if match is None:
+            raise ValueError(f"Invalid condition '{condition}', expected KEY OPERATOR VALUE")
+
+        key, compare, value = match.group(1), _CONDITION_OPERATORS[match.group(2)], match.group(3)
+        parsed_conditions.append((key, compare, value))
+
+    def predicate(test_vectors) -> bool:
+        for key, compare, value in parsed_conditions:
+            actual_value = test_vectors[key]
+
+            if isinstance(actual_value, int):
+                expected_value = int(value)
             else:
-                raise NotImplemented
-        except FileExistsError as fee:
-            Logger.error(str(fee))
+                actual_value = bytes(actual_value)
+                expected_value = bytes.fromhex(value)
+
+            if not compare(actual_value, expected_value):
+                return False
+
+        return True
+
+    return predicate
+
+
+def cli_query(args: argparse.Namespace):
+
+    try:
+        profile = _parse_profile_attributes(args.profile)
+        where = _parse_conditions(args.where) if args.where else None
+    except ValueError as ve:
+        Logger.error(str(ve))
+        sys.exit(1)
+
+    with RspFile(args.rsp_file) as rsp_file:
+        try:
+            for matching_profile, test_vectors in rsp_file.select(profile, where, args.fields):
+                print(json.dumps({"attributes": matching_profile.attributes, "vector": test_vectors.__dict__()},
+                                 cls=RspJsonEncoder))
+
+        except KeyError as ke:
+            Logger.error(ke.args[0])
+            sys.exit(1)
+
+        except ValueError as ve:
+            Logger.error(str(ve))
             sys.exit(1)
 
-    Logger.info(f"File '{args.output}' has been generated successfully")
+
+def cli_download(args: argparse.Namespace):
+
+    try:
+        rsp_paths = download(args.archives, args.output, args.jobs)
+    except (DownloadError, OSError) as error:
+        Logger.error(str(error))
+        sys.exit(1)
+
+    for rsp_path in rsp_paths:
+        Logger.info(rsp_path)
+
+    Logger.info(f"{len(rsp_paths)} RSP files are up to date in '{args.output}'")
+
+
+def cli_catalog_build(args: argparse.Namespace):
+
+    catalog_path = args.output or os.path.join(args.directory, CATALOG_FILE_NAME)
+
+    try:
+        catalog = RspCatalog.build(args.directory, catalog_path, args.jobs)
+    except OSError as error:
+        Logger.error(str(error))
+        sys.exit(1)
+
+    for rsp_path, error in catalog.errors.items():
+        Logger.warning(f"{rsp_path}: {error}")
+
+    Logger.info(f"{len(catalog.files)} RSP files and {len(catalog.profiles)} profiles have been cataloged "
+                f"in '{catalog_path}'")
+
+
+def cli_catalog_find(args: argparse.Namespace):
+
+    try:
+        profile = _parse_profile_attributes(args.profile)
+        catalog = RspCatalog(args.catalog)
+    except (ValueError, OSError) as error:
+        Logger.error(str(error))
+        sys.exit(1)
+
+    for catalog_profile in catalog.find(profile, args.fields):
+        print(json.dumps({"path": catalog_profile.path, "position": catalog_profile.position,
+                          "attributes": catalog_profile.attributes, "count": catalog_profile.vectors_count}))
 
 
 def main() -> None:
@@ -68,18 +502,90 @@ def main() -> None:
                                                  'Management Tool !')
     subparsers = parser.add_subparsers(help='The action to perform')
 
-    convert_parser = subparsers.add_parser('convert', help='convert RSP file to specified format')
-    convert_parser.add_argument("rsp_file", help="path to the RSP file to convert")
+    convert_parser = subparsers.add_parser('convert', help='convert RSP files to specified format')
+    convert_parser.add_argument("rsp_files", nargs="+", metavar="rsp_file",
+                                help="path to the RSP file to convert, several files, directories and glob "
+                                     "patterns can be given")
     convert_parser.add_argument("--output", "-o", required=True,
-                                help="path to the converted file")
-    convert_parser.add_argument("--format", "-f", choices=["json", "c"],
+                                help="path to the converted file, or to the output directory when converting "
+                                     "several files (to the database for SQLite)")
+    convert_parser.add_argument("--jobs", "-j", type=int, default=1,
+                                help="amount of files converted in parallel")
+    convert_parser.add_argument("--format", "-f", choices=SUPPORTED_EXPORT_FORMATS,
                                 help="output format")
     convert_parser.add_argument("--template", "-t",
                                 help="template to use for convertion")
+    convert_parser.add_argument("--layout", choices=SUPPORTED_C_LAYOUTS, default="symbols",
+                                help="C only, declare every value as a symbol or pack byte arrays "
+                                     "into a single deduplicated blob")
+    convert_parser.add_argument("--shards", type=int,
+                                help="C only, split the output into this amount of translation units")
+    convert_parser.add_argument("--vectors-per-shard", type=int,
+                                help="C only, split the output into translation units holding "
+                                     "at most this amount of test vectors")
+    convert_parser.add_argument("--compact", action="store_true",
+                                help="write JSON without any indentation")
+    convert_parser.add_argument("--profile-attributes", choices=["inline", "reference"], default="inline",
+                                help="NDJSON only, inline profile attributes in every line "
+                                     "or write them once and reference them")
+    convert_parser.add_argument("--incremental", action="store_true",
+                                help="only convert the RSP files whose outputs are missing or out of date, "
+                                     "existing outputs are replaced")
+    convert_parser.add_argument("--watch", action="store_true",
+                                help="convert incrementally, then again whenever an RSP file changes")
 
 
     convert_parser.set_defaults(func=cli_convert)
 
+    query_parser = subparsers.add_parser('query', help='print the matching test vectors of an RSP file '
+                                                       'as JSON lines')
+    query_parser.add_argument("rsp_file", help="path to the RSP file to query")
+    query_parser.add_argument("--profile", "-p", action="append", default=[], metavar="KEY=VALUE",
+                              help="only read profiles having this attribute value, can be repeated")
+    query_parser.add_argument("--where", "-w", action="append", metavar="CONDITION",
+                              help="only keep test vectors meeting this condition, e.g. 'COUNT < 10', "
+                                   "can be repeated")
+    query_parser.add_argument("--fields", nargs="+", metavar="KEY",
+                              help="only decode and print these fields")
+
+    query_parser.set_defaults(func=cli_query)
+
+    download_parser = subparsers.add_parser('download', help='download and extract archives of test vectors '
+                                                             'from the NIST')
+    download_parser.add_argument("archives", nargs="+", metavar="archive",
+                                 help=f"archive to download, one of {', '.join(ARCHIVES)} or a path relative "
+                                      f"to the CAVP documents or a URL")
+    download_parser.add_argument("--output", "-o", required=True,
+                                 help="directory the RSP files are extracted to")
+    download_parser.add_argument("--jobs", "-j", type=int, default=DEFAULT_WORKERS,
+                                 help="amount of archives downloaded concurrently")
+
+    download_parser.set_defaults(func=cli_download)
+
+    catalog_parser = subparsers.add_parser('catalog', help='index a tree of RSP files and look up its profiles')
+    catalog_subparsers = catalog_parser.add_subparsers(help='The catalog action to perform')
+
+    catalog_build_parser = catalog_subparsers.add_parser('build', help='catalog the RSP files of a directory, '
+                                                                       'only the files that changed are parsed '
+                                                                       'again')
+    catalog_build_parser.add_argument("directory", help="directory searched recursively for RSP files")
+    catalog_build_parser.add_argument("--output", "-o",
+                                      help=f"path to the catalog, {CATALOG_FILE_NAME} in the directory by default")
+    catalog_build_parser.add_argument("--jobs", "-j", type=int,
+                                      help="amount of files parsed in parallel, one per CPU by default")
+
+    catalog_build_parser.set_defaults(func=cli_catalog_build)
+
+    catalog_find_parser = catalog_subparsers.add_parser('find', help='print the cataloged profiles matching '
+                                                                     'some attributes as JSON lines')
+    catalog_find_parser.add_argument("catalog", help="path to the catalog")
+    catalog_find_parser.add_argument("--profile", "-p", action="append", default=[], metavar="KEY=VALUE",
+                                     help="only print profiles having this attribute value, can be repeated")
+    catalog_find_parser.add_argument("--fields", nargs="+", metavar="KEY",
+                                     help="only print profiles whose test vectors have these fields")
+
+    catalog_find_parser.set_defaults(func=cli_catalog_find)
+
     args = parser.parse_args()
 
     try:
@@ -0,0 +1,375 @@
+# coding: utf-8
+
+import io
+import json
+import mmap
+import struct
+import zipfile
+from typing import List, Union, Iterator, Dict, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from nist_tests_vectors.parser import RspFile, Profile, RspParsingError, VectorsSchema
+from nist_tests_vectors.field_types import INTEGER
+
+# Amount of test vectors blocks read at once when building columns
+_BLOCKS_BATCH_SIZE = 1024
+
+# Names of the members of an NPZ file, "/" separates profiles from their fields
+_METADATA_MEMBER = "metadata"
+_PROFILES_MEMBER = "profiles"
+_PROFILE_MEMBER = "profiles/{profile_idx}/{name}"
+
+# Size of the local file header of a zip member, without its name and extra field
+_ZIP_LOCAL_HEADER_SIZE = 30
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("Columns require numpy, install it with: pip install numpy")
+
+
+class VariableBytes:
+
+    """
+    Byte arrays of different sizes, stored one after the other in a flat uint8 array.
+    The i-th byte array spans from offsets[i] to offsets[i + 1].
+    """
+
+    def __init__(self, data: "np.ndarray", offsets: "np.ndarray"):
+        self.data = data
+        self.offsets = offsets
+
+    def __repr__(self) -> str:
+        return f"VariableBytes({len(self)} byte arrays, {len(self.data)} bytes)"
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx: int) -> "np.ndarray":
+        return self.data[self.offsets[idx]:self.offsets[idx + 1]]
+
+    @property
+    def sizes(self) -> "np.ndarray":
+        return np.diff(self.offsets)
+
+
+Column = Union["np.ndarray", VariableBytes]
+
+
+def _integer_column(key: str, values: List[str]) -> "np.ndarray":
+    try:
+        return np.fromiter(map(int, values), dtype=np.int64, count=len(values))
+    except (ValueError, OverflowError):
+        invalid_value = next(value for value in values if not value.isdigit() or int(value) >= 2**63)
+        raise RspParsingError(f"Expected integer for '{key}', got: {invalid_value}") from None
+
+
+def _hexstring_column(key: str, values: List[str]) -> Column:
+    """
+    Decodes all the values of a field at once, fixed-size byte arrays end up in a
+    2-D array holding one of them per row.
+    """
+
+    sizes = [len(value) >> 1 for value in values]
+
+    try:
+        if any(len(value) & 1 for value in values):
+            raise ValueError
+
+        data = bytes.fromhex("".join(values))
+
+        # Whitespaces within a value are ignored by fromhex
+        if len(data) != sum(sizes):
+            raise ValueError
+
+    except ValueError:
+        invalid_value = next(value for value in values if len(value) & 1 or not _is_hexstring(value))
+        raise RspParsingError(f"Expected hexstring for '{key}', got: {invalid_value}") from None
+
+    array = np.frombuffer(data, dtype=np.uint8)
+
+    if len(set(sizes)) == 1:
+        return array.reshape(len(values), sizes[0])
+
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    return VariableBytes(array, offsets)
+
+
+def _is_hexstring(value: str) -> bool:
+    try:
+        return len(bytes.fromhex(value)) * 2 == len(value)
+    except ValueError:
+        return False
+
+
+class ProfileColumns:
+
+    """
+    Test vectors of a profile stored by field rather than by test vectors: integers
+    are int64 arrays, fixed-size byte arrays are 2-D uint8 arrays with one row per
+    test vectors and byte arrays of different sizes are VariableBytes.
+
+    Columns are built from the raw text of the RSP file, no TestVectors nor TestVector
+    object is created. Every value must match the type of its field.
+    """
+
+    def __init__(self, attributes: Dict[str, str], columns: Dict[str, Column], vectors_count: int):
+        _require_numpy()
+        self.attributes = attributes
+        self.columns = columns
+        self.vectors_count = vectors_count
+
+    def __repr__(self) -> str:
+        return f"ProfileColumns({self.attributes})"
+
+    def __len__(self) -> int:
+        return self.vectors_count
+
+    def __getitem__(self, key: str) -> Column:
+        try:
+            return self.columns[key]
+        except KeyError:
+            raise KeyError(f"Key '{key}' not found") from None
+
+    def keys(self):
+        return self.columns.keys()
+
+    @classmethod
+    def from_profile(cls, profile: Profile) -> "ProfileColumns":
+        _require_numpy()
+
+        schema, raw_columns = _read_raw_columns(profile)
+        columns: Dict[str, Column] = {}
+
+        if schema is not None:
+            for key, field_type, values in zip(schema.keys, schema.types, raw_columns):
+                if field_type == INTEGER:
+                    columns[key] = _integer_column(key, values)
+                else:
+                    columns[key] = _hexstring_column(key, values)
+
+        return cls(profile.attributes, columns, len(profile.vectors))
+
+    def _description(self) -> dict:
+        return {
+            "attributes": self.attributes,
+            "vectors_count": self.vectors_count,
+            "fields": [[key, isinstance(column, VariableBytes)] for key, column in self.columns.items()]
+        }
+
+    def _members(self, profile_idx: int) -> Iterator[Tuple[str, "np.ndarray"]]:
+        for key, column in self.columns.items():
+            if isinstance(column, VariableBytes):
+                yield _PROFILE_MEMBER.format(profile_idx=profile_idx, name=f"{key}.data"), column.data
+                yield _PROFILE_MEMBER.format(profile_idx=profile_idx, name=f"{key}.offsets"), column.offsets
+            else:
+                yield _PROFILE_MEMBER.format(profile_idx=profile_idx, name=key), column
+
+
+def _read_raw_columns(profile: Profile) -> Tuple[Optional[VectorsSchema], List[List[str]]]:
+    """
+    Returns the schema of the test vectors of the profile and the raw values of each field.
+    """
+
+    vectors = profile.vectors
+    vectors_count = len(vectors)
+    schema: Optional[VectorsSchema] = None
+    raw_columns: List[List[str]] = []
+
+    for batch_start in range(0, vectors_count, _BLOCKS_BATCH_SIZE):
+        for block in vectors._read_blocks(batch_start, min(batch_start + _BLOCKS_BATCH_SIZE, vectors_count)):
+            block_schema = vectors._get_schema(block)
+
+            if schema is None:
+                schema = block_schema
+                raw_columns = [[] for _ in schema.keys]
+
+            # Schemas are shared by all the test vectors having the same fields
+            elif block_schema is not schema:
+                raise RspParsingError("Invalid test vector: fields inconsistency")
+
+            for raw_column, value in zip(raw_columns, block[1]):
+                raw_column.append(value)
+
+    return schema, raw_columns
+
+
+class RspColumns:
+
+    """
+    Columns of all the profiles of an RSP file, see ProfileColumns.
+
+    Columns can be saved to an NPZ file and loaded back with mmap_mode, in which case
+    arrays are memory maps of the NPZ file rather than copies of its content.
+    """
+
+    def __init__(self, metadata: List[str], profiles: List[ProfileColumns]):
+        self.metadata = metadata
+        self.profiles = profiles
+
+    def __iter__(self) -> Iterator[ProfileColumns]:
+        return iter(self.profiles)
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def __getitem__(self, profile_idx: int) -> ProfileColumns:
+        return self.profiles[profile_idx]
+
+    @classmethod
+    def from_rsp_file(cls, rsp_file: RspFile) -> "RspColumns":
+        return cls(rsp_file.metadata, [ProfileColumns.from_profile(profile) for profile in rsp_file])
+
+    def save(self, path: str) -> None:
+        write_npz(self.metadata, self.profiles, path)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = None) -> "RspColumns":
+        _require_numpy()
+
+        npz_reader = _NpzReader(path, mmap_mode)
+
+        try:
+            metadata = json.loads(str(npz_reader.read(_METADATA_MEMBER)))
+            descriptions = json.loads(str(npz_reader.read(_PROFILES_MEMBER)))
+            profiles = [
+                _load_profile(npz_reader, profile_idx, description)
+                for profile_idx, description in enumerate(descriptions)
+            ]
+        finally:
+            npz_reader.close()
+
+        return cls(metadata, profiles)
+
+
+def write_npz(metadata: List[str], profiles: Iterator[ProfileColumns], path: str) -> None:
+    """
+    Writes columns to an uncompressed NPZ file, which np.load reads as well. Profiles
+    are written one after the other, only one of them has to be held in memory. The
+    attributes and the fields of all the profiles are written last, in a single member.
+    """
+
+    _require_numpy()
+    descriptions = []
+
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as npz_file:
+        _write_member(npz_file, _METADATA_MEMBER, np.array(json.dumps(metadata)))
+
+        for profile_idx, profile_columns in enumerate(profiles):
+            for name, array in profile_columns._members(profile_idx):
+                _write_member(npz_file, name, array)
+
+            descriptions.append(profile_columns._description())
+
+        _write_member(npz_file, _PROFILES_MEMBER, np.array(json.dumps(descriptions)))
+
+
+def _write_member(npz_file: zipfile.ZipFile, name: str, array: "np.ndarray") -> None:
+    with npz_file.open(f"{name}.npy", "w", force_zip64=True) as member_fd:
+        np.lib.format.write_array(member_fd, np.asanyarray(array), allow_pickle=False)
+
+
+# Magic string of NPY files, followed by their major and minor versions
+_NPY_MAGIC = b"\x93NUMPY"
+
+# Header parser and size of the header length field for every major version of NPY files
+_NPY_HEADER_READERS = {
+    1: (lambda header_fd: np.lib.format.read_array_header_1_0(header_fd), 2),
+    2: (lambda header_fd: np.lib.format.read_array_header_2_0(header_fd), 4),
+}
+
+# Access mode of the memory map for every mmap_mode of np.load
+_MMAP_ACCESS_MODES = {"r": mmap.ACCESS_READ, "c": mmap.ACCESS_COPY, "r+": mmap.ACCESS_WRITE}
+
+
+class _NpzReader:
+
+    """
+    Reads the members of an NPZ file, arrays are slices of a single memory map of the
+    whole file when a mmap_mode is given (np.load ignores mmap_mode for NPZ files).
+    Only members stored without compression can be mapped.
+    """
+
+    def __init__(self, path: str, mmap_mode: Optional[str]):
+        if mmap_mode is not None and mmap_mode not in _MMAP_ACCESS_MODES:
+            raise ValueError(f"Unknown mmap_mode '{mmap_mode}', expected one of: {', '.join(_MMAP_ACCESS_MODES)}")
+
+        self._npz_fd = open(path, "r+b" if mmap_mode == "r+" else "rb")
+        self._npz_file = zipfile.ZipFile(self._npz_fd)
+        self._mapping = None
+        self._headers: Dict[bytes, tuple] = {}
+
+        if mmap_mode is not None:
+            self._mapping = mmap.mmap(self._npz_fd.fileno(), 0, access=_MMAP_ACCESS_MODES[mmap_mode])
+
+    def close(self) -> None:
+        # The memory map stays alive as long as arrays refer to it
+        self._npz_file.close()
+        self._npz_fd.close()
+
+    def __contains__(self, name: str) -> bool:
+        try:
+            self._npz_file.getinfo(f"{name}.npy")
+            return True
+        except KeyError:
+            return False
+
+    def read(self, name: str) -> "np.ndarray":
+        with self._npz_file.open(f"{name}.npy") as member_fd:
+            return np.lib.format.read_array(member_fd, allow_pickle=False)
+
+    def map(self, name: str) -> "np.ndarray":
+        info = self._npz_file.getinfo(f"{name}.npy")
+
+        if self._mapping is None or info.compress_type != zipfile.ZIP_STORED:
+            return self.read(name)
+
+        self._npz_fd.seek(info.header_offset)
+        local_header = self._npz_fd.read(_ZIP_LOCAL_HEADER_SIZE)
+        name_size, extra_size = struct.unpack("<HH", local_header[26:30])
+        self._npz_fd.seek(info.header_offset + _ZIP_LOCAL_HEADER_SIZE + name_size + extra_size)
+
+        magic = self._npz_fd.read(len(_NPY_MAGIC) + 2)
+
+        if magic[:len(_NPY_MAGIC)] != _NPY_MAGIC or magic[-2] not in _NPY_HEADER_READERS:
+            return self.read(name)
+
+        header_reader, header_size_length = _NPY_HEADER_READERS[magic[-2]]
+        header_size = self._npz_fd.read(header_size_length)
+        header = self._npz_fd.read(int.from_bytes(header_size, "little"))
+
+        # Columns of a file share few different headers, they are only parsed once
+        if header not in self._headers:
+            self._headers[header] = header_reader(io.BytesIO(header_size + header))
+
+        shape, fortran_order, dtype = self._headers[header]
+
+        if dtype.hasobject:
+            return self.read(name)
+
+        count = 1
+
+        for dimension in shape:
+            count *= dimension
+
+        array = np.frombuffer(self._mapping, dtype=dtype, count=count, offset=self._npz_fd.tell())
+        return array.reshape(shape, order="F" if fortran_order else "C")
+
+
+def _load_profile(npz_reader: _NpzReader, profile_idx: int, description: dict) -> ProfileColumns:
+    columns: Dict[str, Column] = {}
+
+    for key, variable in description["fields"]:
+        if variable:
+            data_member = _PROFILE_MEMBER.format(profile_idx=profile_idx, name=f"{key}.data")
+            offsets_member = _PROFILE_MEMBER.format(profile_idx=profile_idx, name=f"{key}.offsets")
+            columns[key] = VariableBytes(npz_reader.map(data_member), npz_reader.map(offsets_member))
+        else:
+            columns[key] = npz_reader.map(_PROFILE_MEMBER.format(profile_idx=profile_idx, name=key))
+
+    return ProfileColumns(description["attributes"], columns, description["vectors_count"])
@@ -0,0 +1,146 @@
+# coding: utf-8
+
+import json
+import sqlite3
+from typing import Iterable, Iterator, Tuple
+
+from nist_tests_vectors.parser import RspFile, Profile
+
+# Tables are created when missing, so that RSP files can be appended to an existing database.
+# Values of fields are either integers or blobs, SQLite stores both in the same column.
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rsp_files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    metadata TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS profiles (
+    id INTEGER PRIMARY KEY,
+    rsp_file_id INTEGER NOT NULL REFERENCES rsp_files(id),
+    position INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS profile_attributes (
+    profile_id INTEGER NOT NULL REFERENCES profiles(id),
+    name TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (profile_id, name)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS vectors (
+    id INTEGER PRIMARY KEY,
+    profile_id INTEGER NOT NULL REFERENCES profiles(id),
+    position INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS fields (
+    vector_id INTEGER NOT NULL REFERENCES vectors(id),
+    key TEXT NOT NULL,
+    value NOT NULL,
+    PRIMARY KEY (vector_id, key)
+) WITHOUT ROWID;
+"""
+
+# Created once all the rows have been inserted, building them is faster than updating them row by row
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS profiles_by_rsp_file ON profiles (rsp_file_id, position);
+CREATE INDEX IF NOT EXISTS profile_attributes_by_value ON profile_attributes (name, value);
+CREATE INDEX IF NOT EXISTS vectors_by_profile ON vectors (profile_id, position);
+CREATE INDEX IF NOT EXISTS fields_by_value ON fields (key, value);
+"""
+
+# Amount of test vectors inserted by each executemany call
+_INSERT_BATCH_SIZE = 4096
+
+
+def write_database(rsp_files: Iterable[RspFile], connection: sqlite3.Connection) -> None:
+    """
+    Appends the content of RSP files to a SQLite database, in a single transaction.
+
+    Profile attributes are rows of the profile_attributes table and the values of test
+    vectors are rows of the fields table, both are indexed by name and value. Test
+    vectors of profiles having PRF=CMAC_AES128 with L=512 are for instance found with:
+
+        SELECT vectors.id FROM vectors
+        JOIN profile_attributes ON profile_attributes.profile_id = vectors.profile_id
+        JOIN fields ON fields.vector_id = vectors.id
+        WHERE profile_attributes.name = 'PRF' AND profile_attributes.value = 'CMAC_AES128'
+          AND fields.key = 'L' AND fields.value = 512
+    """
+
+    # Transactions are handled explicitly, the sqlite3 module commits before DDL statements otherwise
+    isolation_level = connection.isolation_level
+    connection.isolation_level = None
+
+    try:
+        connection.execute("BEGIN")
+
+        try:
+            for statement in _statements(_SCHEMA):
+                connection.execute(statement)
+
+            for rsp_file in rsp_files:
+                _insert_rsp_file(rsp_file, connection)
+
+            for statement in _statements(_INDEXES):
+                connection.execute(statement)
+
+            connection.execute("COMMIT")
+
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+
+    finally:
+        connection.isolation_level = isolation_level
+
+
+def _statements(script: str) -> Iterator[str]:
+    # executescript would commit the pending transaction
+    return (statement for statement in script.split(";") if statement.strip())
+
+
+def _next_id(connection: sqlite3.Connection, table: str) -> int:
+    return connection.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {table}").fetchone()[0]
+
+
+def _insert_rsp_file(rsp_file: RspFile, connection: sqlite3.Connection) -> None:
+    cursor = connection.execute("INSERT INTO rsp_files (path, metadata) VALUES (?, ?)",
+                                (rsp_file.path, json.dumps(rsp_file.metadata)))
+    rsp_file_id = cursor.lastrowid
+
+    # Ids are assigned here rather than by SQLite, fields rows need them before being inserted
+    profile_id = _next_id(connection, "profiles")
+    vector_id = _next_id(connection, "vectors")
+
+    for position, profile in enumerate(rsp_file):
+        connection.execute("INSERT INTO profiles (id, rsp_file_id, position) VALUES (?, ?, ?)",
+                           (profile_id, rsp_file_id, position))
+        connection.executemany("INSERT INTO profile_attributes (profile_id, name, value) VALUES (?, ?, ?)",
+                               ((profile_id, name, value) for name, value in profile.attributes.items()))
+
+        for vectors_rows, fields_rows in _batches(profile, profile_id, vector_id):
+            connection.executemany("INSERT INTO vectors (id, profile_id, position) VALUES (?, ?, ?)", vectors_rows)
+            connection.executemany("INSERT INTO fields (vector_id, key, value) VALUES (?, ?, ?)", fields_rows)
+            vector_id += len(vectors_rows)
+
+        profile_id += 1
+
+
+def _batches(profile: Profile, profile_id: int, first_vector_id: int) -> Iterator[Tuple[list, list]]:
+    vectors_rows = []
+    fields_rows = []
+
+    for position, test_vectors in enumerate(profile.vectors):
+        vector_id = first_vector_id + position
+        vectors_rows.append((vector_id, profile_id, position))
+        fields_rows.extend((vector_id, key, value) for key, value in test_vectors.__dict__().items())
+
+        if len(vectors_rows) == _INSERT_BATCH_SIZE:
+            yield vectors_rows, fields_rows
+            vectors_rows = []
+            fields_rows = []
+
+    if vectors_rows:
+        yield vectors_rows, fields_rows
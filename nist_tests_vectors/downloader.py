@@ -1,14 +1,353 @@
 # coding: utf-8
 
-import requests_cache
+import os
+import json
+import shutil
+import zipfile
+import tempfile
+import threading
+import posixpath
+import http.client
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Union, Optional
+from urllib.parse import urljoin, urlsplit
 
-requests_cache.install_cache(
-    cache_name='nist_cache',
-    backend='sqlite',
-    #path=args.cache,
-    expire_after=30 * 24 * 60 * 60 # 30 days
-)
+CAVP_BASE_URL = "https://csrc.nist.gov/CSRC/media/Projects/Cryptographic-Algorithm-Validation-Program/documents/"
 
+# Archives of test vectors, relative to the base URL
+ARCHIVES = {
+    "aes": "aes/KAT_AES.zip",
+    "aesmct": "aes/aesmct.zip",
+    "aesmmt": "aes/aesmmt.zip",
+    "xts": "aes/XTSTestVectors.zip",
+    "gcm": "mac/gcmtestvectors.zip",
+    "cmac": "mac/cmactestvectors.zip",
+    "hmac": "mac/hmactestvectors.zip",
+    "sha": "shs/shabytetestvectors.zip",
+    "sha3": "sha3/sha-3bytetestvectors.zip",
+    "drbg": "drbg/drbgtestvectors.zip",
+}
 
-def download(algorithm: str, dest_dir: str):
-    pass
+DEFAULT_WORKERS = 8
+
+_RSP_EXTENSION = ".rsp"
+
+# Validators and extracted files of every archive, kept in the destination directory
+_MANIFEST_FILE_NAME = ".ntv-downloads.json"
+
+# Archives being downloaded, kept until they are complete so that downloads can be resumed
+_PARTIAL_EXTENSION = ".part"
+
+_CHUNK_SIZE = 1 << 16
+_TIMEOUT = 60
+_MAX_REDIRECTS = 5
+
+# Requests sent for an archive, restarting its download from scratch when it can't be resumed
+_MAX_ATTEMPTS = 3
+
+
+class DownloadError(Exception):
+    """
+    Raised when an archive can't be downloaded or extracted.
+    """
+
+
+class _ConnectionPool:
+
+    """
+    Keep-alive connections, one per host and per thread, reused by all the requests
+    the thread sends.
+    """
+
+    def __init__(self, timeout: float):
+        self._timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all_connections: List[http.client.HTTPConnection] = []
+
+    def request(self, url: str, headers: Dict[str, str]) -> http.client.HTTPResponse:
+        for _ in range(_MAX_REDIRECTS + 1):
+            response = self._send(url, headers)
+
+            if response.status not in (301, 302, 303, 307, 308):
+                return response
+
+            response.read()
+            url = urljoin(url, response.getheader("Location"))
+
+        raise DownloadError(f"Too many redirects: {url}")
+
+    def _send(self, url: str, headers: Dict[str, str]) -> http.client.HTTPResponse:
+        parts = urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        key = (parts.scheme, parts.netloc)
+
+        if not hasattr(self._local, "connections"):
+            self._local.connections = {}
+
+        connections = self._local.connections
+
+        # A kept-alive connection may have been closed by the server in the meantime, it is retried once
+        for attempt in range(2):
+            connection = connections.get(key)
+
+            if connection is None:
+                connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+                connection = connections[key] = connection_class(parts.netloc, timeout=self._timeout)
+
+                with self._lock:
+                    self._all_connections.append(connection)
+
+            try:
+                connection.request("GET", path, headers=headers)
+                return connection.getresponse()
+
+            except (http.client.RemoteDisconnected, ConnectionError):
+                connection.close()
+                del connections[key]
+
+                if attempt:
+                    raise
+
+    def discard(self) -> None:
+        """
+        Closes the connections of the current thread, a response may not have been read entirely.
+        """
+
+        for connection in getattr(self._local, "connections", {}).values():
+            connection.close()
+
+        self._local.connections = {}
+
+    def close(self) -> None:
+        with self._lock:
+            for connection in self._all_connections:
+                connection.close()
+
+            self._all_connections.clear()
+
+
+class Downloader:
+
+    """
+    Downloads archives of test vectors concurrently and extracts their RSP files.
+
+    Archives are written to disk as they are received and only their RSP members are
+    extracted, one after the other, so no archive is ever held in memory. Interrupted
+    downloads are resumed with a range request, provided the archive did not change
+    in the meantime.
+
+    The ETag and Last-Modified headers of every archive are recorded in a manifest in
+    the destination directory. Archives are then only downloaded again when the server
+    reports that they changed, or when their extracted files are missing.
+    """
+
+    def __init__(self, dest_dir: str, base_url: str = CAVP_BASE_URL, workers: int = DEFAULT_WORKERS,
+                 timeout: float = _TIMEOUT):
+        self.dest_dir = dest_dir
+        self.base_url = base_url
+        self.workers = workers
+
+        self._connections = _ConnectionPool(timeout)
+        self._manifest_lock = threading.Lock()
+
+        os.makedirs(dest_dir, exist_ok=True)
+        self._manifest: Dict[str, dict] = self._read_manifest()
+
+    def download(self, archives: List[str]) -> List[str]:
+        """
+        Downloads the given archives, either names of ARCHIVES, paths relative to the base
+        URL or URLs. Returns the paths of the RSP files they hold, in the order of the archives.
+        """
+
+        urls = [urljoin(self.base_url, ARCHIVES.get(archive, archive)) for archive in archives]
+
+        with ThreadPoolExecutor(self.workers) as executor:
+            rsp_paths = list(executor.map(self._download_archive, urls))
+
+        return [rsp_path for archive_rsp_paths in rsp_paths for rsp_path in archive_rsp_paths]
+
+    def close(self) -> None:
+        self._connections.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def _archive_dir(self, url: str) -> str:
+        archive_name = posixpath.basename(urlsplit(url).path)
+        return os.path.join(self.dest_dir, posixpath.splitext(archive_name)[0])
+
+    def _download_archive(self, url: str) -> List[str]:
+        try:
+            return self._download_and_extract(url)
+        except BaseException:
+            self._connections.discard()
+            raise
+
+    def _download_and_extract(self, url: str) -> List[str]:
+        archive_dir = self._archive_dir(url)
+        partial_path = archive_dir + ".zip" + _PARTIAL_EXTENSION
+        record = self._manifest.get(url, {})
+        conditional_headers = {}
+
+        extracted = record.get("files") is not None and all(
+            os.path.exists(os.path.join(archive_dir, rsp_file)) for rsp_file in record["files"]
+        )
+
+        if extracted:
+            if record.get("etag"):
+                conditional_headers["If-None-Match"] = record["etag"]
+
+            if record.get("last_modified"):
+                conditional_headers["If-Modified-Since"] = record["last_modified"]
+
+        for _ in range(_MAX_ATTEMPTS):
+            headers = dict(conditional_headers)
+            partial_size = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+
+            # Resumed only if the archive is still the one that was being downloaded
+            if partial_size and record.get("partial_validator"):
+                headers["Range"] = f"bytes={partial_size}-"
+                headers["If-Range"] = record["partial_validator"]
+
+            response = self._connections.request(url, headers)
+
+            if response.status == 416:
+                # The partial archive is not a prefix of the current one
+                response.read()
+
+            elif response.status == 206 and _content_range_start(response) != partial_size:
+                # Not the continuation of the partial archive, the rest of the response is not read
+                self._connections.discard()
+
+            else:
+                break
+
+            # Downloaded again from scratch
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+
+        else:
+            raise DownloadError(f"Downloading '{url}' failed: the download could not be resumed "
+                                f"nor restarted in {_MAX_ATTEMPTS} attempts")
+
+        if response.status == 304:
+            response.read()
+            return [os.path.join(archive_dir, rsp_file) for rsp_file in record["files"]]
+
+        if response.status not in (200, 206):
+            response.read()
+            raise DownloadError(f"Downloading '{url}' failed: HTTP {response.status}")
+
+        etag = response.getheader("ETag")
+        last_modified = response.getheader("Last-Modified")
+
+        self._update_manifest(url, {**record, "partial_validator": etag or last_modified})
+
+        # A full response is sent whenever the archive can't be resumed
+        expected_size = response.getheader("Content-Length")
+
+        try:
+            with open(partial_path, "ab" if response.status == 206 else "wb") as partial_fd:
+                first_byte = partial_fd.tell()
+                shutil.copyfileobj(response, partial_fd, _CHUNK_SIZE)
+                received_size = partial_fd.tell() - first_byte
+
+            # Reading a response stops without any error when the connection is lost
+            if expected_size is not None and received_size != int(expected_size):
+                raise http.client.IncompleteRead(b"", int(expected_size) - received_size)
+
+        except (http.client.HTTPException, OSError) as error:
+            # The partial archive is kept, the download resumes from there next time
+            raise DownloadError(f"Downloading '{url}' has been interrupted: {error!r}") from None
+
+        try:
+            rsp_files = _extract_rsp_files(partial_path, archive_dir)
+        finally:
+            os.remove(partial_path)
+
+        self._update_manifest(url, {"etag": etag, "last_modified": last_modified, "files": rsp_files})
+
+        return [os.path.join(archive_dir, rsp_file) for rsp_file in rsp_files]
+
+    def _read_manifest(self) -> Dict[str, dict]:
+        try:
+            with open(os.path.join(self.dest_dir, _MANIFEST_FILE_NAME), "r") as manifest_fd:
+                return json.load(manifest_fd)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _update_manifest(self, url: str, record: dict) -> None:
+        with self._manifest_lock:
+            self._manifest[url] = record
+            manifest_fd, temporary_path = tempfile.mkstemp(dir=self.dest_dir, suffix=".tmp")
+
+            with os.fdopen(manifest_fd, "w") as out_fd:
+                json.dump(self._manifest, out_fd, indent=4)
+
+            os.replace(temporary_path, os.path.join(self.dest_dir, _MANIFEST_FILE_NAME))
+
+
+def _content_range_start(response: http.client.HTTPResponse) -> Optional[int]:
+    """
+    Returns the first byte of a partial response, as given by its "bytes START-END/TOTAL"
+    Content-Range header, None if it is missing or invalid.
+    """
+
+    unit, _, byte_range = (response.getheader("Content-Range") or "").partition(" ")
+    start, separator, _ = byte_range.partition("-")
+
+    if unit != "bytes" or not separator or not start.isdigit():
+        return None
+
+    return int(start)
+
+
+def _extract_rsp_files(archive_path: str, archive_dir: str) -> List[str]:
+    """
+    Extracts the RSP members of the archive, returns their paths relative to archive_dir.
+    """
+
+    rsp_files = []
+
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            for member in archive.infolist():
+                if member.is_dir() or not member.filename.lower().endswith(_RSP_EXTENSION):
+                    continue
+
+                rsp_file = posixpath.normpath(member.filename)
+
+                if rsp_file.startswith(("/", "../")):
+                    raise DownloadError(f"Unsafe member in '{archive_path}': {member.filename}")
+
+                rsp_path = os.path.join(archive_dir, *rsp_file.split("/"))
+                os.makedirs(os.path.dirname(rsp_path), exist_ok=True)
+
+                # Members are decompressed chunk by chunk, then moved into place
+                with archive.open(member) as member_fd, \
+                        tempfile.NamedTemporaryFile(dir=os.path.dirname(rsp_path), delete=False) as out_fd:
+                    shutil.copyfileobj(member_fd, out_fd, _CHUNK_SIZE)
+
+                os.replace(out_fd.name, rsp_path)
+                rsp_files.append(rsp_file)
+
+    except zipfile.BadZipFile as bad_zip_file:
+        raise DownloadError(f"Invalid archive '{archive_path}': {bad_zip_file}") from None
+
+    return rsp_files
+
+
+def download(algorithm: Union[str, List[str]], dest_dir: str, workers: int = DEFAULT_WORKERS,
+             base_url: str = CAVP_BASE_URL) -> List[str]:
+    """
+    Downloads the test vectors of one or several algorithms to dest_dir, see Downloader.
+    """
+
+    archives = [algorithm] if isinstance(algorithm, str) else algorithm
+
+    with Downloader(dest_dir, base_url, workers) as downloader:
+        return downloader.download(archives)
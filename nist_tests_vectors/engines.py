@@ -0,0 +1,431 @@
+# coding: utf-8
+
+import os
+import re
+import bz2
+import gzip
+import lzma
+import mmap
+import hashlib
+import tarfile
+import zipfile
+from typing import List, Tuple, Sequence, Iterable, Iterator, Optional, Dict
+
+from nist_tests_vectors.index import RspIndex, _Scanner
+
+# Metadata lines and blank lines at the beginning of the file
+_METADATA_REGEX = re.compile(rb"\A(?:[ \t\r]*\n|#[^\n]*(?:\n|\Z))*")
+
+# Separator between two test vectors blocks
+_BLANK_LINES_REGEX = re.compile(r"\n(?:[ \t]*\n)+")
+
+RSP_EXTENSION = ".rsp"
+
+_ZIP_EXTENSION = ".zip"
+_TAR_EXTENSIONS = (".tar", ".tgz", ".tar.gz", ".txz", ".tar.xz", ".tbz2", ".tar.bz2")
+
+# Compressed RSP files, checked after tar archives which may be compressed as well
+_COMPRESSED_OPENERS = {
+    ".gz": gzip.open,
+    ".xz": lzma.open,
+    ".lzma": lzma.open,
+    ".bz2": bz2.open,
+}
+
+# Amount of decompressed data read at once from streams
+_STREAM_CHUNK_SIZE = 1 << 22
+
+# Amount of data first read to find the metadata, the stream is decompressed again afterwards
+_METADATA_CHUNK_SIZE = 1 << 16
+
+# Keys and values of a test vectors block, in the order they appear in the file
+Block = Tuple[List[str], List[str]]
+
+
+def _parse_vector_line(line: str) -> Tuple[str, str]:
+    key, value = line.split("=")
+    return key.strip(), value.strip()
+
+
+def _parse_block_lines(lines: Iterable[str]) -> Block:
+    keys = []
+    values = []
+
+    for line in lines:
+        key, value = _parse_vector_line(line)
+        keys.append(key)
+        values.append(value)
+
+    return keys, values
+
+
+class FileEngine:
+
+    """
+    Reads the RSP file line by line through a buffered binary file object.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._rsp_fd = open(path, "rb")
+
+    def close(self) -> None:
+        self._rsp_fd.close()
+
+    def build_index(self, sidecar: bool) -> RspIndex:
+        return RspIndex.open(self.path, sidecar=sidecar)
+
+    def read_metadata(self) -> List[str]:
+        metadata = []
+
+        self._rsp_fd.seek(0)
+        line = self._rsp_fd.readline()
+
+        # Metadata may be divided into multiple chunks separated by empty lines
+        while line.startswith(b"#") or (line and not line.strip()):
+            if line.startswith(b"#"):
+                metadata.append(line[1:].decode("utf-8").strip())
+
+            line = self._rsp_fd.readline()
+
+        return metadata
+
+    def read(self, start: int, end: int) -> bytes:
+        self._rsp_fd.seek(start)
+        return self._rsp_fd.read(end - start)
+
+    def read_blocks(self, offsets: Sequence[int], _end: int) -> List[Block]:
+        """
+        Returns the keys and values of the test vectors blocks starting at the given offsets.
+        """
+
+        return [self._read_block(offset) for offset in offsets]
+
+    def _read_block(self, offset: int) -> Block:
+        lines = []
+
+        self._rsp_fd.seek(offset)
+        line = self._rsp_fd.readline()
+
+        # Keep reading lines while there's data to parse
+        while line.strip() and not line.startswith(b"["):
+            lines.append(line.decode("utf-8"))
+            line = self._rsp_fd.readline()
+
+        return _parse_block_lines(lines)
+
+
+class MmapEngine:
+
+    """
+    Maps the whole RSP file in memory and parses it with regular expressions
+    running over slices of the mapping, the file is never read line by line.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._rsp_fd = open(path, "rb")
+
+        # Empty files can't be mapped but there is nothing to parse anyway
+        try:
+            self._buffer = mmap.mmap(self._rsp_fd.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._buffer = b""
+
+    def close(self) -> None:
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+        self._rsp_fd.close()
+
+    def build_index(self, sidecar: bool) -> RspIndex:
+        if sidecar:
+            return RspIndex.open(self.path, sidecar=True)
+
+        # Reuse the mapping rather than mapping the file a second time
+        return RspIndex.build_from_buffer(self._buffer, os.fstat(self._rsp_fd.fileno()))
+
+    def read_metadata(self) -> List[str]:
+        header = _METADATA_REGEX.match(self._buffer).group()
+
+        return [
+            line[1:].decode("utf-8").strip()
+            for line in header.splitlines()
+            if line.startswith(b"#")
+        ]
+
+    def read(self, start: int, end: int) -> bytes:
+        return self._buffer[start:end]
+
+    def read_blocks(self, offsets: Sequence[int], end: int) -> List[Block]:
+        """
+        Returns the keys and values of the test vectors blocks starting at the given offsets.
+        The blocks must be consecutive, the last one ending at the given end offset.
+        """
+
+        return _split_blocks(self._buffer[offsets[0]:end], offsets, end)
+
+
+def _split_blocks(data: bytes, offsets: Sequence[int], end: int) -> List[Block]:
+    """
+    Returns the keys and values of consecutive test vectors blocks, data spanning from
+    the first offset to the end offset.
+
+    All the blocks are split at once with str methods, which is way cheaper than
+    a regex or a Python loop running over every line.
+    """
+
+    text = data.decode("utf-8")
+
+    if "\r" in text:
+        text = text.replace("\r", "")
+
+    text = text.replace(" = ", "=")
+
+    if " " not in text and "\t" not in text:
+        raw_blocks = _BLANK_LINES_REGEX.split(text.strip("\n"))
+
+        if len(raw_blocks) == len(offsets):
+            blocks = []
+
+            for raw_block in raw_blocks:
+                tokens = raw_block.replace("\n", "=").split("=")
+
+                # A line without "=" or with several of them
+                if len(tokens) != 2 * (raw_block.count("\n") + 1):
+                    break
+
+                blocks.append((tokens[0::2], tokens[1::2]))
+
+            else:
+                return blocks
+
+    # Unusual spacing or malformed lines, let the line parser deal with it
+    bounds = list(offsets[1:]) + [end]
+
+    return [
+        _parse_block_lines(line for line in data[start - offsets[0]:stop - offsets[0]].decode("utf-8").splitlines()
+                           if line.strip())
+        for start, stop in zip(offsets, bounds)
+    ]
+
+
+class StreamEngine:
+
+    """
+    Reads the RSP file from a forward-only stream: a member of a zip or tar archive, or
+    a gzip, xz or bz2 compressed file. Such streams can't be read at a random offset
+    without decompressing everything preceding it.
+
+    The index is built in a single pass over the decompressed content, which also keeps
+    the headers of the profiles. Test vectors are then read going forward, the stream is
+    only decompressed again from the beginning when reading backwards. Sidecar indexes
+    are not supported.
+    """
+
+    def __init__(self, path: str, member: Optional[str] = None):
+        self.path = path
+        self._archive = None
+        self._stream = None
+        self._position = 0
+
+        # Beginning of the stream, read when looking for the metadata
+        self._prefix = b""
+
+        # Headers of the profiles, keyed by their offsets
+        self._headers: Dict[Tuple[int, int], bytes] = {}
+
+        if path.lower().endswith(_ZIP_EXTENSION):
+            self._archive = zipfile.ZipFile(path)
+            members = self._archive.namelist()
+
+        elif path.lower().endswith(_TAR_EXTENSIONS):
+            self._archive = tarfile.open(path)
+            members = None if member is not None else self._archive.getnames()
+
+        elif member is not None:
+            raise ValueError(f"'{path}' is not a zip or tar archive, it has no member")
+
+        else:
+            members = None
+
+        if self._archive is not None and member is None:
+            rsp_members = [name for name in members if name.lower().endswith(RSP_EXTENSION)]
+
+            if len(rsp_members) != 1:
+                self._archive.close()
+                raise ValueError(f"'{path}' holds {len(rsp_members)} RSP files, a member must be given")
+
+            member = rsp_members[0]
+
+        self.member = member
+        self._rewind()
+
+    def close(self) -> None:
+        if self._stream is not None:
+            self._stream.close()
+
+        if self._archive is not None:
+            self._archive.close()
+
+    def _open_stream(self):
+        if isinstance(self._archive, zipfile.ZipFile):
+            return self._archive.open(self.member)
+
+        if isinstance(self._archive, tarfile.TarFile):
+            stream = self._archive.extractfile(self.member)
+
+            if stream is None:
+                raise ValueError(f"Member '{self.member}' of '{self.path}' is not a file")
+
+            return stream
+
+        for extension, open_compressed in _COMPRESSED_OPENERS.items():
+            if self.path.lower().endswith(extension):
+                return open_compressed(self.path, "rb")
+
+        return open(self.path, "rb")
+
+    def _rewind(self) -> None:
+        if self._stream is not None:
+            self._stream.close()
+
+        self._stream = self._open_stream()
+        self._position = 0
+
+    def _read_at(self, start: int, end: int) -> bytes:
+        if end <= len(self._prefix):
+            return self._prefix[start:end]
+
+        if start < self._position:
+            self._rewind()
+
+        # Skipped data still has to be decompressed
+        while self._position < start:
+            skipped = self._stream.read(min(_STREAM_CHUNK_SIZE, start - self._position))
+
+            if not skipped:
+                return b""
+
+            self._position += len(skipped)
+
+        data = self._stream.read(end - start)
+        self._position += len(data)
+
+        return data
+
+    def build_index(self, _sidecar: bool) -> RspIndex:
+        scanner = _Scanner()
+        content_hash = hashlib.sha256()
+        size = 0
+        pending = b""
+
+        for chunk in self._chunks():
+            content_hash.update(chunk)
+            data = pending + chunk
+
+            # Scanned up to the last blank line, the remaining paragraph may be incomplete
+            boundary = len(data) if not chunk else _last_paragraph_boundary(data)
+            first_profile = len(scanner.profiles)
+            scanner.feed(data[:boundary], size)
+
+            for profile_index in scanner.profiles[first_profile:]:
+                header_range = (profile_index.header_offset, profile_index.vectors_offset)
+                self._headers[header_range] = data[header_range[0] - size:header_range[1] - size]
+
+            size += boundary
+            pending = data[boundary:]
+
+        mtime_ns = os.stat(self.path).st_mtime_ns
+        return RspIndex(size, mtime_ns, content_hash.hexdigest(), scanner.finish(size))
+
+    def read_metadata(self) -> List[str]:
+        header = b""
+        end = _METADATA_CHUNK_SIZE
+
+        # Read until the metadata is followed by something else
+        while True:
+            data = self._read_at(0, end)
+            header = _METADATA_REGEX.match(data).group()
+
+            if len(header) < len(data) or len(data) < end:
+                break
+
+            end *= 2
+
+        self._prefix = data
+
+        return [
+            line[1:].decode("utf-8").strip()
+            for line in header.splitlines()
+            if line.startswith(b"#")
+        ]
+
+    def _chunks(self) -> Iterator[bytes]:
+        """
+        Yields the whole content of the stream, then an empty chunk.
+        """
+
+        # Decompressed once already when reading the metadata, unless it has been read further since
+        if self._prefix and self._position == len(self._prefix):
+            yield self._prefix
+        else:
+            self._rewind()
+
+        while True:
+            chunk = self._stream.read(_STREAM_CHUNK_SIZE)
+            self._position += len(chunk)
+            yield chunk
+
+            if not chunk:
+                return
+
+    def read(self, start: int, end: int) -> bytes:
+        header = self._headers.get((start, end))
+
+        if header is not None:
+            return header
+
+        return self._read_at(start, end)
+
+    def read_blocks(self, offsets: Sequence[int], end: int) -> List[Block]:
+        """
+        Returns the keys and values of the test vectors blocks starting at the given offsets.
+        The blocks must be consecutive, the last one ending at the given end offset.
+        """
+
+        return _split_blocks(self._read_at(offsets[0], end), offsets, end)
+
+
+def _last_paragraph_boundary(data: bytes) -> int:
+    """
+    Returns the offset following the last blank line of the data, 0 if there is none.
+    """
+
+    line_end = data.rfind(b"\n")
+
+    while line_end > 0:
+        line_start = data.rfind(b"\n", 0, line_end) + 1
+
+        if not data[line_start:line_end].strip():
+            return line_end + 1
+
+        line_end = line_start - 1
+
+    return 0
+
+
+def is_stream(path: str, member: Optional[str] = None) -> bool:
+    """
+    Tells whether the RSP file has to be read with the StreamEngine.
+    """
+
+    return member is not None or path.lower().endswith((_ZIP_EXTENSION,) + _TAR_EXTENSIONS +
+                                                       tuple(_COMPRESSED_OPENERS))
+
+
+ENGINES = {
+    "file": FileEngine,
+    "mmap": MmapEngine,
+    "stream": StreamEngine,
+}
@@ -3,25 +3,43 @@
 import os
 import re
 import itertools
+import functools
+from contextlib import contextmanager
 from collections.abc import Iterable
-from typing import Union, List
+from typing import Union, List, Dict, Iterator, Optional
 
 import json
+import sqlite3
 from json.encoder import JSONEncoder
 
-from jinja2 import Template
-from jinja2.filters import FILTERS
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, Template
 
 from nist_tests_vectors.parser import RspFile, Profile, TestVector, TestVectors, TestVectorsIterator
+from nist_tests_vectors.store import write_store
+from nist_tests_vectors.columns import ProfileColumns, write_npz
+from nist_tests_vectors.database import write_database
 
-SUPPORTED_EXPORT_FORMATS = ["json", "c"]
+SUPPORTED_EXPORT_FORMATS = ["json", "ndjson", "c", "ntvb", "npz", "sqlite"]
 SUPPORTED_TEMPLATE_FORMATS = ["c"]
 
 _THIS_SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
 
-_DEFAULT_RSP_FILE_TEMPLATE = f"{_THIS_SCRIPT_DIR}/templates/rsp_file.c.jinja"
-_DEFAULT_PROFILE_TEMPLATE = f"{_THIS_SCRIPT_DIR}/templates/profile.c.jinja"
-_DEFAULT_TESTS_VECTORS_TEMPLATE = f"{_THIS_SCRIPT_DIR}/templates/tests_vectors.c.jinja"
+_TEMPLATES_DIR = f"{_THIS_SCRIPT_DIR}/templates"
+
+_DEFAULT_RSP_FILE_TEMPLATE = f"{_TEMPLATES_DIR}/rsp_file.c.jinja"
+_DEFAULT_PROFILE_TEMPLATE = f"{_TEMPLATES_DIR}/profile.c.jinja"
+_DEFAULT_TESTS_VECTORS_TEMPLATE = f"{_TEMPLATES_DIR}/tests_vectors.c.jinja"
+_DEFAULT_RSP_FILE_BLOB_TEMPLATE = f"{_TEMPLATES_DIR}/rsp_file_blob.c.jinja"
+_DEFAULT_RSP_FILE_BIN_TEMPLATE = f"{_TEMPLATES_DIR}/rsp_file_bin.h.jinja"
+
+_SHARDS_HEADER_TEMPLATE = f"{_TEMPLATES_DIR}/rsp_file.h.jinja"
+_SHARDS_MAIN_TEMPLATE = f"{_TEMPLATES_DIR}/rsp_file_main.c.jinja"
+_SHARD_TEMPLATE = f"{_TEMPLATES_DIR}/rsp_file_shard.c.jinja"
+
+SUPPORTED_C_LAYOUTS = ["symbols", "blob", "bin"]
+
+# Compiled templates kept in memory, in addition to the bytecode cached on disk
+_TEMPLATES_CACHE_SIZE = 64
 
 class RspJsonEncoder(JSONEncoder):
 
@@ -50,7 +68,7 @@ class RspJsonEncoder(JSONEncoder):
             return RspJsonEncoder.profile_to_json(obj)
         elif isinstance(obj, TestVectors):
             return obj.__dict__()
-        elif isinstance(obj, bytearray):
+        elif isinstance(obj, (bytearray, memoryview)):
             return obj.hex()
         elif isinstance(obj, Iterable):
             return type(self).FakeListIterator(obj)
@@ -66,34 +84,337 @@ class RspJsonEncoder(JSONEncoder):
         return {"attributes": profile.attributes, "vectors": profile.vectors}
 
 
-def save_as_json(rsp_iterator: Union[RspFile, Profile, List[TestVector]], output_file: str):
+def _encode_default(obj):
+    if isinstance(obj, (bytearray, memoryview, bytes)):
+        return obj.hex()
+
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# Encoders hold no state, all the writers of a process share them
+_COMPACT_JSON_ENCODER = JSONEncoder(separators=(",", ":"), default=_encode_default)
+_PRETTY_JSON_ENCODER = JSONEncoder(separators=(", ", ": "), default=_encode_default)
+
+
+class RspJsonWriter:
+
+    """
+    Streaming JSON writer, the output is written chunk by chunk as test vectors are
+    read so that memory stays flat whatever the size of the RSP file.
+
+    Every test vectors object is encoded on its own by the C accelerated encoder of
+    the json module. By default the document is indented with one test vectors
+    object per line, compact mode writes it without any whitespace.
+
+    In NDJSON mode, every line is a JSON object of its own. The first line holds the
+    metadata of the RSP file and every following line holds a test vectors object
+    along with the index of its profile. Profile attributes are either inlined in
+    every line or written once in a line of their own, preceding the test vectors
+    of the profile, which is then referenced by its index.
+    """
+
+    PROFILE_ATTRIBUTES_MODES = ("inline", "reference")
+
+    def __init__(self, out_fd, compact: bool = False, ndjson: bool = False, profile_attributes: str = "inline"):
+        if profile_attributes not in RspJsonWriter.PROFILE_ATTRIBUTES_MODES:
+            raise ValueError(f"Unknown profile attributes mode '{profile_attributes}', "
+                             f"expected one of: {', '.join(RspJsonWriter.PROFILE_ATTRIBUTES_MODES)}")
+
+        self._out_fd = out_fd
+        self._ndjson = ndjson
+        self._profile_attributes = profile_attributes
+        self._indent = "" if compact or ndjson else "    "
+        self._newline = "" if compact or ndjson else "\n"
+        self._colon = ":" if compact or ndjson else ": "
+        self._encode = (_COMPACT_JSON_ENCODER if compact or ndjson else _PRETTY_JSON_ENCODER).encode
+
+    def write(self, rsp_iterator: Union[RspFile, Profile, TestVectorsIterator, List[TestVectors]]) -> None:
+        if self._ndjson:
+            self._write_ndjson(rsp_iterator)
+
+        elif isinstance(rsp_iterator, RspFile):
+            self._write_rsp_file(rsp_iterator)
+
+        elif isinstance(rsp_iterator, Profile):
+            self._write_profile(rsp_iterator, 0)
+
+        else:
+            self._write_vectors(rsp_iterator, 0)
+
+        self._out_fd.write(self._newline)
+
+    def _line(self, level: int) -> str:
+        return self._newline + self._indent * level
+
+    def _write_rsp_file(self, rsp_file: RspFile) -> None:
+        write = self._out_fd.write
+
+        write("{" + self._line(1) + '"metadata"' + self._colon + self._encode(rsp_file.metadata) + ",")
+        write(self._line(1) + '"profiles"' + self._colon + "[")
+
+        for profile_idx, profile in enumerate(rsp_file):
+            write(("," if profile_idx else "") + self._line(2))
+            self._write_profile(profile, 2)
+
+        write(self._line(1) + "]" + self._line(0) + "}")
+
+    def _write_profile(self, profile: Profile, level: int) -> None:
+        write = self._out_fd.write
+
+        write("{" + self._line(level + 1) + '"attributes"' + self._colon + self._encode(profile.attributes) + ",")
+        write(self._line(level + 1) + '"vectors"' + self._colon)
+        self._write_vectors(profile.vectors, level + 1)
+        write(self._line(level) + "}")
+
+    def _write_vectors(self, vectors: Iterable, level: int) -> None:
+        write = self._out_fd.write
+        separator = "," + self._line(level + 1)
+
+        write("[")
+
+        for vector_idx, test_vectors in enumerate(vectors):
+            write((separator if vector_idx else self._line(level + 1)) + self._encode(test_vectors.__dict__()))
+
+        write(self._line(level) + "]")
+
+    def _write_ndjson(self, rsp_iterator: Union[RspFile, Profile, TestVectorsIterator, List[TestVectors]]) -> None:
+        write = self._out_fd.write
+
+        if isinstance(rsp_iterator, RspFile):
+            write(self._encode({"metadata": rsp_iterator.metadata}) + "\n")
+            profiles = rsp_iterator
+
+        elif isinstance(rsp_iterator, Profile):
+            profiles = [rsp_iterator]
+
+        else:
+            # Bare test vectors, there is no profile to refer to
+            for test_vectors in rsp_iterator:
+                write(self._encode({"vector": test_vectors.__dict__()}) + "\n")
+            return
+
+        for profile_idx, profile in enumerate(profiles):
+            if self._profile_attributes == "reference":
+                write(self._encode({"profile": profile_idx, "attributes": profile.attributes}) + "\n")
+                prefix = f'{{"profile":{profile_idx},"vector":'
+
+            else:
+                prefix = f'{{"profile":{profile_idx},"attributes":{self._encode(profile.attributes)},"vector":'
+
+            for test_vectors in profile.vectors:
+                write(prefix + self._encode(test_vectors.__dict__()) + "}\n")
+
+
+# Large buffer, the output is written in many small chunks
+_JSON_BUFFER_SIZE = 1 << 20
+
+
+@contextmanager
+def _removed_on_error(*output_files: str):
+    try:
+        yield
+    except BaseException:
+        # A partial file would prevent converting the RSP file again once fixed
+        for output_file in output_files:
+            if os.path.exists(output_file):
+                os.remove(output_file)
+        raise
+
+
+def save_as_json(rsp_iterator: Union[RspFile, Profile, List[TestVector]], output_file: str, compact: bool = False,
+                 ndjson: bool = False, profile_attributes: str = "inline"):
 
     if os.path.exists(output_file):
         raise FileExistsError(f"File '{output_file}' already exists")
 
-    with open(output_file, "w", encoding="utf-8") as out_fd:
-        json.dump(rsp_iterator, out_fd, indent=4, cls=RspJsonEncoder)
+    with _removed_on_error(output_file), \
+            open(output_file, "w", encoding="utf-8", buffering=_JSON_BUFFER_SIZE) as out_fd:
+        RspJsonWriter(out_fd, compact, ndjson, profile_attributes).write(rsp_iterator)
+
+
+def save_as_ndjson(rsp_iterator: Union[RspFile, Profile, List[TestVector]], output_file: str,
+                   profile_attributes: str = "inline"):
+    save_as_json(rsp_iterator, output_file, ndjson=True, profile_attributes=profile_attributes)
+
+
+def save_as_ntvb(rsp_file: RspFile, output_file: str):
+    """
+    Saves the RSP file in the NTVB binary format, which RspStore opens without parsing anything.
+    """
+
+    if os.path.exists(output_file):
+        raise FileExistsError(f"File '{output_file}' already exists")
+
+    with _removed_on_error(output_file), open(output_file, "wb") as out_fd:
+        write_store(rsp_file, out_fd)
+
+
+def save_as_npz(rsp_iterator: Union[RspFile, Profile], output_file: str):
+    """
+    Saves the test vectors as columns in an NPZ file, see RspColumns. Requires numpy.
+    """
+
+    if os.path.exists(output_file):
+        raise FileExistsError(f"File '{output_file}' already exists")
+
+    if isinstance(rsp_iterator, RspFile):
+        metadata = rsp_iterator.metadata
+        profiles = [rsp_iterator[profile_idx] for profile_idx in range(len(rsp_iterator))]
+    else:
+        metadata = []
+        profiles = [rsp_iterator]
+
+    # Columns are built profile by profile while being written
+    with _removed_on_error(output_file):
+        write_npz(metadata, (ProfileColumns.from_profile(profile) for profile in profiles), output_file)
+
+
+def save_as_sqlite(rsp_files: Union[RspFile, List[RspFile]], output_file: str):
+    """
+    Saves the RSP files in a SQLite database, see write_database. Unlike other formats,
+    an existing database is not an error: the RSP files are appended to it.
+    """
+
+    if isinstance(rsp_files, RspFile):
+        rsp_files = [rsp_files]
+
+    connection = sqlite3.connect(output_file)
+
+    try:
+        write_database(rsp_files, connection)
+    finally:
+        connection.close()
+
 
+_C_UNSAFE_CHARS_REGEX = re.compile(r"[\s./\-*+)(:;,!?%\"'&|]+")
+
+# The same few keys and attributes are sanitized over and over
+@functools.lru_cache(maxsize=4096)
+def _sanitize_str_for_c(input_to_sanitize: str) -> str:
+    return _C_UNSAFE_CHARS_REGEX.sub("_", input_to_sanitize)
 
 def _sanitize_for_c(input_to_sanitize):
 
     if isinstance(input_to_sanitize, str):
-        return re.sub(r"[\s./\-*+)(:;,!?%\"'&|]+", "_", input_to_sanitize)
+        return _sanitize_str_for_c(input_to_sanitize)
 
     elif isinstance(input_to_sanitize, int):
-        pass
+        return input_to_sanitize
 
     else:
         raise NotImplemented
 
-FILTERS["sanitize_for_c"] = _sanitize_for_c
+# C literal of every possible byte, followed by its separator
+_C_BYTES_LITERALS = tuple(f"0x{byte:02X}, " for byte in range(256))
 
-def _save_rsp_file_as_c(rsp_file: RspFile, output_file: str, jinja_template_path: str):
-    tests_vectors_keys = next(rsp_file.profiles[0].vectors).keys()
+def _c_bytes(value: Union[bytes, bytearray, memoryview]) -> str:
+    """
+    Formats a whole byte array as the content of a C array initializer.
+    """
+
+    return "".join(map(_C_BYTES_LITERALS.__getitem__, value))
+
+class CBlob:
+
+    """
+    Byte arrays packed one after the other into a single C array, so that generated
+    sources declare one symbol instead of one per value. Identical byte arrays are only
+    stored once, which is common for keys and IVs of Monte-Carlo test vectors.
+
+    When a binary file object is given, byte arrays are written to it instead of
+    being formatted as C source.
+    """
+
+    def __init__(self, data_fd=None):
+        self._chunks: List[bytes] = []
+        self._offsets: Dict[bytes, int] = {}
+        self._data_fd = data_fd
+        self.size = 0
+
+    def add(self, value: Union[bytes, bytearray, memoryview]) -> int:
+        """
+        Returns the offset of the given byte array within the blob, adding it if needed.
+        """
+
+        value = bytes(value)
+        offset = self._offsets.get(value)
+
+        if offset is None:
+            offset = self._offsets[value] = self.size
+            self.size += len(value)
+
+            # Written to the binary file right away rather than held in memory
+            if self._data_fd is not None:
+                self._data_fd.write(value)
+            else:
+                self._chunks.append(value)
+
+        return offset
+
+    def lines(self, line_size: int = 64) -> Iterator[bytes]:
+        data = b"".join(self._chunks)
+        return (data[i:i + line_size] for i in range(0, len(data), line_size))
+
+
+# Escape sequence of every possible byte within a C string literal
+_C_STRING_ESCAPES = tuple(f"\\x{byte:02x}" for byte in range(256))
+
+def _c_string(value: Union[bytes, bytearray, memoryview]) -> str:
+    """
+    Formats a whole byte array as a C string literal, which compilers parse way faster
+    than an initializer list of the same size.
+    """
+
+    return '"' + "".join(map(_C_STRING_ESCAPES.__getitem__, value)) + '"'
+
+
+# Shared by all the exports, built-in templates can be included from any template
+_ENVIRONMENT = Environment(
+    loader=FileSystemLoader(_TEMPLATES_DIR),
+    bytecode_cache=FileSystemBytecodeCache()
+)
+_ENVIRONMENT.filters["sanitize_for_c"] = _sanitize_for_c
+_ENVIRONMENT.filters["c_bytes"] = _c_bytes
+_ENVIRONMENT.filters["c_string"] = _c_string
+
+@functools.lru_cache(maxsize=_TEMPLATES_CACHE_SIZE)
+def _get_environment(templates_dir: str) -> Environment:
+    """
+    Returns the environment of the templates of the given directory: templates they include
+    or extend are looked up in their own directory first, then among the built-in ones.
+    """
+
+    if templates_dir == os.path.abspath(_TEMPLATES_DIR):
+        return _ENVIRONMENT
 
-    with open(jinja_template_path, "r", encoding="utf-8") as template_fd:
-        template = Template(template_fd.read())
+    # Filters and bytecode cache are shared with the built-in templates
+    return _ENVIRONMENT.overlay(loader=FileSystemLoader([templates_dir, _TEMPLATES_DIR]))
 
+@functools.lru_cache(maxsize=_TEMPLATES_CACHE_SIZE)
+def _compile_template(jinja_template_path: str, _mtime_ns: int) -> Template:
+    # Loaded through the loader of its directory so that the bytecode cache applies to it
+    environment = _get_environment(os.path.dirname(jinja_template_path))
+    return environment.loader.load(environment, os.path.basename(jinja_template_path), environment.make_globals(None))
+
+def _get_template(jinja_template_path: str) -> Template:
+    """
+    Returns the compiled template at the given path, it's only compiled again once modified.
+    """
+
+    jinja_template_path = os.path.abspath(jinja_template_path)
+    return _compile_template(jinja_template_path, os.stat(jinja_template_path).st_mtime_ns)
+
+# Amount of template events joined before being written
+_C_STREAM_BUFFER_SIZE = 4096
+
+def _render_to_file(template: Template, output_file: str, **context) -> None:
+    # Rendered chunk by chunk, the whole C source is never held in memory
+    with _removed_on_error(output_file), open(output_file, "w") as output_fd:
+        stream = template.stream(**context)
+        stream.enable_buffering(_C_STREAM_BUFFER_SIZE)
+        stream.dump(output_fd)
+
+def _collect_profile_attributes_values(rsp_file: RspFile) -> Dict[str, set]:
     profile_attributes_values = {}
 
     for profile in rsp_file:
@@ -103,18 +424,50 @@ def _save_rsp_file_as_c(rsp_file: RspFile, output_file: str, jinja_template_path
             else:
                 profile_attributes_values[key] = set([value])
 
-    with open(output_file, "w") as output_fd:
-        output_fd.write(template.render(
+    return profile_attributes_values
+
+def _save_rsp_file_as_c(rsp_file: RspFile, output_file: str, jinja_template_path: str):
+    tests_vectors_keys = next(rsp_file.profiles[0].vectors).keys()
+
+    template = _get_template(jinja_template_path)
+
+    profile_attributes_values = _collect_profile_attributes_values(rsp_file)
+
+    _render_to_file(
+        template,
+        output_file,
+        rsp_file=rsp_file,
+        tests_vectors_keys=tests_vectors_keys,
+        profile_attributes_values=profile_attributes_values,
+        blob=CBlob()
+    )
+
+def _save_rsp_file_as_c_bin(rsp_file: RspFile, output_file: str, jinja_template_path: str):
+    bin_path = f"{os.path.splitext(output_file)[0]}.bin"
+
+    if os.path.exists(bin_path):
+        raise FileExistsError(f"File '{bin_path}' already exists")
+
+    bin_name = os.path.basename(bin_path)
+    template = _get_template(jinja_template_path)
+
+    with _removed_on_error(bin_path, output_file), open(bin_path, "wb") as bin_fd:
+        _render_to_file(
+            template,
+            output_file,
             rsp_file=rsp_file,
-            tests_vectors_keys=tests_vectors_keys,
-            profile_attributes_values=profile_attributes_values
-        ))
+            profile_attributes_values=_collect_profile_attributes_values(rsp_file),
+            blob=CBlob(bin_fd),
+            blob_file_name=bin_name,
+            # Symbol defined by "ld -r -b binary" and objcopy when given the file name
+            blob_symbol=f"_binary_{re.sub(r'[^0-9A-Za-z]', '_', bin_name)}_start",
+            header_guard=_sanitize_for_c(os.path.basename(output_file)).upper()
+        )
 
 def _save_profile_as_c(profile: Profile, output_file: str, jinja_template_path: str):
     tests_vectors_keys = next(profile.vectors).keys()
 
-    with open(jinja_template_path, "r", encoding="utf-8") as template_fd:
-        template = Template(template_fd.read())
+    template = _get_template(jinja_template_path)
 
     profile_attributes_values = {}
 
@@ -124,32 +477,155 @@ def _save_profile_as_c(profile: Profile, output_file: str, jinja_template_path:
         else:
             profile_attributes_values[key] = set([value])
 
-    with open(output_file, "w") as output_fd:
-        output_fd.write(template.render(
-            rsp_file=profile,
-            tests_vectors_keys=tests_vectors_keys,
-            profile_attributes_values=profile_attributes_values
-        ))
+    _render_to_file(
+        template,
+        output_file,
+        rsp_file=profile,
+        tests_vectors_keys=tests_vectors_keys,
+        profile_attributes_values=profile_attributes_values,
+        blob=CBlob()
+    )
 
 def _save_test_vectors_as_c(tests_vectors: TestVectorsIterator, output_file: str, jinja_template_path: str):
     tests_vectors_keys = next(tests_vectors).keys()
 
-    with open(jinja_template_path, "r", encoding="utf-8") as template_fd:
-        template = Template(template_fd.read())
+    template = _get_template(jinja_template_path)
+
+    _render_to_file(
+        template,
+        output_file,
+        tests_vectors=tests_vectors,
+        tests_vectors_keys=tests_vectors_keys,
+        blob=CBlob()
+    )
+
+def _split_into_shards(rsp_file: RspFile, shards: Optional[int], vectors_per_shard: Optional[int]) -> List[List[int]]:
+    """
+    Groups consecutive profiles into shards, profiles are numbered from 1 like in the
+    generated sources. Test vectors are counted with the index, without parsing them.
+    """
+
+    vectors_counts = [len(profile_index.vector_offsets) for profile_index in rsp_file.index]
+    total_vectors_count = sum(vectors_counts)
+    profiles_shards: List[List[int]] = []
+    shard_vectors_count = 0
+    vectors_before = 0
+
+    for profile_number, vectors_count in enumerate(vectors_counts, 1):
+        if shards is not None:
+            # Shard in which the middle of the profile falls when vectors are evenly spread
+            middle = vectors_before + vectors_count / 2
+            shard_idx = min(shards - 1, int(middle * shards / total_vectors_count)) if total_vectors_count else 0
+            new_shard = not profiles_shards or shard_idx >= len(profiles_shards)
 
-    with open(output_file, "w") as output_fd:
-        output_fd.write(template.render(
-            tests_vectors=tests_vectors,
-            tests_vectors_keys=tests_vectors_keys
-        ))
+        else:
+            new_shard = not profiles_shards or shard_vectors_count + vectors_count > vectors_per_shard
 
-def save_as_c(rsp_iterator: Union[RspFile, Profile, TestVectorsIterator], output_file: str, jinja_template_path: Union[str, None] = None):
+        if new_shard:
+            profiles_shards.append([])
+            shard_vectors_count = 0
+
+        profiles_shards[-1].append(profile_number)
+        shard_vectors_count += vectors_count
+        vectors_before += vectors_count
+
+    return profiles_shards
+
+def _save_rsp_file_as_c_shards(rsp_file: RspFile, output_file: str, shards: Optional[int],
+                               vectors_per_shard: Optional[int]):
+    base_path, extension = os.path.splitext(output_file)
+    header_path = f"{base_path}.h"
+    profiles_shards = _split_into_shards(rsp_file, shards, vectors_per_shard)
+    shards_paths = [f"{base_path}_{shard_idx}{extension}" for shard_idx in range(1, len(profiles_shards) + 1)]
+
+    for path in [header_path] + shards_paths:
+        if os.path.exists(path):
+            raise FileExistsError(f"File '{path}' already exists")
+
+    header_name = os.path.basename(header_path)
+    profile_attributes_values = _collect_profile_attributes_values(rsp_file)
+
+    # The files written before a failing one are removed as well
+    with _removed_on_error(header_path, output_file, *shards_paths):
+        _render_to_file(
+            _get_template(_SHARDS_HEADER_TEMPLATE),
+            header_path,
+            rsp_file=rsp_file,
+            profile_attributes_values=profile_attributes_values,
+            header_guard=_sanitize_for_c(header_name).upper()
+        )
+
+        _render_to_file(
+            _get_template(_SHARDS_MAIN_TEMPLATE),
+            output_file,
+            rsp_file=rsp_file,
+            profile_attributes_values=profile_attributes_values,
+            header_name=header_name
+        )
+
+        for shard_profiles, shard_path in zip(profiles_shards, shards_paths):
+            _render_to_file(
+                _get_template(_SHARD_TEMPLATE),
+                shard_path,
+                rsp_file=rsp_file,
+                shard_profiles=shard_profiles,
+                header_name=header_name
+            )
+
+def save_as_c(rsp_iterator: Union[RspFile, Profile, TestVectorsIterator], output_file: str, jinja_template_path: Union[str, None] = None,
+              layout: str = "symbols", shards: Optional[int] = None, vectors_per_shard: Optional[int] = None):
+    """
+    With the "symbols" layout, every value is declared as a C symbol of its own. With
+    the "blob" layout, all the byte arrays are packed into a single deduplicated array
+    and test vectors refer to them with offset and size pairs, which keeps huge files
+    quick to compile. Custom templates can use the same layout with the blob variable.
+    The "bin" layout moves this array out of the C source into a raw .bin file written
+    next to the output file, which becomes a header of offsets and sizes. The .bin file
+    can then be linked with "ld -r -b binary" or objcopy, or mapped at runtime.
+
+    RSP files can be split into several translation units compiled in parallel, either
+    a given amount of shards holding as many test vectors as possible, or as many shards
+    as needed to hold at most vectors_per_shard test vectors. Profiles are never split,
+    a profile larger than the budget gets a shard of its own. The output file then holds
+    the profiles table, the shards are written next to it along with a shared header.
+    """
+
+    if layout not in SUPPORTED_C_LAYOUTS:
+        raise ValueError(f"Unknown C layout '{layout}', expected one of: {', '.join(SUPPORTED_C_LAYOUTS)}")
+
+    sharded = shards is not None or vectors_per_shard is not None
+
+    if sharded:
+        if shards is not None and vectors_per_shard is not None:
+            raise ValueError("Either the amount of shards or the amount of vectors per shard must be given, not both")
+
+        if (shards is not None and shards < 1) or (vectors_per_shard is not None and vectors_per_shard < 1):
+            raise ValueError("Shards must hold at least one test vector")
+
+        if not isinstance(rsp_iterator, RspFile) or layout != "symbols" or jinja_template_path is not None:
+            raise ValueError("Only RSP files exported with the default templates of the symbols layout can be sharded")
 
     if os.path.exists(output_file):
         raise FileExistsError(f"File '{output_file}' already exists")
 
-    if isinstance(rsp_iterator, RspFile):
-        _save_rsp_file_as_c(rsp_iterator, output_file, jinja_template_path or _DEFAULT_RSP_FILE_TEMPLATE)
+    # The C structures are declared from the fields of the first test vectors
+    if isinstance(rsp_iterator, RspFile) and len(rsp_iterator) == 0:
+        raise ValueError(f"RSP file '{rsp_iterator.path}' has no profile to export to C")
+
+    first_profile = rsp_iterator[0] if isinstance(rsp_iterator, RspFile) else rsp_iterator
+
+    if isinstance(first_profile, Profile) and len(first_profile.vectors) == 0:
+        raise ValueError(f"Profile {first_profile.attributes} has no test vectors to export to C")
+
+    if sharded:
+        _save_rsp_file_as_c_shards(rsp_iterator, output_file, shards, vectors_per_shard)
+
+    elif isinstance(rsp_iterator, RspFile) and layout == "bin":
+        _save_rsp_file_as_c_bin(rsp_iterator, output_file, jinja_template_path or _DEFAULT_RSP_FILE_BIN_TEMPLATE)
+
+    elif isinstance(rsp_iterator, RspFile):
+        default_template = _DEFAULT_RSP_FILE_BLOB_TEMPLATE if layout == "blob" else _DEFAULT_RSP_FILE_TEMPLATE
+        _save_rsp_file_as_c(rsp_iterator, output_file, jinja_template_path or default_template)
 
     elif isinstance(rsp_iterator, Profile):
         _save_profile_as_c(rsp_iterator, output_file, jinja_template_path or _DEFAULT_PROFILE_TEMPLATE)
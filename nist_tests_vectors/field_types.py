@@ -0,0 +1,94 @@
+# coding: utf-8
+
+import json
+from typing import Dict, Iterable, List, Optional, Callable, Union
+
+INTEGER = "integer"
+HEXSTRING = "hexstring"
+
+# Fast decoder of every type, they raise ValueError when the value does not match the type
+DECODERS: Dict[str, Callable[[str], Union[int, bytearray]]] = {
+    INTEGER: int,
+    HEXSTRING: bytearray.fromhex,
+}
+
+# Amount of test vectors of a profile used to infer the type of its fields
+DEFAULT_SAMPLE_SIZE = 16
+
+
+def infer_field_type(values: Iterable[str]) -> str:
+    """
+    Infers the type of a field from some of its values. The field is an integer only if
+    all of them are decimal integers fitting in 4 bytes and without leading zeros (which
+    hexstrings made of digits are likely to have at some point), it's a hexstring otherwise.
+    """
+
+    for value in values:
+        if not value.isdigit() or (value.startswith("0") and value != "0"):
+            return HEXSTRING
+
+        if int(value, 10) > 2**32 - 1:
+            return HEXSTRING
+
+    return INTEGER
+
+
+class FieldTypes:
+
+    """
+    Type of every field of the test vectors, fixed once per profile or once per file
+    instead of being guessed for every value.
+
+    Types that are not known yet are inferred from the first test vectors in which
+    the field appears. Field types can be saved and loaded back to decode other
+    files of the same algorithm without inferring anything.
+    """
+
+    def __init__(self, types: Optional[Dict[str, str]] = None, sample_size: int = DEFAULT_SAMPLE_SIZE):
+        self._types: Dict[str, str] = {}
+        self.sample_size = sample_size
+
+        for key, field_type in (types or {}).items():
+            self[key] = field_type
+
+    def __repr__(self) -> str:
+        return f"FieldTypes({self._types})"
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._types
+
+    def __getitem__(self, key: str) -> str:
+        return self._types[key]
+
+    def __setitem__(self, key: str, field_type: str) -> None:
+        if field_type not in DECODERS:
+            raise ValueError(f"Unknown field type '{field_type}', expected one of: {', '.join(DECODERS)}")
+
+        self._types[key] = field_type
+
+    def __len__(self) -> int:
+        return len(self._types)
+
+    def to_dict(self) -> Dict[str, str]:
+        return dict(self._types)
+
+    def infer(self, samples: Dict[str, List[str]]) -> None:
+        """
+        Infers the type of the fields that are not typed yet from the given sample values.
+        """
+
+        for key, values in samples.items():
+            if key not in self._types:
+                self._types[key] = infer_field_type(values)
+
+    def decoders(self, keys: Iterable[str]) -> tuple:
+        return tuple(DECODERS[self._types[key]] for key in keys)
+
+    def save(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as types_fd:
+            json.dump(self._types, types_fd, indent=4)
+
+    @classmethod
+    def load(cls, path: str, sample_size: int = DEFAULT_SAMPLE_SIZE) -> "FieldTypes":
+        with open(path, "r", encoding="utf-8") as types_fd:
+            return cls(json.load(types_fd), sample_size)
@@ -0,0 +1,199 @@
+# coding: utf-8
+
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import functools
+from typing import List, Dict, Callable, Optional, Sequence
+
+from jinja2 import meta, TemplateNotFound
+
+from nist_tests_vectors.index import RspIndex
+from nist_tests_vectors.exporter import SUPPORTED_TEMPLATE_FORMATS, _TEMPLATES_DIR, _get_environment
+
+# Bump whenever exports change for the same inputs and options, all the outputs are then regenerated
+_MANIFEST_VERSION = 1
+
+MANIFEST_FILE_NAME = ".ntv-exports.json"
+
+
+class ExportManifest:
+
+    """
+    Record of the exports written to a directory: for every output file, the content hash
+    of its RSP file and of its templates, the options it has been exported with and the
+    content hash of the files it produced. Outputs whose record still matches are up to
+    date and don't have to be exported again.
+
+    As for sidecar indexes, the size and modification time of every file are recorded
+    along with its hash, so that checking a file that did not change does not read it.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, MANIFEST_FILE_NAME)
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as manifest_fd:
+                content = json.load(manifest_fd)
+        except (FileNotFoundError, ValueError):
+            content = {}
+
+        # Records keyed by the path of the output file relative to the directory
+        self._records: Dict[str, dict] = content.get("outputs", {}) \
+            if content.get("version") == _MANIFEST_VERSION else {}
+
+    def is_up_to_date(self, rsp_path: str, output_file: str, options: dict,
+                      template_paths: Sequence[str] = ()) -> bool:
+        record = self._records.get(self._key(output_file))
+
+        if record is None or record["options"] != options:
+            return False
+
+        if record["templates_hash"] != _templates_hash(template_paths):
+            return False
+
+        # Outputs modified by hand are exported again as well
+        return _is_unchanged(record["input"], rsp_path) and all(
+            _is_unchanged(state, os.path.join(self.directory, path)) for path, state in record["outputs"].items()
+        )
+
+    def update(self, rsp_path: str, output_file: str, options: dict, template_paths: Sequence[str],
+               output_files: List[str]) -> None:
+        previous_record = self._records.get(self._key(output_file))
+        output_keys = {self._key(path) for path in output_files}
+
+        # Files the previous export wrote but this one didn't, such as shards that are not needed anymore
+        if previous_record is not None:
+            for path in previous_record["outputs"]:
+                if path not in output_keys and os.path.exists(os.path.join(self.directory, path)):
+                    os.remove(os.path.join(self.directory, path))
+
+        self._records[self._key(output_file)] = {
+            "input": _file_state(rsp_path),
+            "templates_hash": _templates_hash(template_paths),
+            "options": options,
+            "outputs": {self._key(path): _file_state(path) for path in output_files},
+        }
+
+    def save(self) -> None:
+        manifest_fd, temporary_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+
+        with os.fdopen(manifest_fd, "w", encoding="utf-8") as out_fd:
+            json.dump({"version": _MANIFEST_VERSION, "outputs": self._records}, out_fd, separators=(",", ":"))
+
+        os.replace(temporary_path, self.path)
+
+    def _key(self, path: str) -> str:
+        return os.path.relpath(os.path.abspath(path), os.path.abspath(self.directory))
+
+
+def export_atomically(export: Callable[[str], None], output_file: str) -> List[str]:
+    """
+    Calls export with a temporary output file, then moves the files it wrote next to the
+    output file, replacing existing ones. Returns the paths of the moved files.
+
+    Exports may write several files next to their output file, such as shards or .bin
+    files, they all keep their name. Nothing is replaced if the export fails.
+    """
+
+    output_dir = os.path.dirname(os.path.abspath(output_file))
+    temporary_dir = tempfile.mkdtemp(dir=output_dir, prefix=".ntv-")
+
+    try:
+        export(os.path.join(temporary_dir, os.path.basename(output_file)))
+        output_files = []
+
+        for file_name in sorted(os.listdir(temporary_dir)):
+            output_path = os.path.join(output_dir, file_name)
+            os.replace(os.path.join(temporary_dir, file_name), output_path)
+            output_files.append(output_path)
+
+        return output_files
+
+    finally:
+        shutil.rmtree(temporary_dir, ignore_errors=True)
+
+
+def _file_state(path: str) -> dict:
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": RspIndex.hash_file(path)}
+
+
+def _is_unchanged(state: dict, path: str) -> bool:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return False
+
+    if stat.st_size != state["size"]:
+        return False
+
+    if stat.st_mtime_ns == state["mtime_ns"]:
+        return True
+
+    # Touched or copied, only its content matters
+    if RspIndex.hash_file(path) != state["sha256"]:
+        return False
+
+    state["mtime_ns"] = stat.st_mtime_ns
+    return True
+
+
+def template_paths(out_format: str, jinja_template_path: Optional[str] = None) -> List[str]:
+    """
+    Returns the templates an export depends on: all the built-in ones, which include each
+    other, the given one and the templates it includes, extends or imports, directly or not.
+    Templates whose name is only known when rendering can't be found, they are not part of
+    them. Formats that are not rendered from templates have none.
+    """
+
+    if out_format not in SUPPORTED_TEMPLATE_FORMATS:
+        return []
+
+    paths = [os.path.join(_TEMPLATES_DIR, file_name) for file_name in sorted(os.listdir(_TEMPLATES_DIR))]
+
+    if jinja_template_path is not None:
+        jinja_template_path = os.path.abspath(jinja_template_path)
+        environment = _get_environment(os.path.dirname(jinja_template_path))
+        pending_paths = [jinja_template_path]
+
+        while pending_paths:
+            template_path = pending_paths.pop()
+
+            if template_path in paths:
+                continue
+
+            paths.append(template_path)
+
+            with open(template_path, "r", encoding="utf-8") as template_fd:
+                template_names = meta.find_referenced_templates(environment.parse(template_fd.read()))
+
+            # Looked up the way the environment of the template does
+            for template_name in template_names:
+                if template_name is not None:
+                    try:
+                        pending_paths.append(os.path.abspath(environment.loader.get_source(environment,
+                                                                                           template_name)[1]))
+                    except TemplateNotFound:
+                        pass
+
+    return paths
+
+
+def _templates_hash(paths: Sequence[str]) -> str:
+    return _hash_templates(tuple((path, os.stat(path).st_mtime_ns) for path in paths))
+
+
+@functools.lru_cache(maxsize=64)
+def _hash_templates(templates: tuple) -> str:
+    # Templates are only hashed again once modified
+    templates_hash = hashlib.sha256()
+
+    for path, _ in templates:
+        with open(path, "rb") as template_fd:
+            templates_hash.update(template_fd.read())
+
+    return templates_hash.hexdigest()
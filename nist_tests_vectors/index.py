@@ -0,0 +1,269 @@
+# coding: utf-8
+
+import os
+import re
+import mmap
+import json
+import hashlib
+from array import array
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+
+# Bump whenever the layout of the sidecar file changes, older sidecars are then rebuilt
+_INDEX_VERSION = 1
+
+SIDECAR_EXTENSION = ".idx"
+
+
+@dataclass
+class ProfileIndex:
+    """
+    Byte offsets of a single profile within an RSP file.
+
+    header_offset points to the first "[...]" line of the profile, vectors_offset to
+    the first line following the header and end_offset to the beginning of the next
+    profile (or the end of the file). vector_offsets contains the offset of the first
+    line of every test vectors block of the profile.
+    """
+    header_offset: int
+    vectors_offset: int = 0
+    end_offset: int = 0
+    vector_offsets: array = field(default_factory=lambda: array("Q"))
+
+
+# A paragraph is a run of non-blank lines: a profile header or a test vectors block
+_PARAGRAPH_REGEX = re.compile(rb"(?:[ \t\r]*\S[^\n]*(?:\n|\Z))+")
+
+
+class _Scanner:
+
+    """
+    Scans the RSP file paragraph by paragraph rather than line by line, only paragraphs
+    mixing profile attributes and test vectors lines are processed line by line.
+
+    The file can be fed in several segments, as long as they are split between two
+    paragraphs.
+    """
+
+    def __init__(self):
+        self.profiles: List[ProfileIndex] = []
+        self._current: Optional[ProfileIndex] = None
+
+    def feed(self, rsp_buffer, base_offset: int = 0) -> None:
+        current = self._current
+        profiles = self.profiles
+
+        for paragraph in _PARAGRAPH_REGEX.finditer(rsp_buffer):
+            start = base_offset + paragraph.start()
+            end = base_offset + paragraph.end()
+            text = paragraph.group()
+            lines_count = text.rstrip().count(b"\n") + 1
+            header_lines_count = text.count(b"\n[") + text.startswith(b"[")
+
+            if 0 < header_lines_count < lines_count:
+                # Header lines following test vectors lines (or the other way around)
+                in_header = False
+                offset = start
+
+                for line in text.splitlines(keepends=True):
+                    if line.startswith(b"["):
+                        if not in_header:
+                            if current is not None:
+                                current.end_offset = offset
+
+                            current = ProfileIndex(offset)
+                            profiles.append(current)
+                            in_header = True
+
+                    elif current is not None:
+                        if in_header:
+                            current.vectors_offset = offset
+                            current.vector_offsets.append(offset)
+                            in_header = False
+
+                        elif offset == start:
+                            current.vector_offsets.append(offset)
+
+                    offset += len(line)
+
+                if in_header:
+                    current.vectors_offset = end
+
+            elif header_lines_count:
+                if current is not None:
+                    current.end_offset = start
+
+                current = ProfileIndex(start, end)
+                profiles.append(current)
+
+            # Paragraphs preceding the first profile are metadata, they are not indexed
+            elif current is not None:
+                current.vector_offsets.append(start)
+
+        self._current = current
+
+    def finish(self, size: int) -> List[ProfileIndex]:
+        if self._current is not None:
+            self._current.end_offset = size
+
+        return self.profiles
+
+
+def _scan(rsp_buffer) -> List[ProfileIndex]:
+    scanner = _Scanner()
+    scanner.feed(rsp_buffer)
+    return scanner.finish(len(rsp_buffer))
+
+
+class RspIndex:
+
+    """
+    One-pass index of an RSP file, it records the byte offsets of every profile header
+    and every test vectors block so that any of them can be read without parsing the
+    lines before it.
+
+    The index can be persisted as a sidecar file next to the RSP file, it is considered
+    stale as soon as the size of the RSP file changes or its modification time changes
+    along with its content hash.
+    """
+
+    def __init__(self, size: int, mtime_ns: int, content_hash: str, profiles: List[ProfileIndex]):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.content_hash = content_hash
+        self.profiles = profiles
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def __getitem__(self, profile_idx: int) -> ProfileIndex:
+        return self.profiles[profile_idx]
+
+    @staticmethod
+    def sidecar_path(rsp_path: str) -> str:
+        return rsp_path + SIDECAR_EXTENSION
+
+    @classmethod
+    def build(cls, rsp_path: str) -> "RspIndex":
+        with open(rsp_path, "rb") as rsp_fd:
+            stat = os.fstat(rsp_fd.fileno())
+
+            # Empty files can't be mapped
+            if stat.st_size == 0:
+                return cls(0, stat.st_mtime_ns, hashlib.sha256().hexdigest(), [])
+
+            with mmap.mmap(rsp_fd.fileno(), 0, access=mmap.ACCESS_READ) as rsp_buffer:
+                return cls.build_from_buffer(rsp_buffer, stat)
+
+    @classmethod
+    def build_from_buffer(cls, rsp_buffer, stat: os.stat_result) -> "RspIndex":
+        """
+        Builds the index from the whole content of an RSP file, typically a memory map.
+        """
+
+        return cls(stat.st_size, stat.st_mtime_ns, hashlib.sha256(rsp_buffer).hexdigest(), _scan(rsp_buffer))
+
+    @staticmethod
+    def hash_file(rsp_path: str) -> str:
+        hasher = hashlib.sha256()
+
+        with open(rsp_path, "rb") as rsp_fd:
+            for chunk in iter(lambda: rsp_fd.read(1 << 20), b""):
+                hasher.update(chunk)
+
+        return hasher.hexdigest()
+
+    def is_up_to_date(self, rsp_path: str) -> bool:
+        stat = os.stat(rsp_path)
+
+        if stat.st_size != self.size:
+            return False
+
+        if stat.st_mtime_ns == self.mtime_ns:
+            return True
+
+        # The file has been touched or copied, only its content matters
+        if RspIndex.hash_file(rsp_path) != self.content_hash:
+            return False
+
+        self.mtime_ns = stat.st_mtime_ns
+        return True
+
+    def save(self, rsp_path: str) -> None:
+        content = {
+            "version": _INDEX_VERSION,
+            "size": self.size,
+            "mtime_ns": self.mtime_ns,
+            "sha256": self.content_hash,
+            "profiles": [
+                [p.header_offset, p.vectors_offset, p.end_offset, p.vector_offsets.tolist()]
+                for p in self.profiles
+            ]
+        }
+
+        sidecar_path = RspIndex.sidecar_path(rsp_path)
+        tmp_path = f"{sidecar_path}.{os.getpid()}.tmp"
+
+        with open(tmp_path, "w", encoding="utf-8") as sidecar_fd:
+            json.dump(content, sidecar_fd, separators=(",", ":"))
+
+        os.replace(tmp_path, sidecar_path)
+
+    @classmethod
+    def load(cls, rsp_path: str) -> Optional["RspIndex"]:
+        """
+        Returns the index stored in the sidecar file of the given RSP file, or None if
+        there is no sidecar file or if it's stale.
+        """
+
+        try:
+            with open(RspIndex.sidecar_path(rsp_path), "r", encoding="utf-8") as sidecar_fd:
+                content = json.load(sidecar_fd)
+        except (OSError, ValueError):
+            return None
+
+        if content.get("version") != _INDEX_VERSION:
+            return None
+
+        profiles = [
+            ProfileIndex(header_offset, vectors_offset, end_offset, array("Q", vector_offsets))
+            for header_offset, vectors_offset, end_offset, vector_offsets in content["profiles"]
+        ]
+
+        index = cls(content["size"], content["mtime_ns"], content["sha256"], profiles)
+
+        if not index.is_up_to_date(rsp_path):
+            return None
+
+        if index.mtime_ns != content["mtime_ns"]:
+            # Avoid hashing the file again next time
+            try:
+                index.save(rsp_path)
+            except OSError:
+                pass
+
+        return index
+
+    @classmethod
+    def open(cls, rsp_path: str, sidecar: bool = False) -> "RspIndex":
+        """
+        Builds the index of the given RSP file. When sidecar is True, a valid sidecar
+        file is used instead of scanning the RSP file, and a fresh one is written otherwise.
+        """
+
+        if not sidecar:
+            return cls.build(rsp_path)
+
+        index = cls.load(rsp_path)
+
+        if index is None:
+            index = cls.build(rsp_path)
+
+            try:
+                index.save(rsp_path)
+            except OSError:
+                # Read-only location, the index is still usable for this process
+                pass
+
+        return index
@@ -0,0 +1,188 @@
+# coding: utf-8
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Iterator, Tuple, Optional, Dict
+
+from nist_tests_vectors.index import RspIndex
+from nist_tests_vectors.engines import ENGINES
+from nist_tests_vectors.field_types import FieldTypes
+from nist_tests_vectors.parser import RspFile, Profile, TestVectors, VectorsSchema, RspParsingError
+
+# Maximum amount of test vectors parsed by a task, small profiles are grouped together
+DEFAULT_CHUNK_SIZE = 4096
+
+# Amount of tasks submitted ahead of the one being yielded, per worker
+_TASKS_AHEAD_PER_WORKER = 2
+
+# Profile index, first and last test vectors indexes of a range of test vectors
+Chunk = Tuple[int, int, int]
+
+# Schemas as keys and types, schema index of every test vectors, their values and the error that stopped parsing
+ChunkResult = Tuple[List[Tuple[Tuple[str, ...], Tuple[str, ...]]], List[int], List[list], Optional[RspParsingError]]
+
+# RSP file opened once by every worker process
+_worker_rsp_file: Optional[RspFile] = None
+
+
+def _plan_tasks(rsp_index: RspIndex, chunk_size: int) -> List[List[Chunk]]:
+    tasks: List[List[Chunk]] = []
+    task: List[Chunk] = []
+    task_size = 0
+
+    for profile_idx, profile_index in enumerate(rsp_index.profiles):
+        vectors_count = len(profile_index.vector_offsets)
+
+        for first_idx in range(0, vectors_count, chunk_size):
+            last_idx = min(first_idx + chunk_size, vectors_count)
+
+            if task and task_size + last_idx - first_idx > chunk_size:
+                tasks.append(task)
+                task = []
+                task_size = 0
+
+            task.append((profile_idx, first_idx, last_idx))
+            task_size += last_idx - first_idx
+
+    if task:
+        tasks.append(task)
+
+    return tasks
+
+
+def _init_worker(path: str, member: Optional[str], engine: str, field_types: Optional[FieldTypes], strict: bool,
+                 rsp_index: RspIndex) -> None:
+    global _worker_rsp_file
+
+    _worker_rsp_file = RspFile(path, engine=engine, field_types=field_types, strict=strict, member=member)
+
+    # The file has already been scanned by the parent process
+    _worker_rsp_file._index = rsp_index
+
+
+def _parse_task(task: List[Chunk]) -> List[ChunkResult]:
+    """
+    Parses the test vectors of every chunk of the task. Test vectors are returned as
+    their values along with the index of their schema, schemas being returned as
+    their keys and types only. Parsing stops at the first error, which is returned
+    along with the test vectors preceding it.
+    """
+
+    results = []
+
+    for profile_idx, first_idx, last_idx in task:
+        schemas: Dict[VectorsSchema, int] = {}
+        schema_ids = []
+        rows = []
+        error = None
+
+        try:
+            vectors = _worker_rsp_file[profile_idx].vectors
+
+            # Types are still inferred from the first test vectors of the profile
+            vectors._position = first_idx
+
+            for _ in range(last_idx - first_idx):
+                test_vectors = next(vectors)
+                schema_ids.append(schemas.setdefault(test_vectors.schema, len(schemas)))
+                rows.append(test_vectors._values)
+
+        except RspParsingError as parsing_error:
+            error = parsing_error
+
+        results.append(([(schema.keys, schema.types) for schema in schemas], schema_ids, rows, error))
+
+        if error is not None:
+            break
+
+    return results
+
+
+def _get_schema(profile: Profile, keys: Tuple[str, ...], types: Tuple[str, ...]) -> VectorsSchema:
+    schema = profile._schemas.get(keys)
+
+    if schema is None:
+        for key, field_type in zip(keys, types):
+            if key not in profile.field_types:
+                profile.field_types[key] = field_type
+
+        schema = profile._schemas[keys] = VectorsSchema(keys)
+        schema.set_types(types, profile.field_types.decoders(keys))
+
+    return schema
+
+
+def parse_in_parallel(rsp_file: RspFile, workers: Optional[int] = None,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[Profile, TestVectors]]:
+    """
+    Parses the test vectors of the RSP file in a pool of processes, and yields them along
+    with their profile in the order of the file.
+
+    The index of the file, built once, gives the boundaries of every test vectors block:
+    profiles are split into chunks of at most chunk_size test vectors, which workers parse
+    independently. Only a few chunks are parsed ahead of the test vectors being yielded.
+
+    Errors are the same as when iterating over the profiles, they are raised once all the
+    test vectors preceding the faulty one have been yielded.
+    """
+
+    if rsp_file.zero_copy or rsp_file.lazy:
+        raise ValueError("Zero-copy and lazy modes can't be used with parallel parsing")
+
+    workers = workers or os.cpu_count() or 1
+    engine = next(name for name, engine_class in ENGINES.items() if isinstance(rsp_file._engine, engine_class))
+
+    if rsp_file.field_types is not None:
+        # Types shared by the whole file are inferred from the first profiles they appear in,
+        # they must be known before profiles are parsed out of order
+        for profile in rsp_file:
+            if len(profile.vectors):
+                profile.vectors._get_schema(profile.vectors._read_blocks(0, 1)[0])
+
+    profiles = rsp_file.profiles
+    tasks = iter(_plan_tasks(rsp_file.index, chunk_size))
+
+    # Fields of the first test vectors of every profile, the others must have the same
+    expected_keys = [None] * len(profiles)
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker,
+                             initargs=(rsp_file.path, rsp_file.member, engine, rsp_file.field_types,
+                                       rsp_file.strict, rsp_file.index)) as executor:
+
+        pending = deque((task, executor.submit(_parse_task, task))
+                        for task in _take(tasks, workers * _TASKS_AHEAD_PER_WORKER))
+
+        try:
+            while pending:
+                task, future = pending.popleft()
+                task_results = future.result()
+
+                for next_task in _take(tasks, 1):
+                    pending.append((next_task, executor.submit(_parse_task, next_task)))
+
+                for (profile_idx, _, _), (schemas_description, schema_ids, rows, error) in zip(task, task_results):
+                    profile = profiles[profile_idx]
+                    schemas = [_get_schema(profile, keys, types) for keys, types in schemas_description]
+
+                    # Each chunk has been checked on its own, they must also match each other
+                    if schemas and expected_keys[profile_idx] is None:
+                        expected_keys[profile_idx] = schemas[0].key_set
+
+                    elif schemas and schemas[0].key_set != expected_keys[profile_idx]:
+                        raise RspParsingError("Invalid test vector: fields inconsistency")
+
+                    for schema_id, values in zip(schema_ids, rows):
+                        yield profile, TestVectors(schemas[schema_id], values)
+
+                    if error is not None:
+                        raise error
+
+        finally:
+            # The caller may stop iterating early, tasks that have not started yet are dropped
+            for _, future in pending:
+                future.cancel()
+
+
+def _take(iterator: Iterator, count: int) -> list:
+    return [item for _, item in zip(range(count), iterator)]
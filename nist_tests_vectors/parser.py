@@ -1,10 +1,18 @@
 # coding: utf-8
 
-from typing import List, Set, Union, Iterator, Dict
-from io import TextIOWrapper
+from typing import List, Union, Iterator, Dict, Optional, Tuple, AbstractSet, Callable
 from dataclasses import dataclass
+from array import array
+from itertools import accumulate
 from collections.abc import Iterable
 
+from nist_tests_vectors.index import RspIndex, ProfileIndex
+from nist_tests_vectors.engines import ENGINES, Block, StreamEngine, is_stream
+from nist_tests_vectors.field_types import FieldTypes, HEXSTRING
+
+# Amount of test vectors blocks read at once when iterating over a profile
+_BLOCKS_BATCH_SIZE = 256
+
 
 class RspParsingError(Exception):
     """
@@ -13,9 +21,19 @@ class RspParsingError(Exception):
 
 @dataclass(frozen=True)
 class TestVector:
+    __slots__ = ("key", "value")
+
     key: str
     value: Union[int, bytearray]
 
+    # Slotted frozen dataclasses can't be unpickled nor deep copied by default, fields are assigned to
+    def __getstate__(self) -> tuple:
+        return self.key, self.value
+
+    def __setstate__(self, state: tuple) -> None:
+        object.__setattr__(self, "key", state[0])
+        object.__setattr__(self, "value", state[1])
+
     @staticmethod
     def parse_vector_value(value: str) -> Union[int, bytearray]:
         """
@@ -45,34 +63,201 @@ class TestVector:
             return bytearray.fromhex(value)
 
 
+class VectorsSchema:
+    """
+    Ordered field names of test vectors. A single instance is shared by all the test
+    vectors of a profile having the same fields, so that each of them only stores
+    its values.
+    """
+
+    __slots__ = ("keys", "key_set", "positions", "types", "decoders", "hex_ranks", "hex_count")
+
+    def __init__(self, keys: Tuple[str, ...]):
+        self.keys = keys
+        self.key_set = frozenset(keys)
+        self.positions: Dict[str, int] = {}
+
+        # Type and decoder of every field, set by the parser once they are known
+        self.types: Tuple[str, ...] = ()
+        self.decoders: tuple = ()
+
+        # Rank of every field among the hexstrings of the schema, -1 for other fields
+        self.hex_ranks: Tuple[int, ...] = ()
+        self.hex_count = 0
+
+        for position, key in enumerate(keys):
+            self.positions.setdefault(key, position)
+
+    def __repr__(self) -> str:
+        return f"VectorsSchema({self.keys})"
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def extended(self, key: str) -> "VectorsSchema":
+        return VectorsSchema(self.keys + (key,))
+
+    def projected(self, keys: Tuple[str, ...]) -> "VectorsSchema":
+        schema = VectorsSchema(keys)
+
+        try:
+            positions = [self.positions[key] for key in keys]
+        except KeyError as ke:
+            raise KeyError(f"Key {ke} not found") from None
+
+        if self.types:
+            schema.set_types(tuple(self.types[position] for position in positions),
+                             tuple(self.decoders[position] for position in positions))
+
+        return schema
+
+    def set_types(self, types: Tuple[str, ...], decoders: tuple) -> None:
+        self.types = types
+        self.decoders = decoders
+        self.hex_count = 0
+        hex_ranks = []
+
+        for field_type in types:
+            if field_type == HEXSTRING:
+                hex_ranks.append(self.hex_count)
+                self.hex_count += 1
+            else:
+                hex_ranks.append(-1)
+
+        self.hex_ranks = tuple(hex_ranks)
+
+
+_EMPTY_SCHEMA = VectorsSchema(())
+
+
 class TestVectors(Iterable):
     """
+    Values of a test vectors block, keyed by the fields of its schema.
+    TestVector objects are only created when iterating.
     """
 
-    def __init__(self):
-        self._test_vectors: List[TestVector] = []
+    __slots__ = ("_schema", "_values")
+
+    def __init__(self, schema: VectorsSchema = _EMPTY_SCHEMA, values: Optional[list] = None):
+        self._schema = schema
+        self._values = values if values is not None else []
 
-    def keys(self) -> Set[str]:
-        return set([v.key for v in self._test_vectors])
+    @property
+    def schema(self) -> VectorsSchema:
+        return self._schema
+
+    def keys(self) -> AbstractSet[str]:
+        return self._schema.key_set
 
     def __iter__(self) -> Iterator[TestVector]:
-        return self._test_vectors.__iter__()
+        return map(TestVector, self._schema.keys, self._values)
 
     def __dict__(self) -> Dict[str, Union[str, int, bytearray]]:
-        return {vec.key: vec.value for vec in self._test_vectors}
+        return dict(zip(self._schema.keys, self._values))
 
     def __getitem__(self, key: str):
-        for vec in self._test_vectors:
-            if vec.key == key:
-                return vec.value
+        try:
+            return self._values[self._schema.positions[key]]
+        except KeyError:
+            raise KeyError(f"Key '{key}' not found") from None
+
+    def __len__(self):
+        return len(self._values)
+
+    def append(self, item: TestVector):
+        # The schema may be shared with other test vectors, it must not be modified
+        self._schema = self._schema.extended(item.key)
+        self._values.append(item.value)
+
+
+class _DeferredTestVectors(TestVectors):
+    """
+    Test vectors whose values are only made available on access, subclasses
+    implement _value to retrieve the value of a field given its position.
+    """
+
+    __slots__ = ()
+
+    def _value(self, position: int):
+        raise NotImplementedError
+
+    def _detach(self) -> None:
+        raise NotImplementedError
+
+    def __iter__(self) -> Iterator[TestVector]:
+        return map(TestVector, self._schema.keys, map(self._value, range(len(self._schema))))
+
+    def __dict__(self) -> Dict[str, Union[str, int, bytearray, memoryview]]:
+        return dict(zip(self._schema.keys, map(self._value, range(len(self._schema)))))
 
-        raise KeyError(f"Key '{key}' not found")
+    def __getitem__(self, key: str):
+        try:
+            return self._value(self._schema.positions[key])
+        except KeyError:
+            raise KeyError(f"Key '{key}' not found") from None
 
     def __len__(self):
-        return len(self._test_vectors)
+        return len(self._schema)
 
     def append(self, item: TestVector):
-        self._test_vectors.append(item)
+        # The new schema is not typed, all the values must be made available beforehand
+        self._values = [self._value(position) for position in range(len(self._schema))]
+        self._detach()
+        super().append(item)
+
+
+class BufferTestVectors(_DeferredTestVectors):
+    """
+    Test vectors whose hexstrings are stored in a buffer shared with the other test
+    vectors decoded at the same time. Slices of the buffer are only created on access.
+    """
+
+    __slots__ = ("_buffer", "_bounds", "_first_hex_value")
+
+    def __init__(self, schema: VectorsSchema, values: list, buffer: Optional[memoryview], bounds: array,
+                 first_hex_value: int):
+        super().__init__(schema, values)
+        self._buffer = buffer
+        self._bounds = bounds
+        self._first_hex_value = first_hex_value
+
+    def _value(self, position: int):
+        rank = self._schema.hex_ranks[position] if self._buffer is not None else -1
+
+        if rank < 0:
+            return self._values[position]
+
+        hex_value = self._first_hex_value + rank
+        return self._buffer[self._bounds[hex_value]:self._bounds[hex_value + 1]]
+
+    def _detach(self) -> None:
+        self._buffer = None
+
+
+class LazyTestVectors(_DeferredTestVectors):
+    """
+    Test vectors holding the raw text of their values, each of them is decoded
+    on first access and the result is kept.
+    """
+
+    __slots__ = ("_profile",)
+
+    def __init__(self, schema: VectorsSchema, raw_values: List[str], profile: "Profile"):
+        super().__init__(schema, raw_values)
+        self._profile = profile
+
+    def _value(self, position: int):
+        value = self._values[position]
+
+        # Decoded values are never strings
+        if self._profile is not None and type(value) is str:
+            value = self._profile._decode_value(self._schema.keys[position], self._schema.decoders[position], value)
+            self._values[position] = value
+
+        return value
+
+    def _detach(self) -> None:
+        self._profile = None
 
 
 class TestVectorsIterator:
@@ -80,80 +265,255 @@ class TestVectorsIterator:
     """
     """
 
-    def __init__(self, rsp_fd: TextIOWrapper):
-        self._rsp_fd = rsp_fd
+    def __init__(self, profile: "Profile"):
+        self._profile = profile
+        self._engine = profile._engine
+        self._profile_index = profile._profile_index
+        self._vector_offsets = self._profile_index.vector_offsets
+        self._position = 0
+
+        # Blocks are read by batches, which lets the engine split many of them at once
+        self._pending_blocks: List[Block] = []
+        self._pending_start = 0
+        self._pending_position = 0
+
+        # In zero-copy mode, whole batches are decoded at once
+        self._pending_vectors: List[TestVectors] = []
 
         # Not that much of an overhead and allows us to detect missing fields in vectors
-        self._expected_fields: Set[str] = set()
+        self._expected_schema: Optional[VectorsSchema] = None
 
     def __iter__(self):
         return self
 
     def __next__(self) -> TestVectors:
-        vectors = self._read_vectors()
-        vectors_keys = vectors.keys()
+        if self._pending_position >= len(self._pending_blocks):
+            if self._position >= len(self._vector_offsets):
+                raise StopIteration
 
-        if not self._expected_fields:
-            self._expected_fields = vectors_keys
+            batch_end = min(self._position + _BLOCKS_BATCH_SIZE, len(self._vector_offsets))
+            self._pending_blocks = self._read_blocks(self._position, batch_end)
+            self._pending_start = self._position
+            self._pending_position = 0
 
-        elif vectors_keys != self._expected_fields:
+            if self._profile.zero_copy:
+                self._pending_vectors = self._build_vectors_in_bulk(self._pending_blocks)
+
+        if self._profile.zero_copy:
+            vectors = self._pending_vectors[self._pending_position]
+        else:
+            vectors = self._build_vectors(self._pending_blocks[self._pending_position])
+
+        self._pending_position += 1
+        self._position += 1
+
+        if self._expected_schema is None:
+            self._expected_schema = vectors.schema
+
+        # Schemas are shared, comparing the fields is only needed when they differ
+        elif vectors.schema is not self._expected_schema and vectors.keys() != self._expected_schema.key_set:
             raise RspParsingError("Invalid test vector: fields inconsistency")
 
         return vectors
 
-    def _read_vectors(self) -> TestVectors:
-        vectors = TestVectors()
+    def __len__(self) -> int:
+        return len(self._vector_offsets)
+
+    def __getitem__(self, vectors_idx: Union[int, slice]) -> Union[TestVectors, List[TestVectors]]:
+        """
+        Random access to the test vectors of the profile, only the requested
+        blocks are read thanks to the index.
+        """
+
+        if isinstance(vectors_idx, slice):
+            return [self[i] for i in range(len(self._vector_offsets))[vectors_idx]]
+
+        if vectors_idx < 0:
+            vectors_idx += len(self._vector_offsets)
+
+        if not 0 <= vectors_idx < len(self._vector_offsets):
+            raise IndexError("Test vectors index out of range")
+
+        block = self._read_blocks(vectors_idx, vectors_idx + 1)[0]
+
+        if self._profile.zero_copy:
+            return self._build_vectors_in_bulk([block])[0]
+
+        return self._build_vectors(block)
+
+    def _read_blocks(self, first_idx: int, last_idx: int) -> List[Block]:
+        if last_idx < len(self._vector_offsets):
+            end = self._vector_offsets[last_idx]
+        else:
+            end = self._profile_index.end_offset
+
+        return self._engine.read_blocks(self._vector_offsets[first_idx:last_idx], end)
 
-        line = self._rsp_fd.readline()
+    def _get_schema(self, block: Block) -> VectorsSchema:
+        keys = tuple(block[0])
+        schema = self._profile._schemas.get(keys)
 
-        # Skip potentially empty lines
-        while line == "\n":
-            line = self._rsp_fd.readline()
+        if schema is None:
+            schema = VectorsSchema(keys)
 
-        # End of file
-        if not line:
-            raise StopIteration
+            # Duplicates only have to be looked for once per schema
+            if len(schema.positions) != len(keys):
+                duplicated_key = next(key for key in keys if keys.count(key) > 1)
+                raise RspParsingError(f"Duplicated key: {duplicated_key}")
 
-        # Beginning of new profile detected = must stop iterating
-        if line.startswith("["):
-            # Cancel the reading of this line so that it can be 
-            # parsed by the ProfileIterator instead
-            self._rsp_fd.seek(self._rsp_fd.tell() - len(line) - 1)
-            raise StopIteration
+            field_types = self._profile.field_types
+            untyped_keys = [key for key in keys if key not in field_types]
 
-        # Keep reading lines while there's data to parse
-        while line and line != "\n" and not line.startswith("["):
-            key, value = line.split("=")
-            key = key.strip()
-            value = value.strip()
+            if untyped_keys:
+                field_types.infer(self._sample_values(untyped_keys, block))
 
-            if key in vectors.keys():
-                raise RspParsingError(f"Duplicated key: {key}")
+            schema.set_types(tuple(field_types[key] for key in keys), field_types.decoders(keys))
+            self._profile._schemas[keys] = schema
 
+        return schema
+
+    def _sample_values(self, keys: List[str], block: Block) -> Dict[str, List[str]]:
+        """
+        Returns the values of the given fields in the first test vectors of the profile
+        and in the given block, which may come later.
+        """
+
+        sample_size = self._profile.field_types.sample_size
+
+        if self._pending_blocks and self._pending_start == 0:
+            sample_blocks = self._pending_blocks[:sample_size]
+        else:
+            sample_blocks = self._read_blocks(0, min(sample_size, len(self._vector_offsets)))
+
+        samples: Dict[str, List[str]] = {key: [] for key in keys}
+
+        for block_keys, block_values in sample_blocks + [block]:
+            for key, value in zip(block_keys, block_values):
+                if key in samples:
+                    samples[key].append(value)
+
+        return samples
+
+    def _build_vectors(self, block: Block) -> TestVectors:
+        schema = self._get_schema(block)
+
+        if self._profile.lazy:
+            return LazyTestVectors(schema, list(block[1]), self._profile)
+
+        try:
+            values = [decode(value) for decode, value in zip(schema.decoders, block[1])]
+        except ValueError:
+            values = self._decode_mismatching_values(schema, block[1])
+
+        return TestVectors(schema, values)
+
+    def _build_vectors_in_bulk(self, blocks: List[Block]) -> List[TestVectors]:
+        """
+        Decodes all the hexstrings of the given blocks into a single buffer, test vectors
+        then expose read-only memoryview slices of it instead of owning bytearray objects.
+        """
+
+        schemas = [self._get_schema(block) for block in blocks]
+        hex_values = [
+            value
+            for schema, (_, raw_values) in zip(schemas, blocks)
+            for rank, value in zip(schema.hex_ranks, raw_values)
+            if rank >= 0
+        ]
+
+        # Odd-length values would be silently merged with the next ones
+        if any(len(value) & 1 for value in hex_values):
+            return [self._build_vectors(block) for block in blocks]
+
+        try:
+            buffer = memoryview(bytes.fromhex("".join(hex_values)))
+        except ValueError:
+            return [self._build_vectors(block) for block in blocks]
+
+        bounds = array("Q", [0])
+        bounds.extend(accumulate(len(value) >> 1 for value in hex_values))
+
+        # Whitespaces within a value are ignored by fromhex but would shift all the slices
+        if bounds[-1] != len(buffer):
+            return [self._build_vectors(block) for block in blocks]
+
+        all_vectors: List[TestVectors] = []
+        first_hex_value = 0
+
+        for schema, block in zip(schemas, blocks):
             try:
-                value = TestVector.parse_vector_value(value)
+                values = [
+                    None if rank >= 0 else decode(value)
+                    for rank, decode, value in zip(schema.hex_ranks, schema.decoders, block[1])
+                ]
+                all_vectors.append(BufferTestVectors(schema, values, buffer, bounds, first_hex_value))
+
             except ValueError:
-                raise RspParsingError(f"Expected integer or hexstring, got: {value}") from None
+                # A mismatching integer, the block is decoded the regular way
+                all_vectors.append(self._build_vectors(block))
 
-            vectors.append(TestVector(key, value))
-            line = self._rsp_fd.readline()
+            first_hex_value += schema.hex_count
 
-        # Beginning of new profile detected = we will stop iterating next call
-        # But we must still return the vector we parsed
-        if line.startswith("["):
-            # Cancel the reading of this line
-            self._rsp_fd.seek(self._rsp_fd.tell() - len(line) - 1)
+        return all_vectors
 
-        return vectors
+    def _select(self, where: Optional[Callable[[TestVectors], bool]],
+                fields: Optional[Tuple[str, ...]]) -> Iterator[TestVectors]:
+        """
+        Yields the test vectors of the profile matching where, only decoding the values
+        accessed by where and the given fields, which are the only fields of the yielded
+        test vectors. Without fields, test vectors keep decoding values on access.
+        """
+
+        # Shared by all the yielded test vectors, keyed by the schema they are projected from
+        projected_schemas: Dict[VectorsSchema, VectorsSchema] = {}
+
+        for batch_start in range(0, len(self._vector_offsets), _BLOCKS_BATCH_SIZE):
+            batch_end = min(batch_start + _BLOCKS_BATCH_SIZE, len(self._vector_offsets))
+
+            for block in self._read_blocks(batch_start, batch_end):
+                vectors = LazyTestVectors(self._get_schema(block), list(block[1]), self._profile)
+
+                if where is not None and not where(vectors):
+                    continue
+
+                if fields is None:
+                    yield vectors
+                    continue
+
+                schema = projected_schemas.get(vectors.schema)
+
+                if schema is None:
+                    schema = projected_schemas[vectors.schema] = vectors.schema.projected(fields)
+
+                yield TestVectors(schema, [vectors[key] for key in fields])
+
+    def _decode_mismatching_values(self, schema: VectorsSchema, raw_values: List[str]) -> list:
+        """
+        Decodes values one by one when at least one of them does not match the type of its field.
+        """
+
+        return [
+            self._profile._decode_value(key, decode, value)
+            for key, decode, value in zip(schema.keys, schema.decoders, raw_values)
+        ]
 
 class Profile:
 
     """
     """
 
-    def __init__(self, rsp_fd: TextIOWrapper):
-        self._rsp_fd = rsp_fd
-        self._file_ptr_after_profile: int
+    def __init__(self, engine, profile_index: ProfileIndex, field_types: FieldTypes, strict: bool = False,
+                 zero_copy: bool = False, lazy: bool = False):
+        self._engine = engine
+        self._profile_index = profile_index
+
+        self.field_types = field_types
+        self.strict = strict
+        self.zero_copy = zero_copy
+        self.lazy = lazy
+
+        # Shared by all the test vectors of the profile, keyed by their ordered fields
+        self._schemas: Dict[Tuple[str, ...], VectorsSchema] = {}
 
         self.attributes: Dict[str, Union[str, int, bytearray]]
         self._read_profile_attributes()
@@ -170,19 +530,12 @@ class Profile:
     """
     def _read_profile_attributes(self) -> None:
         self.attributes = {}
-        line = self._rsp_fd.readline()
 
-        # Keep reading lines until we find a profile
-        while line and not line.startswith("["):
-            line = self._rsp_fd.readline()
-
-        # End of file
-        if not line:
-            raise StopIteration
+        header = self._engine.read(self._profile_index.header_offset, self._profile_index.vectors_offset)
 
         # Parse the profile
-        while line.startswith("["):
-            tokens = line[1:-2].split("=")
+        for line in header.decode("utf-8").splitlines():
+            tokens = line.strip()[1:-1].split("=")
 
             if len(tokens) == 0 or len(tokens) > 2:
                 raise RspParsingError(f"Invalid profile attribute: {tokens}")
@@ -195,18 +548,27 @@ class Profile:
 
             self.attributes[key] = value
 
-            line = self._rsp_fd.readline()
 
-        self._file_ptr_after_profile = self._rsp_fd.tell() - len(line) - 1
+    def _decode_value(self, key: str, decode: Callable, value: str) -> Union[int, bytearray]:
+        """
+        Decodes a value with the decoder of its field. Values that do not match the type
+        of their field are reported in strict mode, their type is guessed otherwise.
+        """
 
-        # Cancel the reading of the last line as its processing does not belong here
-        self._rsp_fd.seek(self._file_ptr_after_profile)
+        try:
+            return decode(value)
+        except ValueError:
+            if self.strict:
+                raise RspParsingError(f"Expected {self.field_types[key]} for '{key}', got: {value}") from None
 
+        try:
+            return TestVector.parse_vector_value(value)
+        except ValueError:
+            raise RspParsingError(f"Expected integer or hexstring, got: {value}") from None
 
     @property
     def vectors(self) -> TestVectorsIterator:
-        self._rsp_fd.seek(self._file_ptr_after_profile)
-        return TestVectorsIterator(self._rsp_fd)
+        return TestVectorsIterator(self)
 
 
 class RspFile:
@@ -214,21 +576,84 @@ class RspFile:
     """
     """
 
-    def __init__(self, path: str):
+    def __init__(self, path: str, sidecar_index: bool = False, engine: str = "file",
+                 field_types: Union[FieldTypes, Dict[str, str], str, None] = None,
+                 type_inference: str = "profile", strict: bool = False, zero_copy: bool = False,
+                 lazy: bool = False, member: Optional[str] = None):
+        """
+        When sidecar_index is True, the byte offsets index of the file is persisted
+        next to it so that subsequent opens do not have to scan the file again.
+
+        The engine is either "file", which reads the file line by line, or "mmap",
+        which maps the file in memory and is faster on large files.
+
+        Zip and tar archives, along with gzip, xz and bz2 compressed files, are read
+        without being extracted by the "stream" engine, whatever the given engine.
+        The member of the archive to read is only needed when it holds several RSP files.
+
+        The type of every field is inferred from the first test vectors of each profile,
+        or of the file when type_inference is "file". Known types can be given with
+        field_types, either directly or as the path of a file saved with FieldTypes.save,
+        they then apply to the whole file. In strict mode, values that do not match the
+        type of their field raise an RspParsingError instead of having their type guessed.
+
+        With zero_copy, hexstrings are read-only memoryview slices of a buffer shared by
+        the test vectors read together, rather than separate bytearray objects. Whole
+        batches of test vectors are then decoded at once.
+
+        With lazy, values are kept as raw text and only decoded on first access, which
+        suits jobs reading a few fields only. Invalid values are then reported when
+        they are accessed rather than when the test vectors are read.
+        """
         self.path = path
 
         self.metadata: List[str]
 
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown parser engine '{engine}', expected one of: {', '.join(ENGINES)}")
+
+        if zero_copy and lazy:
+            raise ValueError("Zero-copy and lazy modes can't be used together")
+
+        if type_inference not in ("profile", "file"):
+            raise ValueError(f"Unknown type inference '{type_inference}', expected 'profile' or 'file'")
+
+        if isinstance(field_types, str):
+            field_types = FieldTypes.load(field_types)
+
+        elif isinstance(field_types, dict):
+            field_types = FieldTypes(field_types)
+
+        elif field_types is None and type_inference == "file":
+            field_types = FieldTypes()
+
+        # Field types shared by all the profiles, None when inferred per profile
+        self.field_types: Optional[FieldTypes] = field_types
+        self.strict = strict
+        self.zero_copy = zero_copy
+        self.lazy = lazy
+
         # Private attributes
-        self._rsp_fd: TextIOWrapper
-        self._file_ptr_after_metadata: int
+        self._sidecar_index = sidecar_index
+        self._index: Optional[RspIndex] = None
+        # Profiles read so far, in file order
+        self._profiles: List[Profile] = []
+
+        # Iterator followed by next(rsp_file)
+        self._profiles_iterator: Optional[Iterator[Profile]] = None
+
+        if is_stream(path, member):
+            self._engine = StreamEngine(path, member)
+        else:
+            self._engine = ENGINES[engine](self.path)
 
-        self._rsp_fd = open(self.path, "r")
-        self._read_meta_data()
+        # Member of the archive being read, None for regular RSP files
+        self.member: Optional[str] = getattr(self._engine, "member", member)
+        self.metadata = self._engine.read_metadata()
 
     def close(self):
-        if self._rsp_fd:
-            self._rsp_fd.close()
+        if self._engine:
+            self._engine.close()
 
     def __enter__(self):
         return self
@@ -236,37 +661,80 @@ class RspFile:
     def __exit__(self, *_):
         self.close()
 
-    def __iter__(self):
-        # Set file pointer after the metadata
-        self._rsp_fd.seek(self._file_ptr_after_metadata)
-        return self
+    def __iter__(self) -> Iterator[Profile]:
+        # Restarts next(rsp_file) from the first profile as well
+        self._profiles_iterator = self._iter_profiles()
+        return self._profiles_iterator
+
+    def __next__(self) -> Profile:
+        if self._profiles_iterator is None:
+            self._profiles_iterator = self._iter_profiles()
+
+        return next(self._profiles_iterator)
+
+    def _iter_profiles(self) -> Iterator[Profile]:
+        # Profiles are only read as they are iterated over, and kept for subsequent iterations
+        for profile_idx, profile_index in enumerate(self.index.profiles):
+            if profile_idx == len(self._profiles):
+                self._profiles.append(self._new_profile(profile_index))
 
-    def __next__(self):
-        return Profile(self._rsp_fd)
+            yield self._profiles[profile_idx]
 
-    def _read_meta_data(self, existing_metadata=None):
-        self.metadata = existing_metadata or []
+    def __len__(self) -> int:
+        return len(self.index)
 
-        line = self._rsp_fd.readline()
+    def __getitem__(self, profile_idx: int) -> Profile:
+        return self.profiles[profile_idx]
 
-        while line.startswith("#"):
-            self.metadata.append(line[1:].strip())
-            line = self._rsp_fd.readline()
+    def select(self, profile: Union[Dict[str, str], Callable[[Dict[str, str]], bool], None] = None,
+               where: Optional[Callable[[TestVectors], bool]] = None,
+               fields: Optional[List[str]] = None) -> Iterator[Tuple[Profile, TestVectors]]:
+        """
+        Lazily yields the test vectors matching the given predicates, along with their profile.
+
+        The profile predicate is either the expected values of some attributes or a function
+        taking the attributes. It is evaluated on the header of the profiles only, the test
+        vectors of the other profiles are never read.
 
-        # Skip potentially empty lines
-        while line == "\n":
-            line = self._rsp_fd.readline()
+        Values of the test vectors are kept as raw text and only the ones accessed by where
+        are decoded. When fields are given, yielded test vectors only hold these fields, the
+        values of the other ones are never decoded.
+        """
 
-        if line.startswith("#"):
-            # Metadata is divided into multiple chunks, recursive call
-            return self._read_meta_data(self.metadata)
+        projected_fields = tuple(fields) if fields is not None else None
 
-        self._file_ptr_after_metadata = self._rsp_fd.tell() - len(line) - 1
+        for current_profile in self:
+            if _profile_matches(profile, current_profile.attributes):
+                for test_vectors in current_profile.vectors._select(where, projected_fields):
+                    yield current_profile, test_vectors
+
+    @property
+    def index(self) -> RspIndex:
+        if self._index is None:
+            self._index = self._engine.build_index(self._sidecar_index)
 
-        # Cancel the reading of the last line to let the iterators parse it instead
-        self._rsp_fd.seek(self._file_ptr_after_metadata)
+        return self._index
 
     @property
     def profiles(self) -> List[Profile]:
-        return [p for p in self]
+        if len(self._profiles) < len(self.index.profiles):
+            self._profiles.extend(self._new_profile(profile_index)
+                                  for profile_index in self.index.profiles[len(self._profiles):])
+
+        return self._profiles
+
+    def _new_profile(self, profile_index: ProfileIndex) -> Profile:
+        return Profile(self._engine, profile_index,
+                       FieldTypes() if self.field_types is None else self.field_types,
+                       self.strict, self.zero_copy, self.lazy)
+
+
+def _profile_matches(predicate: Union[Dict[str, str], Callable[[Dict[str, str]], bool], None],
+                     attributes: Dict[str, str]) -> bool:
+    if predicate is None:
+        return True
+
+    if callable(predicate):
+        return predicate(attributes)
 
+    return all(key in attributes and attributes[key] == str(value) for key, value in predicate.items())
@@ -0,0 +1,324 @@
+# coding: utf-8
+
+import sys
+import mmap
+import json
+import shutil
+import struct
+import tempfile
+from array import array
+from typing import List, Union, Iterator, Dict, Optional
+
+from nist_tests_vectors.parser import RspFile, TestVectors, VectorsSchema, _DeferredTestVectors
+from nist_tests_vectors.field_types import FieldTypes, DECODERS, INTEGER, HEXSTRING
+
+STORE_EXTENSION = ".ntvb"
+
+_MAGIC = b"NTVB"
+
+# Bump whenever the layout of the file changes, older files can't be read anymore
+_STORE_VERSION = 1
+
+# Magic, version, then offset and size of the data section, offset of the tables
+# section and offset and size of the catalog
+_HEADER = struct.Struct("<4sI5Q")
+
+# The data section starts on a page boundary, tables are aligned on 8 bytes and
+# their cells are little-endian, whatever the byte order of the host
+_DATA_ALIGNMENT = 4096
+_TABLES_ALIGNMENT = 8
+
+# Size of a stored value, replaces the size of byte arrays for integers
+_INTEGER_MARK = 2**64 - 1
+
+# Amount of cells of a table buffered before being written
+_TABLE_CHUNK_SIZE = 1 << 16
+
+
+def _padding(offset: int, alignment: int) -> bytes:
+    return bytes(-offset % alignment)
+
+
+def write_store(rsp_file: Union[RspFile, "RspStore"], output_fd) -> None:
+    """
+    Writes the content of an RSP file in the NTVB format to a binary file object.
+
+    The file starts with a fixed-size header, followed by the data section holding the
+    raw bytes of every byte array, then by the tables section and by a JSON catalog.
+    The catalog holds the metadata of the file along with the attributes, the fields
+    and the table of every profile. A table is made of one row of fixed size per test
+    vectors, each field of the profile taking two 64-bit cells: the offset of a byte
+    array in the data section and its size, or the value of an integer and a mark.
+    """
+
+    output_fd.write(bytes(_DATA_ALIGNMENT))
+    data_size = 0
+    catalog_profiles = []
+
+    # Tables are only known once all the data has been written, they are kept aside
+    with tempfile.TemporaryFile() as tables_fd:
+        for profile in rsp_file:
+            keys: Optional[tuple] = None
+            types: List[str] = []
+            vectors_count = 0
+            cells = array("Q")
+            table_offset = tables_fd.tell()
+
+            for test_vectors in profile.vectors:
+                items = test_vectors.__dict__()
+
+                if keys is None:
+                    keys = tuple(items)
+                    types = [INTEGER if isinstance(value, int) else HEXSTRING for value in items.values()]
+
+                elif tuple(items) != keys:
+                    raise ValueError(f"Inconsistent fields in profile {profile.attributes}")
+
+                for value in items.values():
+                    if isinstance(value, int):
+                        if not 0 <= value < _INTEGER_MARK:
+                            raise ValueError(f"Integer can't be stored: {value}")
+
+                        cells.append(value)
+                        cells.append(_INTEGER_MARK)
+
+                    else:
+                        cells.append(data_size)
+                        cells.append(len(value))
+                        output_fd.write(value)
+                        data_size += len(value)
+
+                vectors_count += 1
+
+                if len(cells) >= _TABLE_CHUNK_SIZE:
+                    _write_cells(cells, tables_fd)
+                    cells = array("Q")
+
+            _write_cells(cells, tables_fd)
+
+            catalog_profiles.append({
+                "attributes": profile.attributes,
+                "keys": list(keys or ()),
+                "types": types,
+                "vectors_count": vectors_count,
+                "table_offset": table_offset
+            })
+
+        output_fd.write(_padding(data_size, _TABLES_ALIGNMENT))
+        tables_offset = _DATA_ALIGNMENT + data_size + len(_padding(data_size, _TABLES_ALIGNMENT))
+
+        tables_fd.seek(0)
+        shutil.copyfileobj(tables_fd, output_fd)
+        catalog_offset = tables_offset + tables_fd.tell()
+
+    catalog = json.dumps({"metadata": rsp_file.metadata, "profiles": catalog_profiles}).encode("utf-8")
+    output_fd.write(catalog)
+
+    output_fd.seek(0)
+    output_fd.write(_HEADER.pack(_MAGIC, _STORE_VERSION, _DATA_ALIGNMENT, data_size, tables_offset,
+                                 catalog_offset, len(catalog)))
+
+
+def _write_cells(cells: array, tables_fd) -> None:
+    if sys.byteorder == "big":
+        cells.byteswap()
+
+    cells.tofile(tables_fd)
+
+
+class StoredTestVectors(_DeferredTestVectors):
+    """
+    Test vectors read from a row of a table of an NTVB file, values are only read
+    from the mapping on access.
+    """
+
+    __slots__ = ("_row", "_data", "_zero_copy")
+
+    def __init__(self, schema: VectorsSchema, row: memoryview, data: memoryview, zero_copy: bool):
+        super().__init__(schema)
+        self._row = row
+        self._data = data
+        self._zero_copy = zero_copy
+
+    def _value(self, position: int):
+        if self._row is None:
+            return self._values[position]
+
+        value = self._row[2 * position]
+        size = self._row[2 * position + 1]
+
+        if size == _INTEGER_MARK:
+            return value
+
+        view = self._data[value:value + size]
+        return view if self._zero_copy else bytearray(view)
+
+    def _detach(self) -> None:
+        self._row = None
+        self._data = None
+
+
+class StoredVectorsIterator:
+
+    """
+    Iterates over the test vectors of a profile of an NTVB file, any of them can be
+    accessed directly as rows have a fixed size.
+    """
+
+    def __init__(self, profile: "StoredProfile"):
+        self._profile = profile
+        self._position = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> TestVectors:
+        if self._position >= self._profile.vectors_count:
+            raise StopIteration
+
+        self._position += 1
+        return self._profile._read_vectors(self._position - 1)
+
+    def __len__(self) -> int:
+        return self._profile.vectors_count
+
+    def __getitem__(self, vectors_idx: Union[int, slice]) -> Union[TestVectors, List[TestVectors]]:
+        if isinstance(vectors_idx, slice):
+            return [self._profile._read_vectors(idx) for idx in range(*vectors_idx.indices(len(self)))]
+
+        if vectors_idx < 0:
+            vectors_idx += len(self)
+
+        if not 0 <= vectors_idx < len(self):
+            raise IndexError("Test vectors index out of range")
+
+        return self._profile._read_vectors(vectors_idx)
+
+
+class StoredProfile:
+
+    """
+    Profile of an NTVB file, it exposes the same attributes as a Profile of an RSP file.
+    """
+
+    def __init__(self, store: "RspStore", catalog_profile: dict):
+        self._store = store
+        self.attributes: Dict[str, str] = catalog_profile["attributes"]
+        self.vectors_count: int = catalog_profile["vectors_count"]
+        self.field_types = FieldTypes(dict(zip(catalog_profile["keys"], catalog_profile["types"])))
+
+        self._schema = store._get_schema(tuple(catalog_profile["keys"]), tuple(catalog_profile["types"]))
+
+        self._row_size = 2 * len(self._schema)
+        first_cell = catalog_profile["table_offset"] // 8
+        self._table = store._cells[first_cell:first_cell + self.vectors_count * self._row_size]
+
+    def __repr__(self) -> str:
+        return f"StoredProfile({self.attributes})"
+
+    def _read_vectors(self, vectors_idx: int) -> TestVectors:
+        row = self._table[vectors_idx * self._row_size:(vectors_idx + 1) * self._row_size]
+        return StoredTestVectors(self._schema, row, self._store._data, self._store.zero_copy)
+
+    @property
+    def vectors(self) -> StoredVectorsIterator:
+        return StoredVectorsIterator(self)
+
+
+class RspStore:
+
+    """
+    Reader of NTVB files, it exposes the same API as RspFile.
+
+    The file is mapped in memory and nothing but its small catalog is decoded when
+    opening it, test vectors are read from the mapping on access. Processes reading
+    the same file share its pages through the page cache.
+
+    With zero_copy, byte arrays are read-only memoryview slices of the mapping rather
+    than bytearray copies. The file can only be unmapped once all of them are released.
+    """
+
+    def __init__(self, path: str, zero_copy: bool = False):
+        self.path = path
+        self.zero_copy = zero_copy
+
+        with open(path, "rb") as store_fd:
+            self._buffer = mmap.mmap(store_fd.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version, data_offset, data_size, tables_offset, catalog_offset, catalog_size = \
+                _HEADER.unpack_from(self._buffer)
+        except struct.error:
+            magic = version = None
+
+        if magic != _MAGIC:
+            self._buffer.close()
+            raise ValueError(f"'{path}' is not an NTVB file")
+
+        if version != _STORE_VERSION:
+            self._buffer.close()
+            raise ValueError(f"Unsupported NTVB version: {version}")
+
+        view = memoryview(self._buffer)
+        self._data = view[data_offset:data_offset + data_size]
+        self._cells = view[tables_offset:catalog_offset].cast("Q")
+
+        if sys.byteorder == "big":
+            # Cells are read from a byteswapped copy of the tables rather than from the mapping
+            self._cells.release()
+            cells = array("Q")
+            cells.frombytes(view[tables_offset:catalog_offset])
+            cells.byteswap()
+            self._cells = memoryview(cells)
+
+        catalog = json.loads(self._buffer[catalog_offset:catalog_offset + catalog_size])
+        self.metadata: List[str] = catalog["metadata"]
+        self._catalog_profiles: List[dict] = catalog["profiles"]
+        self._profiles: Optional[List[StoredProfile]] = None
+
+        # Shared by all the profiles having the same fields
+        self._schemas: Dict[tuple, VectorsSchema] = {}
+
+    def close(self):
+        for profile in self._profiles or []:
+            profile._table.release()
+
+        self._data.release()
+        self._cells.release()
+
+        try:
+            self._buffer.close()
+        except BufferError:
+            # Zero-copy values are still alive, the mapping is closed along with them
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def __iter__(self) -> Iterator[StoredProfile]:
+        return iter(self.profiles)
+
+    def __len__(self) -> int:
+        return len(self._catalog_profiles)
+
+    def __getitem__(self, profile_idx: int) -> StoredProfile:
+        return self.profiles[profile_idx]
+
+    def _get_schema(self, keys: tuple, types: tuple) -> VectorsSchema:
+        schema = self._schemas.get((keys, types))
+
+        if schema is None:
+            schema = self._schemas[(keys, types)] = VectorsSchema(keys)
+            schema.set_types(types, tuple(DECODERS[field_type] for field_type in types))
+
+        return schema
+
+    @property
+    def profiles(self) -> List[StoredProfile]:
+        if self._profiles is None:
+            self._profiles = [StoredProfile(self, catalog_profile) for catalog_profile in self._catalog_profiles]
+
+        return self._profiles
@@ -17,7 +17,7 @@ setup(
     author='ShellCode',
     author_email='shellcode33@protonmail.ch',
     url='https://github.com/ShellCode33/NIST-Test-Vectors',
-    packages=find_packages(),
+    packages=find_packages(exclude=["tests", "benchmarks"]),
     python_requires='>=3.6',
 
     classifiers=[
@@ -33,6 +33,10 @@ setup(
         "jinja2"
     ],
 
+    extras_require={
+        "numpy": ["numpy"]
+    },
+
     entry_points={
         "console_scripts": [
             "nist-tv = nist_tests_vectors.cli:main",
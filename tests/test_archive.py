@@ -0,0 +1,96 @@
+# coding: utf-8
+
+import os
+import bz2
+import gzip
+import lzma
+import shutil
+import tarfile
+import zipfile
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+
+from nist_tests_vectors import RspFile, RspArchive
+
+THIS_SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+
+RSP_FILES = ["XTSGenAES128.rsp", "KDFFeedback_gen.rsp", "unusual_format_but_still_valid.rsp"]
+
+
+def _read_all(rsp_file: RspFile) -> list:
+    return [
+        (profile.attributes, [test_vectors.__dict__() for test_vectors in profile.vectors])
+        for profile in rsp_file
+    ]
+
+
+def _read_expected(rsp_name: str) -> list:
+    with RspFile(f"{THIS_SCRIPT_DIR}/data/{rsp_name}") as rsp_file:
+        return [rsp_file.metadata, _read_all(rsp_file)]
+
+
+class TestArchives(TestCase):
+
+    def test_compressed_files(self):
+        with TemporaryDirectory() as tmp_dir:
+            for rsp_name in RSP_FILES:
+                expected = _read_expected(rsp_name)
+
+                # Fastest compression levels, the tests are about reading
+                for extension, open_compressed in ((".gz", lambda path: gzip.open(path, "wb", compresslevel=1)),
+                                                   (".xz", lambda path: lzma.open(path, "wb", preset=0)),
+                                                   (".bz2", lambda path: bz2.open(path, "wb", compresslevel=1))):
+                    compressed_path = f"{tmp_dir}/{rsp_name}{extension}"
+
+                    with open(f"{THIS_SCRIPT_DIR}/data/{rsp_name}", "rb") as in_fd, \
+                            open_compressed(compressed_path) as out_fd:
+                        shutil.copyfileobj(in_fd, out_fd)
+
+                    with RspFile(compressed_path) as rsp_file:
+                        self.assertEqual([rsp_file.metadata, _read_all(rsp_file)], expected)
+
+                        # Reading backwards decompresses the stream again
+                        self.assertEqual(rsp_file[0].vectors[0].__dict__(), expected[1][0][1][0])
+
+    def test_archive_members(self):
+        with TemporaryDirectory() as tmp_dir:
+            zip_path = f"{tmp_dir}/vectors.zip"
+            tar_path = f"{tmp_dir}/vectors.tar.gz"
+
+            with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zip_archive, \
+                    tarfile.open(tar_path, "w:gz", compresslevel=1) as tar_archive:
+                for rsp_name in RSP_FILES:
+                    zip_archive.write(f"{THIS_SCRIPT_DIR}/data/{rsp_name}", f"vectors/{rsp_name}")
+                    tar_archive.add(f"{THIS_SCRIPT_DIR}/data/{rsp_name}", f"vectors/{rsp_name}")
+
+                zip_archive.writestr("vectors/README.txt", "Not an RSP file")
+
+            for archive_path in (zip_path, tar_path):
+                rsp_archive = RspArchive(archive_path)
+                self.assertEqual(rsp_archive.members, [f"vectors/{rsp_name}" for rsp_name in RSP_FILES])
+                self.assertEqual(len(rsp_archive), len(RSP_FILES))
+
+                for rsp_name, rsp_file in zip(RSP_FILES, rsp_archive):
+                    self.assertEqual(rsp_file.member, f"vectors/{rsp_name}")
+                    self.assertEqual([rsp_file.metadata, _read_all(rsp_file)], _read_expected(rsp_name))
+
+                with RspFile(archive_path, member="vectors/XTSGenAES128.rsp") as rsp_file:
+                    self.assertEqual(_read_all(rsp_file), _read_expected("XTSGenAES128.rsp")[1])
+
+                with self.assertRaises(KeyError):
+                    rsp_archive.open("vectors/missing.rsp")
+
+                # Several RSP files, the one to read must be given
+                with self.assertRaises(ValueError):
+                    RspFile(archive_path)
+
+    def test_single_member(self):
+        with TemporaryDirectory() as tmp_dir:
+            zip_path = f"{tmp_dir}/XTSGenAES128.zip"
+
+            with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as zip_archive:
+                zip_archive.write(f"{THIS_SCRIPT_DIR}/data/XTSGenAES128.rsp", "XTSGenAES128.rsp")
+
+            with RspFile(zip_path) as rsp_file:
+                self.assertEqual(rsp_file.member, "XTSGenAES128.rsp")
+                self.assertEqual([rsp_file.metadata, _read_all(rsp_file)], _read_expected("XTSGenAES128.rsp"))
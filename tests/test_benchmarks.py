@@ -0,0 +1,55 @@
+# coding: utf-8
+
+import copy
+import filecmp
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+
+from nist_tests_vectors import RspFile
+from benchmarks import RspShape, generate_rsp, run_benchmarks, compare
+
+
+class TestBenchmarks(TestCase):
+
+    def test_generator(self):
+        shape = RspShape(profiles=3, vectors_per_profile=10, fields=2, value_bytes=8, metadata_lines=5000, repeat=4)
+
+        with TemporaryDirectory() as tmp_dir:
+            generate_rsp(f"{tmp_dir}/first.rsp", shape)
+            generate_rsp(f"{tmp_dir}/second.rsp", shape)
+            self.assertTrue(filecmp.cmp(f"{tmp_dir}/first.rsp", f"{tmp_dir}/second.rsp", shallow=False))
+
+            with RspFile(f"{tmp_dir}/first.rsp", engine="mmap") as rsp_file:
+                self.assertEqual(len(rsp_file.metadata), shape.metadata_lines)
+                self.assertEqual(len(rsp_file), shape.profiles)
+                self.assertEqual(rsp_file[2].attributes, {"PROFILE": "2", "VALUE_BYTES": "8"})
+
+                vectors = list(rsp_file[0].vectors)
+                self.assertEqual(len(vectors), shape.vectors_per_profile)
+                self.assertEqual(set(vectors[0].keys()), {"COUNT", "FIELD0", "FIELD1"})
+                self.assertEqual(len(vectors[0]["FIELD0"]), shape.value_bytes)
+
+                # Monte-Carlo style, only the last field changes within a group of test vectors
+                self.assertEqual(vectors[0]["FIELD0"], vectors[3]["FIELD0"])
+                self.assertNotEqual(vectors[0]["FIELD1"], vectors[3]["FIELD1"])
+                self.assertNotEqual(vectors[0]["FIELD0"], vectors[4]["FIELD0"])
+
+    def test_run_and_compare(self):
+        shape = RspShape(profiles=2, vectors_per_profile=20)
+        results = run_benchmarks(shape, ["iterate_mmap", "json"], runs=1)
+
+        self.assertEqual(set(results["results"]), {"iterate_mmap", "json"})
+        self.assertEqual(results["vectors"], 40)
+        self.assertTrue(all(result["vectors_per_s"] > 0 for result in results["results"].values()))
+        self.assertEqual(compare(results, results), [])
+
+        baseline = copy.deepcopy(results)
+        baseline["results"]["json"]["vectors_per_s"] *= 2
+        baseline["results"]["iterate_mmap"]["peak_memory_mb"] /= 2
+        self.assertEqual(len(compare(results, baseline)), 2)
+
+        with self.assertRaises(ValueError):
+            compare(results, {**baseline, "shape": RspShape().to_dict()})
+
+        with self.assertRaises(ValueError):
+            run_benchmarks(shape, ["missing"])
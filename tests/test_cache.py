@@ -0,0 +1,93 @@
+# coding: utf-8
+
+import os
+import shutil
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from concurrent.futures import ProcessPoolExecutor
+
+from nist_tests_vectors import RspFile, RspCache
+
+THIS_SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+
+
+def _open_cached(cache_dir: str, rsp_path: str) -> list:
+    with RspCache(cache_dir).open(rsp_path) as rsp_store:
+        return [test_vectors.__dict__() for profile in rsp_store for test_vectors in profile.vectors]
+
+
+class TestRspCache(TestCase):
+
+    def test_hits_and_misses(self):
+        with TemporaryDirectory() as tmp_dir:
+            rsp_path = f"{tmp_dir}/XTSGenAES128.rsp"
+            shutil.copy(f"{THIS_SCRIPT_DIR}/data/XTSGenAES128.rsp", rsp_path)
+            cache = RspCache(f"{tmp_dir}/cache")
+
+            with cache.open(rsp_path) as rsp_store, RspFile(rsp_path) as rsp_file:
+                self.assertEqual(rsp_store.metadata, rsp_file.metadata)
+                self.assertEqual([profile.attributes for profile in rsp_store],
+                                 [profile.attributes for profile in rsp_file])
+                self.assertEqual([v.__dict__() for v in rsp_store[1].vectors],
+                                 [v.__dict__() for v in rsp_file[1].vectors])
+
+            with cache.open(rsp_path):
+                pass
+
+            self.assertEqual((cache.stats.hits, cache.stats.misses), (1, 1))
+
+            # Same content under another path, the cached entry is reused
+            shutil.copy(rsp_path, f"{tmp_dir}/copy.rsp")
+
+            with cache.open(f"{tmp_dir}/copy.rsp"):
+                pass
+
+            self.assertEqual((cache.stats.hits, cache.stats.misses), (2, 1))
+
+            # Modified files are parsed again
+            with open(rsp_path, "r") as rsp_fd:
+                rsp_content = rsp_fd.read()
+
+            with open(rsp_path, "w") as rsp_fd:
+                rsp_fd.write(rsp_content.replace("COUNT = 1\n", "COUNT = 1000\n", 1))
+
+            with cache.open(rsp_path) as rsp_store:
+                self.assertEqual(rsp_store[0].vectors[0]["COUNT"], 1000)
+
+            self.assertEqual((cache.stats.hits, cache.stats.misses), (2, 2))
+
+            cache.clear()
+            self.assertEqual(cache.size, 0)
+
+    def test_eviction(self):
+        with TemporaryDirectory() as tmp_dir:
+            cache = RspCache(f"{tmp_dir}/cache")
+
+            with cache.open(f"{THIS_SCRIPT_DIR}/data/XTSGenAES128.rsp"):
+                pass
+
+            # Room for a single entry, the least recently used one is evicted
+            cache.max_size = cache.size
+
+            with cache.open(f"{THIS_SCRIPT_DIR}/data/KDFFeedback_gen.rsp") as rsp_store:
+                self.assertEqual(cache.stats.evictions, 1)
+                self.assertEqual(cache.size, os.path.getsize(rsp_store.path))
+
+            with cache.open(f"{THIS_SCRIPT_DIR}/data/KDFFeedback_gen.rsp"):
+                pass
+
+            self.assertEqual((cache.stats.hits, cache.stats.misses), (1, 2))
+
+    def test_concurrent_processes(self):
+        rsp_path = f"{THIS_SCRIPT_DIR}/data/KDFFeedback_gen.rsp"
+
+        with TemporaryDirectory() as tmp_dir, RspFile(rsp_path) as rsp_file:
+            expected_vectors = [test_vectors.__dict__() for profile in rsp_file for test_vectors in profile.vectors]
+
+            with ProcessPoolExecutor(4) as executor:
+                results = list(executor.map(_open_cached, [f"{tmp_dir}/cache"] * 8, [rsp_path] * 8))
+
+            for vectors in results:
+                self.assertEqual(vectors, expected_vectors)
+
+            self.assertEqual(len(os.listdir(f"{tmp_dir}/cache")), 3)
@@ -0,0 +1,121 @@
+# coding: utf-8
+
+import os
+import shutil
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+
+from nist_tests_vectors import RspFile, RspCatalog, RspParsingError
+from nist_tests_vectors.catalog import CATALOG_FILE_NAME
+
+THIS_SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+
+
+def _copy_tree(tmp_dir: str) -> str:
+    corpus_dir = f"{tmp_dir}/corpus"
+    os.makedirs(f"{corpus_dir}/xts")
+    os.makedirs(f"{corpus_dir}/kdf")
+
+    shutil.copy(f"{THIS_SCRIPT_DIR}/data/XTSGenAES128.rsp", f"{corpus_dir}/xts/")
+    shutil.copy(f"{THIS_SCRIPT_DIR}/data/KDFFeedback_gen.rsp", f"{corpus_dir}/kdf/")
+    shutil.copy(f"{THIS_SCRIPT_DIR}/data/malformed3.rsp", corpus_dir)
+
+    return corpus_dir
+
+
+class TestRspCatalog(TestCase):
+
+    def test_build_and_find(self):
+        with TemporaryDirectory() as tmp_dir:
+            corpus_dir = _copy_tree(tmp_dir)
+            catalog = RspCatalog.build(corpus_dir, workers=1)
+
+            self.assertTrue(os.path.exists(f"{corpus_dir}/{CATALOG_FILE_NAME}"))
+            self.assertEqual(sorted(os.path.basename(path) for path in catalog.files),
+                             ["KDFFeedback_gen.rsp", "XTSGenAES128.rsp", "malformed3.rsp"])
+            self.assertEqual(list(map(os.path.basename, catalog.errors)), ["malformed3.rsp"])
+
+            xts_path = os.path.join(catalog.root, "xts", "XTSGenAES128.rsp")
+
+            with RspFile(xts_path) as rsp_file:
+                self.assertEqual(catalog.metadata(xts_path), rsp_file.metadata)
+
+                # Same profiles as when parsing the file, whichever way they are looked up
+                for catalog_profile in catalog.find({"ENCRYPT": ""}):
+                    profile = rsp_file[catalog_profile.position]
+                    self.assertEqual(catalog_profile.path, xts_path)
+                    self.assertEqual(catalog_profile.attributes, profile.attributes)
+                    self.assertEqual(catalog_profile.vectors_count, len(profile.vectors))
+                    self.assertEqual(list(catalog_profile.fields), list(profile.vectors[0].__dict__()))
+
+                    with catalog.open_profile(catalog_profile) as opened_profile:
+                        self.assertEqual(opened_profile.attributes, profile.attributes)
+                        self.assertEqual([v.__dict__() for v in opened_profile.vectors],
+                                         [v.__dict__() for v in profile.vectors])
+
+            self.assertEqual(len(catalog.find({"ENCRYPT": ""})), len(catalog.find(lambda a: "ENCRYPT" in a)))
+            self.assertEqual(catalog.find({"ENCRYPT": "", "MISSING": "1"}), [])
+
+            kdf_profiles = catalog.find(fields=["KO"])
+            self.assertTrue(kdf_profiles)
+            self.assertTrue(all(p.path.endswith("KDFFeedback_gen.rsp") for p in kdf_profiles))
+            self.assertEqual(kdf_profiles[0].fields["L"], "integer")
+
+            with catalog.open(xts_path) as rsp_file:
+                self.assertIsNotNone(rsp_file._index)
+
+            # Errors of malformed files are raised as when parsing them
+            with catalog.open(f"{corpus_dir}/malformed3.rsp") as rsp_file:
+                with self.assertRaisesRegex(RspParsingError, "Duplicated attribute"):
+                    list(rsp_file)
+
+    def test_incremental_update(self):
+        with TemporaryDirectory() as tmp_dir:
+            corpus_dir = _copy_tree(tmp_dir)
+            catalog_path = f"{tmp_dir}/catalog.json"
+            RspCatalog.build(corpus_dir, catalog_path, workers=1)
+
+            # Touched but unchanged files are not parsed again, removed ones are dropped
+            os.utime(f"{corpus_dir}/xts/XTSGenAES128.rsp")
+            os.remove(f"{corpus_dir}/malformed3.rsp")
+            shutil.copy(f"{THIS_SCRIPT_DIR}/data/test_export.rsp", corpus_dir)
+
+            catalog = RspCatalog.build(corpus_dir, catalog_path, workers=1)
+            self.assertEqual(sorted(os.path.basename(path) for path in catalog.files),
+                             ["KDFFeedback_gen.rsp", "XTSGenAES128.rsp", "test_export.rsp"])
+            self.assertEqual(catalog.errors, {})
+
+            # The file changed, its profiles can't be opened from the catalog anymore
+            kdf_path = f"{corpus_dir}/kdf/KDFFeedback_gen.rsp"
+
+            with open(kdf_path, "a") as rsp_fd:
+                rsp_fd.write("\n[L = 1]\n\nCOUNT = 0\n")
+
+            kdf_profile = next(p for p in catalog.profiles if p.path == os.path.abspath(kdf_path))
+
+            with self.assertRaises(ValueError):
+                with catalog.open_profile(kdf_profile):
+                    pass
+
+            catalog = RspCatalog.build(corpus_dir, catalog_path, workers=1)
+
+            with RspFile(kdf_path) as rsp_file:
+                self.assertEqual(len(catalog.find(lambda a: a.get("L") == "1")), 1)
+                self.assertEqual(len([p for p in catalog.profiles if p.path == os.path.abspath(kdf_path)]),
+                                 len(rsp_file))
+
+    def test_unreadable_file(self):
+        with TemporaryDirectory() as tmp_dir:
+            corpus_dir = _copy_tree(tmp_dir)
+            os.symlink(f"{tmp_dir}/missing.rsp", f"{corpus_dir}/vanished.rsp")
+
+            # Recorded as an error, the other files are still cataloged
+            catalog = RspCatalog.build(corpus_dir, workers=1)
+            self.assertIn(os.path.abspath(f"{corpus_dir}/vanished.rsp"), catalog.errors)
+            self.assertEqual(len(catalog.files), 4)
+            self.assertTrue(catalog.find({"PRF": "CMAC_AES128"}))
+
+            # Read again by the next build
+            shutil.copy(f"{THIS_SCRIPT_DIR}/data/test_export.rsp", f"{tmp_dir}/missing.rsp")
+            catalog = RspCatalog.build(corpus_dir, workers=1)
+            self.assertNotIn(os.path.abspath(f"{corpus_dir}/vanished.rsp"), catalog.errors)
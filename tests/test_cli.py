@@ -0,0 +1,73 @@
+# coding: utf-8
+
+import os
+import sys
+import shutil
+import argparse
+from unittest import TestCase, mock
+from tempfile import TemporaryDirectory
+
+from nist_tests_vectors import cli
+
+THIS_SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+
+
+def _crashing_convert(rsp_path: str, output: str, out_format: str, args: argparse.Namespace):
+    if rsp_path.endswith("crash.rsp"):
+        with open(output, "w") as output_fd:
+            output_fd.write("partial")
+
+        raise RuntimeError("Worker crashed")
+
+    return cli._convert_file(rsp_path, output, out_format, args)
+
+
+class TestCliConvert(TestCase):
+
+    def _convert(self, *arguments: str):
+        with mock.patch.object(sys, "argv", ["nist-tv", "convert", *arguments]):
+            cli.main()
+
+    def test_batch_failures_isolated(self):
+        with TemporaryDirectory() as tmp_dir:
+            os.makedirs(f"{tmp_dir}/rsp")
+            shutil.copy(f"{THIS_SCRIPT_DIR}/data/test_export.rsp", f"{tmp_dir}/rsp/test_export.rsp")
+
+            with open(f"{tmp_dir}/rsp/metadata_only.rsp", "w") as rsp_fd:
+                rsp_fd.write("# CAVS 12.0\n# No test vectors\n")
+
+            with self.assertRaises(SystemExit) as context:
+                self._convert(f"{tmp_dir}/rsp", "-o", f"{tmp_dir}/c", "-f", "c", "-j", "2")
+
+            self.assertEqual(context.exception.code, 1)
+            self.assertEqual(os.listdir(f"{tmp_dir}/c"), ["test_export.c"])
+
+            # Unexpected exceptions are reported as failures as well, partial outputs are removed
+            save_as_json = cli.save_as_json
+
+            def failing_save_as_json(rsp_file, output, **kwargs):
+                if rsp_file.path.endswith("metadata_only.rsp"):
+                    with open(output, "w") as output_fd:
+                        output_fd.write("[")
+
+                    raise IndexError("list index out of range")
+
+                save_as_json(rsp_file, output, **kwargs)
+
+            with mock.patch.object(cli, "save_as_json", failing_save_as_json):
+                with self.assertRaises(SystemExit):
+                    self._convert(f"{tmp_dir}/rsp", "-o", f"{tmp_dir}/json", "-f", "json")
+
+            self.assertEqual(os.listdir(f"{tmp_dir}/json"), ["test_export.json"])
+
+    def test_worker_failures_isolated(self):
+        with TemporaryDirectory() as tmp_dir:
+            args = argparse.Namespace(compact=False)
+            conversions = [(f"{tmp_dir}/crash.rsp", f"{tmp_dir}/crash.json"),
+                           (f"{THIS_SCRIPT_DIR}/data/test_export.rsp", f"{tmp_dir}/test_export.json")]
+
+            results = cli._convert_files(conversions, "json", args, 2, _crashing_convert)
+            errors = {os.path.basename(output): error for _, output, error in results}
+
+            self.assertEqual(errors, {"crash.json": "Unexpected RuntimeError: Worker crashed", "test_export.json": None})
+            self.assertEqual(os.listdir(tmp_dir), ["test_export.json"])
@@ -0,0 +1,64 @@
+# coding: utf-8
+
+import os
+from unittest import TestCase, skipIf
+from tempfile import TemporaryDirectory
+
+from nist_tests_vectors import RspFile, RspColumns
+from nist_tests_vectors.columns import np, VariableBytes
+from nist_tests_vectors.exporter import save_as_npz
+
+THIS_SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+
+@skipIf(np is None, "numpy is not installed")
+class TestRspColumns(TestCase):
+
+    def assertSameValues(self, profile_columns, profile):
+        for vectors_idx, test_vectors in enumerate(profile.vectors):
+            for key, value in test_vectors.__dict__().items():
+                column_value = profile_columns[key][vectors_idx]
+
+                if isinstance(value, int):
+                    self.assertEqual(int(column_value), value)
+                else:
+                    self.assertEqual(bytes(column_value), bytes(value))
+
+    def test_same_content_as_rsp_file(self):
+        with RspFile(f"{THIS_SCRIPT_DIR}/data/KDFFeedback_gen.rsp") as rsp_file:
+            rsp_columns = RspColumns.from_rsp_file(rsp_file)
+
+            self.assertEqual(rsp_columns.metadata, rsp_file.metadata)
+            self.assertEqual(len(rsp_columns), len(rsp_file))
+
+            for profile_columns, profile in zip(rsp_columns, rsp_file):
+                self.assertEqual(profile_columns.attributes, profile.attributes)
+                self.assertEqual(len(profile_columns), len(profile.vectors))
+                self.assertSameValues(profile_columns, profile)
+
+            self.assertEqual(rsp_columns[36]["COUNT"].dtype, np.int64)
+            self.assertEqual(rsp_columns[36]["KI"].shape, (40, 16))
+            self.assertIsInstance(rsp_columns[36]["KO"], VariableBytes)
+
+            with self.assertRaises(KeyError):
+                rsp_columns[36]["Nope"]
+
+    def test_save_and_load(self):
+        with TemporaryDirectory() as tmp_dir:
+            npz_path = f"{tmp_dir}/KDFFeedback_gen.npz"
+
+            with RspFile(f"{THIS_SCRIPT_DIR}/data/KDFFeedback_gen.rsp") as rsp_file:
+                save_as_npz(rsp_file, npz_path)
+
+                for mmap_mode in (None, "r"):
+                    rsp_columns = RspColumns.load(npz_path, mmap_mode=mmap_mode)
+                    self.assertEqual(rsp_columns.metadata, rsp_file.metadata)
+
+                    for profile_columns, profile in zip(rsp_columns, rsp_file):
+                        self.assertEqual(profile_columns.attributes, profile.attributes)
+                        self.assertSameValues(profile_columns, profile)
+
+                    self.assertEqual(rsp_columns[36]["KI"].flags.writeable, mmap_mode is None)
+
+                # Members are regular NPY files
+                with np.load(npz_path) as npz_file:
+                    self.assertEqual(npz_file["profiles/36/KI"].shape, (40, 16))
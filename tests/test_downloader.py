@@ -0,0 +1,222 @@
+# coding: utf-8
+
+import io
+import os
+import zipfile
+import threading
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from nist_tests_vectors.downloader import Downloader, DownloadError, download
+
+THIS_SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+
+
+def _make_archive(rsp_files: dict) -> bytes:
+    archive = io.BytesIO()
+
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zip_file:
+        for name, content in rsp_files.items():
+            zip_file.writestr(name, content)
+
+    return archive.getvalue()
+
+
+class _ArchivesHandler(BaseHTTPRequestHandler):
+
+    """
+    Serves the archives of the server, with their ETag, conditional and range requests.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+
+        if self.path not in self.server.archives:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        content, etag = self.server.archives[self.path]
+        truncated_size = self.server.truncated_sizes.pop(self.path, None)
+
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+
+        if self.server.unsatisfiable_responses.get(self.path):
+            self.server.unsatisfiable_responses[self.path] -= 1
+            self.send_response(416)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        first_byte = 0
+
+        if self.headers.get("Range") and self.headers.get("If-Range") == etag:
+            # Some servers send ranges starting before the requested one
+            first_byte = int(self.headers["Range"][len("bytes="):].rstrip("-"))
+            first_byte -= self.server.range_shifts.pop(self.path, 0)
+
+        self.send_response(206 if first_byte else 200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(content) - first_byte))
+
+        if first_byte:
+            self.send_header("Content-Range", f"bytes {first_byte}-{len(content) - 1}/{len(content)}")
+
+        self.end_headers()
+
+        if truncated_size is not None:
+            # Connection lost in the middle of the response
+            self.wfile.write(content[first_byte:truncated_size])
+            self.close_connection = True
+        else:
+            self.wfile.write(content[first_byte:])
+
+    def log_message(self, *_):
+        pass
+
+
+class TestDownloader(TestCase):
+
+    def setUp(self):
+        with open(f"{THIS_SCRIPT_DIR}/data/XTSGenAES128.rsp", "rb") as rsp_fd:
+            self.xts_content = rsp_fd.read()
+
+        with open(f"{THIS_SCRIPT_DIR}/data/KDFFeedback_gen.rsp", "rb") as rsp_fd:
+            self.kdf_content = rsp_fd.read()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _ArchivesHandler)
+        self.server.requests = []
+        self.server.truncated_sizes = {}
+        self.server.range_shifts = {}
+        self.server.unsatisfiable_responses = {}
+        self.server.archives = {
+            "/aes/XTSTestVectors.zip": (_make_archive({"format tweak value input/XTSGenAES128.rsp": self.xts_content,
+                                                       "readme.txt": b"Not an RSP file"}), '"xts-1"'),
+            "/kbkdf/KBKDF.zip": (_make_archive({"KDFFeedback_gen.rsp": self.kdf_content}), '"kbkdf-1"'),
+        }
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_download_and_revalidate(self):
+        with TemporaryDirectory() as tmp_dir:
+            rsp_paths = download(["xts", "kbkdf/KBKDF.zip"], tmp_dir, workers=2, base_url=self.base_url)
+
+            self.assertEqual(rsp_paths, [os.path.join(tmp_dir, "XTSTestVectors", "format tweak value input",
+                                                      "XTSGenAES128.rsp"),
+                                         os.path.join(tmp_dir, "KBKDF", "KDFFeedback_gen.rsp")])
+
+            for rsp_path, expected_content in zip(rsp_paths, (self.xts_content, self.kdf_content)):
+                with open(rsp_path, "rb") as rsp_fd:
+                    self.assertEqual(rsp_fd.read(), expected_content)
+
+            self.assertFalse(os.path.exists(os.path.join(tmp_dir, "XTSTestVectors", "readme.txt")))
+
+            # Archives that did not change are not downloaded again
+            self.server.requests.clear()
+
+            with Downloader(tmp_dir, self.base_url) as downloader:
+                self.assertEqual(downloader.download(["xts", "kbkdf/KBKDF.zip"]), rsp_paths)
+
+            self.assertEqual(sorted(headers["If-None-Match"] for _, headers in self.server.requests),
+                             ['"kbkdf-1"', '"xts-1"'])
+
+            # Archives that changed or whose files are missing are
+            self.server.archives["/kbkdf/KBKDF.zip"] = (_make_archive({"KDFFeedback_gen.rsp": b"Changed"}),
+                                                         '"kbkdf-2"')
+            os.remove(rsp_paths[0])
+
+            with Downloader(tmp_dir, self.base_url) as downloader:
+                self.assertEqual(downloader.download(["xts", "kbkdf/KBKDF.zip"]), rsp_paths)
+
+            with open(rsp_paths[0], "rb") as rsp_fd:
+                self.assertEqual(rsp_fd.read(), self.xts_content)
+
+            with open(rsp_paths[1], "rb") as rsp_fd:
+                self.assertEqual(rsp_fd.read(), b"Changed")
+
+            with self.assertRaisesRegex(DownloadError, "HTTP 404"):
+                download("nope/nope.zip", tmp_dir, base_url=self.base_url)
+
+    def test_resume_partial_download(self):
+        with TemporaryDirectory() as tmp_dir:
+            archive, _ = self.server.archives["/kbkdf/KBKDF.zip"]
+
+            self.server.truncated_sizes["/kbkdf/KBKDF.zip"] = len(archive) // 2
+
+            with self.assertRaisesRegex(DownloadError, "interrupted"):
+                download("kbkdf/KBKDF.zip", tmp_dir, base_url=self.base_url)
+
+            self.assertEqual(os.path.getsize(os.path.join(tmp_dir, "KBKDF.zip.part")), len(archive) // 2)
+            self.server.requests.clear()
+
+            rsp_paths = download("kbkdf/KBKDF.zip", tmp_dir, base_url=self.base_url)
+
+            self.assertEqual(self.server.requests[0][1]["Range"], f"bytes={len(archive) // 2}-")
+
+            with open(rsp_paths[0], "rb") as rsp_fd:
+                self.assertEqual(rsp_fd.read(), self.kdf_content)
+
+            self.assertFalse(os.path.exists(os.path.join(tmp_dir, "KBKDF.zip.part")))
+
+    def test_restart_download(self):
+        with TemporaryDirectory() as tmp_dir:
+            archive, _ = self.server.archives["/kbkdf/KBKDF.zip"]
+            partial_path = os.path.join(tmp_dir, "KBKDF.zip.part")
+
+            self.server.truncated_sizes["/kbkdf/KBKDF.zip"] = len(archive) // 2
+
+            with self.assertRaisesRegex(DownloadError, "interrupted"):
+                download("kbkdf/KBKDF.zip", tmp_dir, base_url=self.base_url)
+
+            # The partial response does not start where the partial archive ends, it is downloaded again
+            self.server.range_shifts["/kbkdf/KBKDF.zip"] = 10
+            self.server.requests.clear()
+
+            rsp_paths = download("kbkdf/KBKDF.zip", tmp_dir, base_url=self.base_url)
+
+            self.assertEqual([headers.get("Range") for _, headers in self.server.requests],
+                             [f"bytes={len(archive) // 2}-", None])
+
+            with open(rsp_paths[0], "rb") as rsp_fd:
+                self.assertEqual(rsp_fd.read(), self.kdf_content)
+
+            # Range not satisfiable, the download restarts from scratch
+            self.server.truncated_sizes["/kbkdf/KBKDF.zip"] = len(archive) // 2
+            self.server.archives["/kbkdf/KBKDF.zip"] = (archive, '"kbkdf-2"')
+
+            with self.assertRaisesRegex(DownloadError, "interrupted"):
+                download("kbkdf/KBKDF.zip", tmp_dir, base_url=self.base_url)
+
+            self.server.unsatisfiable_responses["/kbkdf/KBKDF.zip"] = 1
+            self.server.requests.clear()
+
+            rsp_paths = download("kbkdf/KBKDF.zip", tmp_dir, base_url=self.base_url)
+
+            self.assertEqual([headers.get("Range") for _, headers in self.server.requests],
+                             [f"bytes={len(archive) // 2}-", None])
+            self.assertFalse(os.path.exists(partial_path))
+
+            with open(rsp_paths[0], "rb") as rsp_fd:
+                self.assertEqual(rsp_fd.read(), self.kdf_content)
+
+            # Attempts are bounded
+            self.server.unsatisfiable_responses["/kbkdf/KBKDF.zip"] = 10
+            self.server.requests.clear()
+
+            with self.assertRaisesRegex(DownloadError, "3 attempts"):
+                download("kbkdf/KBKDF.zip", f"{tmp_dir}/other", base_url=self.base_url)
+
+            self.assertEqual(len(self.server.requests), 3)
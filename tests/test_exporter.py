@@ -2,11 +2,15 @@
 
 import os
 import json
-from unittest import TestCase
+import sqlite3
+from collections import Counter
+from unittest import TestCase, mock
 from tempfile import TemporaryDirectory
 
-from nist_tests_vectors import RspFile
-from nist_tests_vectors.exporter import save_as_json, save_as_c
+from nist_tests_vectors import RspFile, RspParsingError
+from nist_tests_vectors import parser, exporter
+from nist_tests_vectors.exporter import save_as_json, save_as_ndjson, save_as_c, save_as_sqlite, _get_template, CBlob, \
+    _collect_profile_attributes_values
 
 THIS_SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
 
@@ -29,6 +33,46 @@ class TestRspExporter(TestCase):
                 self.assertEqual(generated_json, expected_json)
 
 
+    def test_json_streaming_modes(self):
+        with RspFile(f"{THIS_SCRIPT_DIR}/data/test_export.rsp") as rsp_file:
+            with TemporaryDirectory() as tmp_dir:
+                with open(f"{THIS_SCRIPT_DIR}/data/expected_exports/rsp_file.json", "r") as expected_fd:
+                    expected_json = json.load(expected_fd)
+
+                save_as_json(rsp_file, f"{tmp_dir}/compact.json", compact=True)
+
+                with open(f"{tmp_dir}/compact.json", "r") as generated_fd:
+                    compact_content = generated_fd.read()
+
+                self.assertNotIn("\n", compact_content)
+                self.assertEqual(json.loads(compact_content), expected_json)
+
+                save_as_json(rsp_file.profiles[1], f"{tmp_dir}/profile.json")
+
+                with open(f"{tmp_dir}/profile.json", "r") as generated_fd:
+                    self.assertEqual(json.load(generated_fd), expected_json["profiles"][1])
+
+                save_as_ndjson(rsp_file, f"{tmp_dir}/inline.ndjson")
+
+                with open(f"{tmp_dir}/inline.ndjson", "r") as generated_fd:
+                    records = [json.loads(line) for line in generated_fd]
+
+                self.assertEqual(records[0], {"metadata": expected_json["metadata"]})
+                self.assertEqual(records[3], {
+                    "profile": 1,
+                    "attributes": expected_json["profiles"][1]["attributes"],
+                    "vector": expected_json["profiles"][1]["vectors"][0]
+                })
+
+                save_as_ndjson(rsp_file, f"{tmp_dir}/reference.ndjson", profile_attributes="reference")
+
+                with open(f"{tmp_dir}/reference.ndjson", "r") as generated_fd:
+                    records = [json.loads(line) for line in generated_fd]
+
+                self.assertEqual(records[1], {"profile": 0, "attributes": expected_json["profiles"][0]["attributes"]})
+                self.assertEqual(records[2], {"profile": 0, "vector": expected_json["profiles"][0]["vectors"][0]})
+                self.assertEqual(len(records), 7)
+
     def test_c_export(self):
         with RspFile(f"{THIS_SCRIPT_DIR}/data/test_export.rsp") as rsp_file:
             with TemporaryDirectory() as tmp_dir:
@@ -49,6 +93,270 @@ class TestRspExporter(TestCase):
                 for line in generated_lines:
                     self.assertIn(line, expected_lines)
 
+    def test_c_export_streamed(self):
+        with RspFile(f"{THIS_SCRIPT_DIR}/data/KDFFeedback_gen.rsp") as rsp_file:
+            with TemporaryDirectory() as tmp_dir:
+                generated_c_path = f"{tmp_dir}/kdf.c"
+                save_as_c(rsp_file, generated_c_path)
+
+                # Same output as the template iterating twice over the test vectors, rendered in memory
+                previous_template = _get_template(f"{THIS_SCRIPT_DIR}/data/expected_exports/rsp_file_two_passes.c.jinja")
+                expected_c = previous_template.render(
+                    rsp_file=rsp_file,
+                    tests_vectors_keys=next(rsp_file.profiles[0].vectors).keys(),
+                    profile_attributes_values=_collect_profile_attributes_values(rsp_file),
+                    blob=CBlob()
+                )
+
+                with open(generated_c_path, "r") as generated_fd:
+                    self.assertEqual(generated_fd.read(), expected_c)
+
+    def test_c_export_single_pass(self):
+        exhausted_profiles = Counter()
+        original_next = parser.TestVectorsIterator.__next__
+
+        def counting_next(tests_vectors):
+            try:
+                return original_next(tests_vectors)
+            except StopIteration:
+                exhausted_profiles[tests_vectors._profile_index.header_offset] += 1
+                raise
+
+        with RspFile(f"{THIS_SCRIPT_DIR}/data/KDFFeedback_gen.rsp") as rsp_file:
+            with TemporaryDirectory() as tmp_dir, mock.patch.object(parser.TestVectorsIterator, "__next__", counting_next):
+                save_as_c(rsp_file, f"{tmp_dir}/kdf.c")
+
+            # The test vectors of every profile are read through once
+            self.assertEqual(len(exhausted_profiles), len(rsp_file))
+            self.assertEqual(set(exhausted_profiles.values()), {1})
+
+    def test_c_export_without_test_vectors(self):
+        with TemporaryDirectory() as tmp_dir:
+            rsp_path = f"{tmp_dir}/metadata_only.rsp"
+
+            with open(rsp_path, "w") as rsp_fd:
+                rsp_fd.write("# CAVS 12.0\n# No test vectors\n")
+
+            with RspFile(rsp_path) as rsp_file:
+                for layout in ("symbols", "blob", "bin"):
+                    with self.assertRaisesRegex(ValueError, "has no profile to export to C"):
+                        save_as_c(rsp_file, f"{tmp_dir}/metadata_only.c", layout=layout)
+
+            with open(rsp_path, "a") as rsp_fd:
+                rsp_fd.write("\n[PRF = CMAC_AES128]\n\n[PRF = CMAC_AES192]\n\nCOUNT = 0\nL = 128\n")
+
+            with RspFile(rsp_path) as rsp_file:
+                with self.assertRaisesRegex(ValueError, "has no test vectors to export to C"):
+                    save_as_c(rsp_file, f"{tmp_dir}/metadata_only.c", shards=2)
+
+            self.assertEqual(os.listdir(tmp_dir), ["metadata_only.rsp"])
+
+    def test_c_blob_layout(self):
+        blob = CBlob()
+        self.assertEqual(blob.add(bytearray(b"\x01\x02")), 0)
+        self.assertEqual(blob.add(memoryview(b"\x03")), 2)
+        self.assertEqual(blob.add(b"\x01\x02"), 0)
+        self.assertEqual(blob.size, 3)
+        self.assertEqual(list(blob.lines(2)), [b"\x01\x02", b"\x03"])
+
+        with RspFile(f"{THIS_SCRIPT_DIR}/data/test_export.rsp") as rsp_file:
+            with TemporaryDirectory() as tmp_dir:
+                generated_c_path = f"{tmp_dir}/test_export.c"
+                save_as_c(rsp_file, generated_c_path, layout="blob")
+
+                with open(generated_c_path, "r") as generated_fd:
+                    generated_c = generated_fd.read()
+
+                # A single array holds all the byte arrays
+                self.assertEqual(generated_c.count("static const unsigned char"), 1)
+                self.assertIn(".KI = {0, 16},", generated_c)
+                self.assertIn('"\\x68\\x74\\xc0\\x99', generated_c)
+
+                with self.assertRaisesRegex(ValueError, "Unknown C layout"):
+                    save_as_c(rsp_file, f"{tmp_dir}/other.c", layout="other")
+
+    def test_c_bin_layout(self):
+        with RspFile(f"{THIS_SCRIPT_DIR}/data/test_export.rsp") as rsp_file:
+            with TemporaryDirectory() as tmp_dir:
+                save_as_c(rsp_file, f"{tmp_dir}/test_export.h", layout="bin")
+
+                with open(f"{tmp_dir}/test_export.h", "r") as generated_fd:
+                    generated_header = generated_fd.read()
+
+                with open(f"{tmp_dir}/test_export.bin", "rb") as bin_fd:
+                    blob = bin_fd.read()
+
+                expected_key = rsp_file.profiles[1].vectors[1]["KI"]
+                offset = blob.index(expected_key)
+
+                self.assertIn(f".KI = {{{offset}, {len(expected_key)}}},", generated_header)
+                self.assertIn("extern const unsigned char _binary_test_export_bin_start[];", generated_header)
+                self.assertIn(f"#define RSP_BLOB_SIZE {len(blob)}", generated_header)
+                self.assertNotIn("0x", generated_header)
+
+                with self.assertRaisesRegex(FileExistsError, "test_export.bin' already exists"):
+                    save_as_c(rsp_file, f"{tmp_dir}/test_export.c", layout="bin")
+
+    def test_c_sharded_export(self):
+        with RspFile(f"{THIS_SCRIPT_DIR}/data/KDFFeedback_gen.rsp") as rsp_file:
+            with TemporaryDirectory() as tmp_dir:
+                save_as_c(rsp_file, f"{tmp_dir}/kdf.c", shards=4)
+                self.assertEqual(sorted(os.listdir(tmp_dir)),
+                                 ["kdf.c", "kdf.h", "kdf_1.c", "kdf_2.c", "kdf_3.c", "kdf_4.c"])
+
+                with open(f"{tmp_dir}/kdf.h", "r") as header_fd:
+                    header = header_fd.read()
+
+                self.assertIn("extern const struct test_vectors* tests_vectors_120[];", header)
+
+                with open(f"{tmp_dir}/kdf_2.c", "r") as shard_fd:
+                    shard = shard_fd.read()
+
+                self.assertIn('#include "kdf.h"', shard)
+                self.assertIn("const struct test_vectors* tests_vectors_31[] = {", shard)
+                self.assertNotIn("tests_vectors_30[]", shard)
+
+                # Shards and header are never overwritten either
+                os.remove(f"{tmp_dir}/kdf.c")
+
+                with self.assertRaisesRegex(FileExistsError, "kdf.h' already exists"):
+                    save_as_c(rsp_file, f"{tmp_dir}/kdf.c", shards=4)
+
+                save_as_c(rsp_file, f"{tmp_dir}/kdf_budget.c", vectors_per_shard=500)
+                self.assertEqual(len([name for name in os.listdir(tmp_dir) if name.startswith("kdf_budget_")]), 10)
+
+                with self.assertRaisesRegex(ValueError, "can be sharded"):
+                    save_as_c(rsp_file, f"{tmp_dir}/blob.c", layout="blob", shards=2)
+
+            # A failing shard doesn't leave the files written before it
+            with TemporaryDirectory() as tmp_dir:
+                render_to_file = exporter._render_to_file
+
+                def failing_render_to_file(template, output_file, **context):
+                    if output_file.endswith("_3.c"):
+                        raise OSError("No space left on device")
+
+                    render_to_file(template, output_file, **context)
+
+                with mock.patch.object(exporter, "_render_to_file", failing_render_to_file):
+                    with self.assertRaisesRegex(OSError, "No space left"):
+                        save_as_c(rsp_file, f"{tmp_dir}/kdf.c", shards=4)
+
+                self.assertEqual(os.listdir(tmp_dir), [])
+
+    def test_c_bytes_filter(self):
+        with RspFile(f"{THIS_SCRIPT_DIR}/data/XTSGenAES128.rsp") as rsp_file:
+            with TemporaryDirectory() as tmp_dir:
+                template_path = f"{tmp_dir}/keys.c.jinja"
+                generated_c_path = f"{tmp_dir}/keys.c"
+
+                with open(template_path, "w") as template_fd:
+                    template_fd.write("{% for v in rsp_file.profiles[0].vectors[:2] %}{ {{- v['Key'] | c_bytes }}};\n{% endfor %}")
+
+                save_as_c(rsp_file, generated_c_path, template_path)
+
+                with open(generated_c_path, "r") as generated_fd:
+                    first_line = generated_fd.readline()
+
+                expected_key = rsp_file.profiles[0].vectors[0]["Key"]
+                self.assertEqual(first_line, "{" + "".join(f"0x{byte:02X}, " for byte in expected_key) + "};\n")
+
+    def test_templates_cache(self):
+        with TemporaryDirectory() as tmp_dir:
+            template_path = f"{tmp_dir}/metadata.c.jinja"
+
+            with open(template_path, "w") as template_fd:
+                template_fd.write("{{ rsp_file.metadata | length }}")
+
+            template = _get_template(template_path)
+            self.assertIs(_get_template(template_path), template)
+
+            # Modified templates are compiled again
+            with open(template_path, "w") as template_fd:
+                template_fd.write("{{ rsp_file.metadata | first }}")
+
+            os.utime(template_path, ns=(0, 0))
+
+            with RspFile(f"{THIS_SCRIPT_DIR}/data/test_export.rsp") as rsp_file:
+                self.assertIsNot(_get_template(template_path), template)
+                save_as_c(rsp_file, f"{tmp_dir}/metadata.c", template_path)
+
+            with open(f"{tmp_dir}/metadata.c", "r") as generated_fd:
+                self.assertEqual(generated_fd.read(), "CAVS 12.0")
+
+    def test_templates_includes(self):
+        with TemporaryDirectory() as tmp_dir:
+            template_path = f"{tmp_dir}/main.c.jinja"
+
+            with open(template_path, "w") as template_fd:
+                template_fd.write('{% include "metadata.jinja" %}\n{% include "rsp_file.h.jinja" %}')
+
+            with open(f"{tmp_dir}/metadata.jinja", "w") as template_fd:
+                template_fd.write("// {{ rsp_file.metadata | first }}")
+
+            # Templates of the same directory come before the built-in ones
+            with open(f"{tmp_dir}/rsp_file.h.jinja", "w") as template_fd:
+                template_fd.write("// {{ rsp_file | length }} profiles")
+
+            with RspFile(f"{THIS_SCRIPT_DIR}/data/test_export.rsp") as rsp_file:
+                save_as_c(rsp_file, f"{tmp_dir}/main.c", template_path)
+
+            with open(f"{tmp_dir}/main.c", "r") as generated_fd:
+                self.assertEqual(generated_fd.read(), "// CAVS 12.0\n// 2 profiles")
+
+    def test_sqlite_export(self):
+        with TemporaryDirectory() as tmp_dir:
+            database_path = f"{tmp_dir}/vectors.sqlite"
+
+            with RspFile(f"{THIS_SCRIPT_DIR}/data/KDFFeedback_gen.rsp") as kdf_rsp_file, \
+                    RspFile(f"{THIS_SCRIPT_DIR}/data/XTSGenAES128.rsp") as xts_rsp_file:
+                save_as_sqlite(kdf_rsp_file, database_path)
+
+                # RSP files are appended to the existing database
+                save_as_sqlite(xts_rsp_file, database_path)
+
+                connection = sqlite3.connect(database_path)
+
+                try:
+                    self.assertEqual(connection.execute("SELECT COUNT(*) FROM rsp_files").fetchone()[0], 2)
+                    self.assertEqual(json.loads(connection.execute("SELECT metadata FROM rsp_files WHERE id = 1")
+                                                .fetchone()[0]), kdf_rsp_file.metadata)
+
+                    expected_count = sum(len(profile.vectors) for profile in kdf_rsp_file) + \
+                        sum(len(profile.vectors) for profile in xts_rsp_file)
+                    self.assertEqual(connection.execute("SELECT COUNT(*) FROM vectors").fetchone()[0],
+                                     expected_count)
+
+                    rows = connection.execute("""
+                        SELECT profiles.position, vectors.position FROM vectors
+                        JOIN profiles ON profiles.id = vectors.profile_id
+                        JOIN profile_attributes ON profile_attributes.profile_id = profiles.id
+                        JOIN fields ON fields.vector_id = vectors.id
+                        WHERE profile_attributes.name = 'PRF' AND profile_attributes.value = 'CMAC_AES128'
+                          AND fields.key = 'L' AND fields.value = 512
+                    """).fetchall()
+
+                    expected_rows = [
+                        (profile_idx, vectors_idx)
+                        for profile_idx, profile in enumerate(kdf_rsp_file)
+                        if profile.attributes["PRF"] == "CMAC_AES128"
+                        for vectors_idx, test_vectors in enumerate(profile.vectors)
+                        if test_vectors["L"] == 512
+                    ]
+                    self.assertTrue(expected_rows)
+                    self.assertEqual(sorted(rows), expected_rows)
+
+                    first_key = connection.execute("""
+                        SELECT value FROM fields
+                        JOIN vectors ON vectors.id = fields.vector_id
+                        JOIN profiles ON profiles.id = vectors.profile_id
+                        WHERE profiles.rsp_file_id = 2 AND profiles.position = 0
+                          AND vectors.position = 0 AND fields.key = 'Key'
+                    """).fetchone()[0]
+                    self.assertEqual(first_key, xts_rsp_file[0].vectors[0]["Key"])
+                finally:
+                    connection.close()
+
     def test_file_already_exists(self):
         with RspFile(f"{THIS_SCRIPT_DIR}/data/XTSGenAES128.rsp") as rsp_file:
             with TemporaryDirectory() as tmp_dir:
@@ -62,3 +370,20 @@ class TestRspExporter(TestCase):
 
                 with self.assertRaisesRegex(FileExistsError, "already exists"):
                     save_as_c(rsp_file, generated_c_path)
+
+    def test_partial_file_removed_on_error(self):
+        with RspFile(f"{THIS_SCRIPT_DIR}/data/malformed1.rsp") as rsp_file:
+            with TemporaryDirectory() as tmp_dir:
+                generated_json_path = f"{tmp_dir}/malformed1.json"
+
+                with self.assertRaisesRegex(RspParsingError, "fields inconsistency"):
+                    save_as_json(rsp_file, generated_json_path)
+
+                self.assertFalse(os.path.exists(generated_json_path))
+
+                # Neither the header nor the .bin file are left, trying again fails the same way
+                for _ in range(2):
+                    with self.assertRaisesRegex(RspParsingError, "fields inconsistency"):
+                        save_as_c(rsp_file, f"{tmp_dir}/malformed1.h", layout="bin")
+
+                    self.assertEqual(os.listdir(tmp_dir), [])
@@ -0,0 +1,81 @@
+# coding: utf-8
+
+import os
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+
+from nist_tests_vectors import RspFile, RspParsingError, FieldTypes
+from nist_tests_vectors.field_types import infer_field_type, INTEGER, HEXSTRING
+
+THIS_SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+
+# The third key only contains digits, guessing the type value by value would make it an integer
+_DIGITS_ONLY_KEY_RSP = """\
+[ENCRYPT]
+
+COUNT = 0
+Key = 0a1b2c3d
+
+COUNT = 1
+Key = ffeeddcc
+
+COUNT = 2
+Key = 12345678
+"""
+
+class TestFieldTypes(TestCase):
+
+    def test_infer_field_type(self):
+        self.assertEqual(infer_field_type(["0", "1", "500"]), INTEGER)
+        self.assertEqual(infer_field_type(["1", "0042"]), HEXSTRING)
+        self.assertEqual(infer_field_type(["1", "0a"]), HEXSTRING)
+        self.assertEqual(infer_field_type(["1", str(2**32)]), HEXSTRING)
+        self.assertEqual(infer_field_type([""]), HEXSTRING)
+
+    def test_types_fixed_per_profile(self):
+        with TemporaryDirectory() as tmp_dir:
+            rsp_path = f"{tmp_dir}/digits.rsp"
+
+            with open(rsp_path, "w") as rsp_fd:
+                rsp_fd.write(_DIGITS_ONLY_KEY_RSP)
+
+            with RspFile(rsp_path) as rsp_file:
+                vectors = list(rsp_file.profiles[0].vectors)
+                self.assertEqual(vectors[2]["COUNT"], 2)
+                self.assertEqual(vectors[2]["Key"], bytearray.fromhex("12345678"))
+                self.assertEqual(rsp_file.profiles[0].field_types.to_dict(), {"COUNT": INTEGER, "Key": HEXSTRING})
+
+                # Random access infers the same types as sequential iteration
+                self.assertEqual(rsp_file.profiles[0].vectors[2]["Key"], bytearray.fromhex("12345678"))
+
+    def test_strict_mode(self):
+        with RspFile(f"{THIS_SCRIPT_DIR}/data/XTSGenAES128.rsp", field_types={"Key": INTEGER}) as rsp_file:
+            # Not strict: the value is decoded anyway
+            self.assertIsInstance(rsp_file.profiles[0].vectors[0]["Key"], bytearray)
+
+        with RspFile(f"{THIS_SCRIPT_DIR}/data/XTSGenAES128.rsp", field_types={"Key": INTEGER}, strict=True) as rsp_file:
+            with self.assertRaisesRegex(RspParsingError, "Expected integer for 'Key'"):
+                list(rsp_file.profiles[0].vectors)
+
+    def test_file_inference_and_reuse(self):
+        with RspFile(f"{THIS_SCRIPT_DIR}/data/KDFFeedback_gen.rsp", type_inference="file") as rsp_file:
+            for profile in rsp_file:
+                self.assertIs(profile.field_types, rsp_file.field_types)
+
+            list(rsp_file.profiles[0].vectors)
+            self.assertEqual(rsp_file.field_types["L"], INTEGER)
+            self.assertEqual(rsp_file.field_types["KI"], HEXSTRING)
+
+            with TemporaryDirectory() as tmp_dir:
+                types_path = f"{tmp_dir}/kdf.json"
+                rsp_file.field_types.save(types_path)
+                self.assertEqual(FieldTypes.load(types_path).to_dict(), rsp_file.field_types.to_dict())
+
+                with RspFile(f"{THIS_SCRIPT_DIR}/data/unusual_format_but_still_valid.rsp", field_types=types_path,
+                             strict=True) as other_rsp_file:
+                    vectors = other_rsp_file.profiles[0].vectors[0]
+                    self.assertEqual(vectors["L"], 512)
+                    self.assertIsInstance(vectors["KI"], bytearray)
+
+        with self.assertRaisesRegex(ValueError, "Unknown field type"):
+            FieldTypes({"COUNT": "float"})
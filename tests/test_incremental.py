@@ -0,0 +1,138 @@
+# coding: utf-8
+
+import os
+import shutil
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+
+from nist_tests_vectors import RspFile
+from nist_tests_vectors.exporter import save_as_json, save_as_c
+from nist_tests_vectors.incremental import ExportManifest, export_atomically, template_paths, MANIFEST_FILE_NAME
+
+THIS_SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+
+
+def _export_json(rsp_path: str, output_file: str) -> list:
+    def export(temporary_output: str):
+        with RspFile(rsp_path) as rsp_file:
+            save_as_json(rsp_file, temporary_output)
+
+    return export_atomically(export, output_file)
+
+
+class TestIncrementalExport(TestCase):
+
+    def test_manifest(self):
+        with TemporaryDirectory() as tmp_dir:
+            rsp_path = f"{tmp_dir}/test_export.rsp"
+            output_file = f"{tmp_dir}/out/test_export.json"
+            options = {"format": "json", "compact": False}
+            shutil.copy(f"{THIS_SCRIPT_DIR}/data/test_export.rsp", rsp_path)
+            os.makedirs(f"{tmp_dir}/out")
+
+            manifest = ExportManifest(f"{tmp_dir}/out")
+            self.assertFalse(manifest.is_up_to_date(rsp_path, output_file, options))
+
+            manifest.update(rsp_path, output_file, options, [], _export_json(rsp_path, output_file))
+            manifest.save()
+
+            # Loaded back from the manifest file
+            manifest = ExportManifest(f"{tmp_dir}/out")
+            self.assertTrue(os.path.exists(f"{tmp_dir}/out/{MANIFEST_FILE_NAME}"))
+            self.assertTrue(manifest.is_up_to_date(rsp_path, output_file, options))
+            self.assertFalse(manifest.is_up_to_date(rsp_path, output_file, {**options, "compact": True}))
+
+            # Touched but unchanged
+            os.utime(rsp_path, ns=(0, 0))
+            self.assertTrue(manifest.is_up_to_date(rsp_path, output_file, options))
+
+            # Modified output
+            with open(output_file, "a") as output_fd:
+                output_fd.write(" ")
+
+            self.assertFalse(manifest.is_up_to_date(rsp_path, output_file, options))
+
+            # Regenerated over the existing output, then the input changes
+            manifest.update(rsp_path, output_file, options, [], _export_json(rsp_path, output_file))
+            self.assertTrue(manifest.is_up_to_date(rsp_path, output_file, options))
+
+            with open(rsp_path, "a") as rsp_fd:
+                rsp_fd.write("\n")
+
+            self.assertFalse(manifest.is_up_to_date(rsp_path, output_file, options))
+
+            os.remove(output_file)
+            self.assertFalse(manifest.is_up_to_date(rsp_path, output_file, options))
+
+    def test_templates(self):
+        with TemporaryDirectory() as tmp_dir:
+            rsp_path = f"{THIS_SCRIPT_DIR}/data/test_export.rsp"
+            template_path = f"{tmp_dir}/custom.c.jinja"
+            output_file = f"{tmp_dir}/test_export.c"
+            options = {"format": "c", "template": template_path}
+
+            included_path = f"{tmp_dir}/parts/metadata.jinja"
+            os.makedirs(f"{tmp_dir}/parts")
+
+            with open(template_path, "w") as template_fd:
+                template_fd.write('// {{ rsp_file.metadata | length }}\n{% include "parts/metadata.jinja" %}\n')
+
+            with open(included_path, "w") as template_fd:
+                template_fd.write("// {{ rsp_file.metadata | first }}")
+
+            templates = template_paths("c", template_path)
+            self.assertIn(os.path.abspath(template_path), templates)
+            self.assertIn(os.path.abspath(included_path), templates)
+            self.assertEqual(template_paths("json", template_path), [])
+
+            def export(temporary_output: str):
+                with RspFile(rsp_path) as rsp_file:
+                    save_as_c(rsp_file, temporary_output, template_path)
+
+            manifest = ExportManifest(tmp_dir)
+            manifest.update(rsp_path, output_file, options, templates, export_atomically(export, output_file))
+            self.assertTrue(manifest.is_up_to_date(rsp_path, output_file, options, templates))
+
+            # Included templates are checked as well
+            with open(included_path, "a") as template_fd:
+                template_fd.write("// Modified\n")
+
+            self.assertFalse(manifest.is_up_to_date(rsp_path, output_file, options, templates))
+
+            manifest.update(rsp_path, output_file, options, templates, export_atomically(export, output_file))
+            self.assertTrue(manifest.is_up_to_date(rsp_path, output_file, options, templates))
+
+            with open(template_path, "a") as template_fd:
+                template_fd.write("// Modified\n")
+
+            self.assertFalse(manifest.is_up_to_date(rsp_path, output_file, options, templates))
+
+    def test_atomic_export(self):
+        with TemporaryDirectory() as tmp_dir:
+            output_file = f"{tmp_dir}/test_export.json"
+
+            with open(output_file, "w") as output_fd:
+                output_fd.write("previous")
+
+            def failing_export(temporary_output: str):
+                with open(temporary_output, "w") as output_fd:
+                    output_fd.write("partial")
+
+                raise ValueError("Failure")
+
+            # The previous output is kept, and no temporary file remains
+            with self.assertRaises(ValueError):
+                export_atomically(failing_export, output_file)
+
+            with open(output_file) as output_fd:
+                self.assertEqual(output_fd.read(), "previous")
+
+            self.assertEqual(os.listdir(tmp_dir), ["test_export.json"])
+
+            # Stale outputs of a previous export are removed once replaced
+            manifest = ExportManifest(tmp_dir)
+            stale_file = f"{tmp_dir}/test_export_2.json"
+            shutil.copy(output_file, stale_file)
+            manifest.update(output_file, output_file, {}, [], [output_file, stale_file])
+            manifest.update(output_file, output_file, {}, [], [output_file])
+            self.assertFalse(os.path.exists(stale_file))
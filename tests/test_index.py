@@ -0,0 +1,83 @@
+# coding: utf-8
+
+import os
+import shutil
+from unittest import TestCase
+from tempfile import TemporaryDirectory
+
+from nist_tests_vectors import RspFile, RspIndex
+
+THIS_SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+
+class TestRspIndex(TestCase):
+
+    def test_index_offsets(self):
+        index = RspIndex.build(f"{THIS_SCRIPT_DIR}/data/XTSGenAES128.rsp")
+        self.assertEqual(len(index), 2)
+        self.assertEqual(len(index[0].vector_offsets), 500)
+        self.assertEqual(len(index[1].vector_offsets), 500)
+        self.assertEqual(index[0].end_offset, index[1].header_offset)
+
+        with open(f"{THIS_SCRIPT_DIR}/data/XTSGenAES128.rsp", "rb") as rsp_fd:
+            rsp_fd.seek(index[1].header_offset)
+            self.assertEqual(rsp_fd.readline().strip(), b"[DECRYPT]")
+
+            rsp_fd.seek(index[1].vector_offsets[0])
+            self.assertEqual(rsp_fd.readline().strip(), b"COUNT = 1")
+
+    def test_random_access(self):
+        with RspFile(f"{THIS_SCRIPT_DIR}/data/KDFFeedback_gen.rsp") as rsp_file:
+            self.assertEqual(len(rsp_file), 120)
+
+            sequential = list(rsp_file[36].vectors)
+            self.assertEqual(len(rsp_file[36].vectors), 40)
+            self.assertEqual(rsp_file[36].vectors[0].__dict__(), sequential[0].__dict__())
+            self.assertEqual(rsp_file[36].vectors[-1].__dict__(), sequential[-1].__dict__())
+            self.assertEqual(rsp_file[36].vectors[17]["COUNT"], 17)
+            self.assertEqual([v["COUNT"] for v in rsp_file[36].vectors[2:5]], [2, 3, 4])
+
+            # Interleaved iterators must not interfere with each other
+            first_vectors = rsp_file[0].vectors
+            other_vectors = rsp_file[119].vectors
+            self.assertEqual(next(first_vectors)["COUNT"], 0)
+            self.assertEqual(next(other_vectors)["COUNT"], 0)
+            self.assertEqual(next(first_vectors)["COUNT"], 1)
+
+    def test_crlf_file(self):
+        with TemporaryDirectory() as tmp_dir:
+            crlf_path = f"{tmp_dir}/XTSGenAES128.rsp"
+
+            with open(f"{THIS_SCRIPT_DIR}/data/XTSGenAES128.rsp", "rb") as src_fd:
+                content = src_fd.read().replace(b"\n", b"\r\n")
+
+            with open(crlf_path, "wb") as dst_fd:
+                dst_fd.write(content)
+
+            with RspFile(crlf_path) as rsp_file:
+                self.assertEqual(rsp_file[1].attributes, {"DECRYPT": ""})
+                self.assertEqual(len(list(rsp_file[1].vectors)), 500)
+                self.assertEqual(rsp_file[1].vectors[-1]["COUNT"], 500)
+
+    def test_sidecar(self):
+        with TemporaryDirectory() as tmp_dir:
+            rsp_path = f"{tmp_dir}/XTSGenAES128.rsp"
+            shutil.copy(f"{THIS_SCRIPT_DIR}/data/XTSGenAES128.rsp", rsp_path)
+
+            with RspFile(rsp_path, sidecar_index=True) as rsp_file:
+                self.assertEqual(len(rsp_file), 2)
+
+            self.assertTrue(os.path.exists(RspIndex.sidecar_path(rsp_path)))
+            self.assertIsNotNone(RspIndex.load(rsp_path))
+
+            # Touching the file does not invalidate the index as long as the content is the same
+            os.utime(rsp_path, ns=(0, 0))
+            self.assertIsNotNone(RspIndex.load(rsp_path))
+
+            with open(rsp_path, "ab") as rsp_fd:
+                rsp_fd.write(b"\n[NEW_PROFILE]\n")
+
+            self.assertIsNone(RspIndex.load(rsp_path))
+
+            with RspFile(rsp_path, sidecar_index=True) as rsp_file:
+                self.assertEqual(len(rsp_file), 3)
+                self.assertEqual(len(rsp_file[2].vectors), 0)
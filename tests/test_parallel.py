@@ -0,0 +1,54 @@
+# coding: utf-8
+
+import os
+from unittest import TestCase
+
+from nist_tests_vectors import RspFile, RspParsingError, parse_in_parallel
+
+THIS_SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+
+class TestParallelParsing(TestCase):
+
+    def test_same_results_as_sequential_parsing(self):
+        for options in ({}, {"engine": "mmap"}, {"type_inference": "file"}):
+            with RspFile(f"{THIS_SCRIPT_DIR}/data/KDFFeedback_gen.rsp", **options) as rsp_file:
+                expected_vectors = [(profile.attributes, test_vectors.__dict__())
+                                    for profile in rsp_file for test_vectors in profile.vectors]
+
+            with RspFile(f"{THIS_SCRIPT_DIR}/data/KDFFeedback_gen.rsp", **options) as rsp_file:
+                # Small chunks, profiles are split among several tasks
+                vectors = [(profile.attributes, test_vectors.__dict__())
+                           for profile, test_vectors in parse_in_parallel(rsp_file, workers=2, chunk_size=7)]
+
+                self.assertEqual(vectors, expected_vectors)
+                self.assertEqual(rsp_file[0].field_types["KI"], "hexstring")
+                self.assertEqual(rsp_file[0].field_types["L"], "integer")
+
+    def test_malformed_rspfile(self):
+        for malformed_file, message in (("malformed1.rsp", "fields inconsistency"),
+                                        ("malformed6.rsp", "Duplicated key: Key"),
+                                        ("malformed7.rsp", "Expected integer or hex")):
+
+            with RspFile(f"{THIS_SCRIPT_DIR}/data/{malformed_file}") as rsp_file:
+                expected_count = 0
+
+                try:
+                    for profile in rsp_file:
+                        for _ in profile.vectors:
+                            expected_count += 1
+                except RspParsingError:
+                    pass
+
+            with RspFile(f"{THIS_SCRIPT_DIR}/data/{malformed_file}") as rsp_file:
+                count = 0
+
+                with self.assertRaisesRegex(RspParsingError, message):
+                    for _ in parse_in_parallel(rsp_file, workers=2, chunk_size=1):
+                        count += 1
+
+                # Test vectors preceding the faulty one are still yielded
+                self.assertEqual(count, expected_count)
+
+        with RspFile(f"{THIS_SCRIPT_DIR}/data/KDFFeedback_gen.rsp", lazy=True) as rsp_file:
+            with self.assertRaisesRegex(ValueError, "can't be used with parallel parsing"):
+                next(parse_in_parallel(rsp_file))
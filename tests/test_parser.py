@@ -1,9 +1,11 @@
 # coding: utf-8
 
 import os
+import copy
+import pickle
 from unittest import TestCase
 
-from nist_tests_vectors import RspFile, RspParsingError, TestVector, TestVectors
+from nist_tests_vectors import RspFile, RspParsingError, TestVector, TestVectors, VectorsSchema
 
 THIS_SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
 
@@ -22,11 +24,41 @@ class TestTestVectors(TestCase):
         with self.assertRaises(ValueError):
             TestVector.parse_vector_value("something random")
 
+    def test_pickle_and_copy(self):
+        test_vector = TestVector("Key", bytearray(b"\x01\x02"))
+
+        self.assertEqual(pickle.loads(pickle.dumps(test_vector)), test_vector)
+        self.assertEqual(copy.deepcopy(test_vector), test_vector)
+        self.assertIsNot(copy.deepcopy(test_vector).value, test_vector.value)
+        self.assertEqual(copy.copy(TestVector("COUNT", 1)), TestVector("COUNT", 1))
+
     def test_vectors_iterable(self):
         test_vectors = TestVectors()
         test_vectors.append(TestVector("COUNT", 1))
-        self.assertEqual(len(test_vectors), 1)
-        # TODO
+        test_vectors.append(TestVector("Key", bytearray(b"\xaa")))
+        self.assertEqual(len(test_vectors), 2)
+        self.assertEqual(test_vectors.keys(), {"COUNT", "Key"})
+        self.assertEqual(test_vectors["Key"], bytearray(b"\xaa"))
+        self.assertEqual(list(test_vectors), [TestVector("COUNT", 1), TestVector("Key", bytearray(b"\xaa"))])
+        self.assertEqual(test_vectors.__dict__(), {"COUNT": 1, "Key": bytearray(b"\xaa")})
+
+        with self.assertRaisesRegex(KeyError, "not found"):
+            test_vectors["PT"]
+
+    def test_shared_schema(self):
+        schema = VectorsSchema(("COUNT", "Key"))
+        first = TestVectors(schema, [1, bytearray(b"\x01")])
+        second = TestVectors(schema, [2, bytearray(b"\x02")])
+        self.assertIs(first.keys(), second.keys())
+
+        # Appending to a test vectors must not alter the others sharing its schema
+        second.append(TestVector("PT", bytearray(b"\x03")))
+        self.assertEqual(len(schema), 2)
+        self.assertEqual(second["PT"], bytearray(b"\x03"))
+
+        with RspFile(f"{THIS_SCRIPT_DIR}/data/XTSGenAES128.rsp") as rsp_file:
+            vectors = list(rsp_file.profiles[0].vectors)
+            self.assertIs(vectors[0].schema, vectors[-1].schema)
 
 
 class TestRspParsing(TestCase):
@@ -44,6 +76,27 @@ class TestRspParsing(TestCase):
                 self.assertEqual(len([v for v in profile.vectors]), 500)
                 self.assertEqual(len([v for v in profile.vectors]), 500)
 
+    def test_profiles_read_lazily(self):
+        with RspFile(f"{THIS_SCRIPT_DIR}/data/XTSGenAES128.rsp") as rsp_file:
+            first_profile = next(iter(rsp_file))
+            self.assertEqual(len(rsp_file._profiles), 1)
+
+            # The same profiles are yielded by subsequent iterations
+            self.assertIs(rsp_file[0], first_profile)
+            self.assertEqual(list(rsp_file), rsp_file.profiles)
+            self.assertIs(list(rsp_file)[1], rsp_file[1])
+
+        # Profiles can still be read one after the other with next, iter restarts from the first one
+        with RspFile(f"{THIS_SCRIPT_DIR}/data/XTSGenAES128.rsp") as rsp_file:
+            first_profile = next(rsp_file)
+            self.assertIs(next(rsp_file), rsp_file[1])
+
+            with self.assertRaises(StopIteration):
+                next(rsp_file)
+
+            iter(rsp_file)
+            self.assertIs(next(rsp_file), first_profile)
+
 
     def test_weird_rspfile(self):
         with RspFile(f"{THIS_SCRIPT_DIR}/data/unusual_format_but_still_valid.rsp") as rsp_file:
@@ -238,3 +291,151 @@ class TestRspParsing(TestCase):
             self.assertEqual(hmac_sha512_tests[-1]["FixedInputDataByteLen"], 51)
             self.assertEqual(hmac_sha512_tests[-1]["FixedInputData"], bytearray.fromhex("499ced4f4ebabbbb80a7d86a19164fd6e1043cea1e00650b76c001273c6f2079d2f2df3e68b38880437ee6de6635018dfaeb0d"))
             self.assertEqual(hmac_sha512_tests[-1]["KO"], bytearray.fromhex("75aec3278b8574c96b99dffd7cf1698dcb0a570f7fc26060c6e94d2efa7368457c1d762a55374a25baf33054910038370e1acf1a51b7da3f90632af12d693ce91aca44aa9e63293f44280f997eea39ba80cd5215edfbc01f5a505dc75180b48079a2d8db6b0d53f9cdf83229a26e810aa93fa57b5eeaaea321a8e55266f02280ae3f713a848a855df1f9a813da98d78fd71876446246e37685ff6111158a592e3e2aeaea599aa21306ad301ca9a381b908134a6ec18e85408a757e98a7990599e371e61446d5a3d45119139503a41c34d6c372a9144d833364d9ec3ab4279da180249de2641e346019b99361e7fb26347d6d3d45b3f5830e34dad822b8eea256462ab45e341153fc98c354aa7067e3826ecb8c21cdfcec2a4fc85a5679c526c65029201442791a6118e58ba5"))
+
+
+class TestMmapEngine(TestCase):
+
+    def test_same_results_as_file_engine(self):
+        for rsp_name in ["XTSGenAES128", "KDFFeedback_gen", "unusual_format_but_still_valid", "test_export"]:
+            rsp_path = f"{THIS_SCRIPT_DIR}/data/{rsp_name}.rsp"
+
+            with RspFile(rsp_path) as file_rsp, RspFile(rsp_path, engine="mmap") as mmap_rsp:
+                self.assertEqual(file_rsp.metadata, mmap_rsp.metadata)
+                self.assertEqual(len(file_rsp.profiles), len(mmap_rsp.profiles))
+
+                for file_profile, mmap_profile in zip(file_rsp, mmap_rsp):
+                    self.assertEqual(file_profile.attributes, mmap_profile.attributes)
+                    self.assertEqual([v.__dict__() for v in file_profile.vectors],
+                                     [v.__dict__() for v in mmap_profile.vectors])
+
+    def test_malformed_rspfile(self):
+        expected_errors = {
+            "malformed1": "fields inconsistency",
+            "malformed3": "Duplicated attribute",
+            "malformed6": "Duplicated key: Key",
+            "malformed7": "Expected integer or hex",
+            "malformed8": "Invalid profile attribute",
+        }
+
+        for rsp_name, expected_error in expected_errors.items():
+            with RspFile(f"{THIS_SCRIPT_DIR}/data/{rsp_name}.rsp", engine="mmap") as rsp_file:
+                with self.assertRaisesRegex(RspParsingError, expected_error):
+                    for profile in rsp_file:
+                        list(profile.vectors)
+
+    def test_unknown_engine(self):
+        with self.assertRaisesRegex(ValueError, "Unknown parser engine"):
+            RspFile(f"{THIS_SCRIPT_DIR}/data/XTSGenAES128.rsp", engine="nope")
+
+
+class TestZeroCopy(TestCase):
+
+    def test_values_are_views(self):
+        rsp_path = f"{THIS_SCRIPT_DIR}/data/KDFFeedback_gen.rsp"
+
+        with RspFile(rsp_path) as rsp_file, RspFile(rsp_path, engine="mmap", zero_copy=True) as zero_copy_rsp:
+            expected_vectors = list(rsp_file.profiles[60].vectors)
+            vectors = list(zero_copy_rsp.profiles[60].vectors)
+
+            self.assertEqual([v.__dict__() for v in expected_vectors], [v.__dict__() for v in vectors])
+            self.assertEqual(list(expected_vectors[3]), list(vectors[3]))
+            self.assertEqual(zero_copy_rsp.profiles[60].vectors[-1]["KO"], expected_vectors[-1]["KO"])
+
+            self.assertIsInstance(vectors[0]["KI"], memoryview)
+            self.assertTrue(vectors[0]["KI"].readonly)
+            self.assertIs(vectors[0]["KI"].obj, vectors[-1]["KO"].obj)
+            self.assertEqual(vectors[0]["COUNT"], 0)
+
+            # Appending detaches the values from the shared buffer
+            vectors[0].append(TestVector("Extra", 1))
+            self.assertEqual(vectors[0]["KI"], expected_vectors[0]["KI"])
+            self.assertEqual(vectors[0]["Extra"], 1)
+            self.assertEqual(vectors[1]["KI"], expected_vectors[1]["KI"])
+
+class TestLazyDecoding(TestCase):
+
+    def test_values_decoded_on_access(self):
+        rsp_path = f"{THIS_SCRIPT_DIR}/data/KDFFeedback_gen.rsp"
+
+        with RspFile(rsp_path) as rsp_file, RspFile(rsp_path, lazy=True) as lazy_rsp:
+            expected_vectors = list(rsp_file.profiles[60].vectors)
+            vectors = list(lazy_rsp.profiles[60].vectors)
+
+            # Nothing is decoded until accessed
+            self.assertTrue(all(type(value) is str for value in vectors[0]._values))
+            self.assertEqual(vectors[0]["KI"], expected_vectors[0]["KI"])
+            self.assertIsInstance(vectors[0]._values[vectors[0].schema.positions["KI"]], bytearray)
+            self.assertIsInstance(vectors[0]._values[vectors[0].schema.positions["KO"]], str)
+
+            self.assertEqual([v.__dict__() for v in expected_vectors], [v.__dict__() for v in vectors])
+            self.assertEqual(list(expected_vectors[3]), list(vectors[3]))
+
+            vectors[1].append(TestVector("Extra", 1))
+            self.assertEqual(vectors[1]["KO"], expected_vectors[1]["KO"])
+            self.assertEqual(vectors[1]["Extra"], 1)
+
+        with self.assertRaisesRegex(ValueError, "can't be used together"):
+            RspFile(rsp_path, lazy=True, zero_copy=True)
+
+    def test_errors_raised_on_access(self):
+        with RspFile(f"{THIS_SCRIPT_DIR}/data/XTSGenAES128.rsp", field_types={"Key": "integer"}, strict=True,
+                     lazy=True) as rsp_file:
+            vectors = rsp_file.profiles[0].vectors[0]
+            self.assertEqual(vectors["COUNT"], 1)
+
+            with self.assertRaisesRegex(RspParsingError, "Expected integer for 'Key'"):
+                vectors["Key"]
+
+class TestSelect(TestCase):
+
+    def test_select(self):
+        with RspFile(f"{THIS_SCRIPT_DIR}/data/KDFFeedback_gen.rsp") as rsp_file:
+            expected_vectors = [
+                (profile, test_vectors)
+                for profile in rsp_file
+                if profile.attributes["PRF"] == "CMAC_AES128"
+                for test_vectors in profile.vectors
+                if test_vectors["COUNT"] < 10
+            ]
+
+            read_offsets = []
+            read_blocks = rsp_file._engine.read_blocks
+
+            def spy_read_blocks(offsets, end):
+                read_offsets.extend(offsets)
+                return read_blocks(offsets, end)
+
+            rsp_file._engine.read_blocks = spy_read_blocks
+
+            selected_vectors = list(rsp_file.select(profile={"PRF": "CMAC_AES128"},
+                                                    where=lambda test_vectors: test_vectors["COUNT"] < 10,
+                                                    fields=["COUNT", "KO"]))
+
+            self.assertEqual(len(selected_vectors), len(expected_vectors))
+
+            for (profile, test_vectors), (expected_profile, expected_test_vectors) in zip(selected_vectors,
+                                                                                          expected_vectors):
+                self.assertIs(profile, expected_profile)
+                self.assertEqual(test_vectors.__dict__(), {"COUNT": expected_test_vectors["COUNT"],
+                                                           "KO": expected_test_vectors["KO"]})
+
+            # Test vectors of the other profiles are never read
+            matching_offsets = {
+                offset
+                for profile in rsp_file
+                if profile.attributes["PRF"] == "CMAC_AES128"
+                for offset in profile._profile_index.vector_offsets
+            }
+            self.assertTrue(read_offsets)
+            self.assertTrue(set(read_offsets) <= matching_offsets)
+
+            # Without fields, values are decoded on access
+            profile, test_vectors = next(rsp_file.select(lambda attributes: attributes["PRF"] == "HMAC_SHA1"))
+            self.assertEqual(profile.attributes["PRF"], "HMAC_SHA1")
+            self.assertTrue(all(type(value) is str for value in test_vectors._values))
+            self.assertEqual(test_vectors["KI"], profile.vectors[0]["KI"])
+
+            with self.assertRaisesRegex(KeyError, "Key 'Nope' not found"):
+                next(rsp_file.select(fields=["Nope"]))
+
+            self.assertEqual(list(rsp_file.select(profile={"PRF": "Nope"})), [])
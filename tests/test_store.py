@@ -0,0 +1,81 @@
+# coding: utf-8
+
+import os
+import sys
+import struct
+from unittest import TestCase, mock
+from tempfile import TemporaryDirectory
+
+from nist_tests_vectors import RspFile, RspStore
+from nist_tests_vectors.exporter import save_as_ntvb
+
+THIS_SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+
+class TestRspStore(TestCase):
+
+    def test_same_content_as_rsp_file(self):
+        with TemporaryDirectory() as tmp_dir:
+            store_path = f"{tmp_dir}/KDFFeedback_gen.ntvb"
+
+            with RspFile(f"{THIS_SCRIPT_DIR}/data/KDFFeedback_gen.rsp") as rsp_file:
+                save_as_ntvb(rsp_file, store_path)
+
+                with RspStore(store_path) as store:
+                    self.assertEqual(store.metadata, rsp_file.metadata)
+                    self.assertEqual(len(store), len(rsp_file))
+
+                    for stored_profile, profile in zip(store, rsp_file):
+                        self.assertEqual(stored_profile.attributes, profile.attributes)
+                        self.assertEqual([v.__dict__() for v in stored_profile.vectors],
+                                         [v.__dict__() for v in profile.vectors])
+
+                    self.assertEqual(len(store[36].vectors), 40)
+                    self.assertEqual(store[36].vectors[-1]["COUNT"], 39)
+                    self.assertEqual([v["COUNT"] for v in store[36].vectors[2:5]], [2, 3, 4])
+                    self.assertIsInstance(store[36].vectors[0]["KI"], bytearray)
+                    self.assertEqual(store[36].field_types["L"], "integer")
+
+                    with self.assertRaises(IndexError):
+                        store[36].vectors[40]
+
+                with RspStore(store_path, zero_copy=True) as store:
+                    key = store[0].vectors[0]["KI"]
+                    self.assertIsInstance(key, memoryview)
+                    self.assertEqual(key, rsp_file[0].vectors[0]["KI"])
+                    del key
+
+    def test_byte_order(self):
+        with TemporaryDirectory() as tmp_dir:
+            store_path = f"{tmp_dir}/XTSGenAES128.ntvb"
+
+            with RspFile(f"{THIS_SCRIPT_DIR}/data/XTSGenAES128.rsp") as rsp_file:
+                save_as_ntvb(rsp_file, store_path)
+                first_values = list(rsp_file[0].vectors[0].__dict__().values())
+
+            # Tables are little-endian on any host
+            with open(store_path, "rb") as store_fd:
+                content = store_fd.read()
+
+            tables_offset = struct.unpack_from("<4sI5Q", content)[4]
+            first_cells = struct.unpack_from("<2Q", content, tables_offset)
+            expected_cells = (first_values[0], 2**64 - 1) if isinstance(first_values[0], int) \
+                else (0, len(first_values[0]))
+
+            self.assertEqual(first_cells, expected_cells)
+
+            # Tables are byteswapped both ways on big-endian hosts
+            with mock.patch.object(sys, "byteorder", "big"):
+                with RspFile(f"{THIS_SCRIPT_DIR}/data/XTSGenAES128.rsp") as rsp_file:
+                    save_as_ntvb(rsp_file, f"{tmp_dir}/swapped.ntvb")
+
+                with RspStore(f"{tmp_dir}/swapped.ntvb") as store:
+                    self.assertEqual(list(store[0].vectors[0].__dict__().values()), first_values)
+                    self.assertEqual(store[1].vectors[-1]["COUNT"], 500)
+
+    def test_invalid_file(self):
+        with TemporaryDirectory() as tmp_dir:
+            with open(f"{tmp_dir}/invalid.ntvb", "wb") as invalid_fd:
+                invalid_fd.write(b"[ENCRYPT]\n")
+
+            with self.assertRaisesRegex(ValueError, "not an NTVB file"):
+                RspStore(f"{tmp_dir}/invalid.ntvb")